@@ -0,0 +1,123 @@
+"""
+Aggregate Engine Module
+Group-by aggregation over the factorized codes kept in the dataset's column
+indexes: group keys are combined into dense group IDs and every measure is
+reduced per group with bincount or a grouped kernel, never a Python loop
+over groups
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from filter_engine import ColumnIndex, get_column_index
+
+AGGREGATIONS = ('count', 'sum', 'mean', 'min', 'max', 'std', 'median')
+
+# Above this many possible key combinations, group IDs are found by sorting
+# instead of a presence table
+DENSE_KEY_SPACE = 1 << 24
+
+
+def _densify(keys: np.ndarray, key_space: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map combined keys to dense group IDs in key order
+    Returns: (group ID per row, key of each group)
+    """
+    if key_space <= max(DENSE_KEY_SPACE, len(keys)):
+        present = np.bincount(keys, minlength=key_space) > 0
+        group_keys = np.flatnonzero(present)
+        lookup = np.cumsum(present) - 1
+        return lookup[keys], group_keys
+    group_keys, ids = np.unique(keys, return_inverse=True)
+    return ids, group_keys
+
+
+def group_ids(indexes: Dict[str, ColumnIndex], df: pd.DataFrame, group_by: Sequence[str],
+              positions: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    """
+    Dense group ID of every selected row whose group-by values are all present
+    Returns: (row positions, group ID per row, group keys as a DataFrame)
+    """
+    rows = np.arange(len(df)) if positions is None else positions
+    if not group_by:
+        return rows, np.zeros(len(rows), dtype=np.int64), pd.DataFrame(index=range(1 if len(rows) else 0))
+
+    column_indexes = [get_column_index(indexes, df, col) for col in group_by]
+    codes = [index.codes[rows] for index in column_indexes]
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    if not valid.all():
+        rows = rows[valid]
+        codes = [c[valid] for c in codes]
+
+    # Mixed-radix combination of the columns' codes, re-densified whenever
+    # the key space would outgrow int64
+    keys = np.zeros(len(rows), dtype=np.int64)
+    key_space = 1
+    for c, index in zip(codes, column_indexes):
+        radix = max(len(index.uniques), 1)
+        if key_space * radix >= 1 << 62:
+            keys, group_keys = _densify(keys, key_space)
+            key_space = len(group_keys)
+        keys = keys * radix + c
+        key_space *= radix
+    ids, group_keys = _densify(keys, key_space)
+
+    # Group keys from one representative row per group (writing in reverse
+    # so each group keeps its first row)
+    representative = np.empty(len(group_keys), dtype=np.int64)
+    representative[ids[::-1]] = np.arange(len(ids) - 1, -1, -1)
+    columns = {col: index.uniques.take(c[representative])
+               for col, index, c in zip(group_by, column_indexes, codes)}
+    return rows, ids, pd.DataFrame(columns)
+
+
+def _reduce(ids: np.ndarray, values: np.ndarray, num_groups: int, function: str) -> np.ndarray:
+    """One aggregation of non-missing values per group (NaN for empty groups)"""
+    counts = np.bincount(ids, minlength=num_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if function == 'sum':
+            return np.bincount(ids, weights=values, minlength=num_groups)
+        means = np.bincount(ids, weights=values, minlength=num_groups) / counts
+        if function == 'mean':
+            return means
+        if function == 'std':
+            deviations = values - means[ids]
+            squares = np.bincount(ids, weights=deviations * deviations, minlength=num_groups)
+            return np.where(counts > 1, np.sqrt(squares / (counts - 1)), np.nan)
+    # Order statistics: pandas' grouped kernels over the dense group IDs
+    reduced = pd.Series(values).groupby(ids, sort=True).agg(function)
+    result = np.full(num_groups, np.nan)
+    result[reduced.index.to_numpy()] = reduced.to_numpy()
+    return result
+
+
+def aggregate(df: pd.DataFrame, indexes: Dict[str, ColumnIndex], positions: Optional[np.ndarray],
+              group_by: Sequence[str], measures: List[Tuple[Optional[str], str, str]]) -> pd.DataFrame:
+    """
+    Group the selected rows by the group_by columns and compute each measure
+    measures: (column or None for a row count, aggregation, output label)
+    Returns: one row per group, group keys first, in key order; groups with
+    a missing key are left out
+    """
+    rows, ids, result = group_ids(indexes, df, group_by, positions)
+    num_groups = len(result)
+    for column, function, label in measures:
+        if column is None:
+            result[label] = np.bincount(ids, minlength=num_groups)
+            continue
+        series = df[column]
+        if function == 'count':
+            present = series.notna().to_numpy()[rows]
+            result[label] = np.bincount(ids[present], minlength=num_groups)
+            continue
+        values = series.to_numpy(dtype='float64', na_value=np.nan)[rows]
+        present = ~np.isnan(values)
+        result[label] = _reduce(ids[present], values[present], num_groups, function)
+    if group_by and num_groups:
+        try:
+            result = result.sort_values(list(group_by), kind='stable', ignore_index=True)
+        except TypeError:
+            # Mixed-type keys that cannot be ordered keep first-occurrence order
+            pass
+    return result
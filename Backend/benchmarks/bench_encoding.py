@@ -0,0 +1,87 @@
+"""
+Benchmark: response encodings (JSON vs columnar orjson vs Arrow IPC)
+
+Usage (from the Backend directory):
+    python benchmarks/bench_encoding.py --rows 1000000 --page 10000
+
+Encodes a full dataset profile (statistics, chart data, sample rows) and a
+page of raw column values in every format and reports encode time and
+payload size. The profile is computed once; only serialization is timed.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import build_profile, detect_column_types  # noqa: E402
+from encoding import FORMATS, dumps, encode_payload, to_arrow_table, arrow_stream  # noqa: E402
+from bench_statistics import make_frame  # noqa: E402
+
+
+def timed(func, *args, repeat: int = 1):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def encode_page(page: pd.Series, fmt: str) -> bytes:
+    """A /column/{column}/values page body as the endpoint encodes it"""
+    header = {'column': page.name, 'offset': 0, 'limit': len(page), 'total': len(page)}
+    if fmt == 'arrow':
+        return arrow_stream(to_arrow_table(page.to_frame()), {'header': dumps(header)})
+    if fmt == 'columnar':
+        return dumps({**header, 'values': page.to_numpy()})
+    return JSONResponse(content={**header, 'values': jsonable_encoder(page.tolist())}).body
+
+
+def report(label: str, results) -> None:
+    base_time, base_size = results['json']
+    print(label)
+    for fmt, (seconds, size) in results.items():
+        print(f"  {fmt:<9} {seconds * 1000:9.2f} ms {size / 1024:10.1f} KiB"
+              f"   ({base_time / seconds:5.1f}x faster, {base_size / size:5.1f}x smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--numeric', type=int, default=20)
+    parser.add_argument('--categorical', type=int, default=5)
+    parser.add_argument('--page', type=int, default=10_000, help='Values per raw-value page')
+    parser.add_argument('--sample-rows', type=int, default=10, help='Rows in sample_data')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.numeric, args.categorical, missing_rate=0.01)
+    column_types = detect_column_types(df)
+    profile = build_profile(df, 'csv', column_types)
+    profile['sample_data'] = df.head(args.sample_rows)
+    print(f"frame: {args.rows:,} rows x {len(df.columns)} columns, sample_data {args.sample_rows} rows")
+
+    results = {}
+    for fmt in FORMATS:
+        seconds, body = timed(encode_payload, profile, fmt, repeat=args.repeat)
+        results[fmt] = (seconds, len(body))
+    report("profile (upload / reset / filter)", results)
+
+    for col in ('num_1', 'cat_0'):
+        page = df[col].iloc[:args.page]
+        results = {}
+        for fmt in FORMATS:
+            seconds, body = timed(encode_page, page, fmt, repeat=args.repeat)
+            results[fmt] = (seconds, len(body))
+        report(f"raw-value page: {args.page:,} values of {col}", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: dominant-color quality modes (fast, balanced) vs exact K-Means
+
+Usage (from the Backend directory):
+    python benchmarks/bench_image_colors.py photo1.jpg photo2.png
+    python benchmarks/bench_image_colors.py --synthetic 5 --size 2000
+
+For each image, reports the latency of every mode and how far its palette
+is from the exact one: each color is matched to the nearest exact color and
+the RGB distance is averaged, weighted by the color's share of the image.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_analysis import QUALITY_MODES, analyze_image_colors  # noqa: E402
+
+
+def make_image(size: int, seed: int) -> bytes:
+    """Photo-like synthetic JPEG: smooth gradients, a few flat regions and noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] / size
+    base = rng.integers(0, 256, (4, 3))
+    img = (base[0] * (1 - x)[..., None] * (1 - y)[..., None] + base[1] * x[..., None] * (1 - y)[..., None]
+           + base[2] * (1 - x)[..., None] * y[..., None] + base[3] * x[..., None] * y[..., None])
+    for _ in range(6):
+        x0, y0 = rng.integers(0, size, 2)
+        w, h = rng.integers(size // 10, size // 3, 2)
+        img[y0:y0 + h, x0:x0 + w] = rng.integers(0, 256, 3)
+    img += rng.normal(0, 8, img.shape)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def timed(func, *args, repeat: int = 1, **kwargs):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def palette_distance(exact: List[Dict], approx: List[Dict]) -> float:
+    """Share-weighted mean RGB distance from each approximate color to its nearest exact color"""
+    reference = np.array([color['rgb'] for color in exact], dtype=float)
+    total = sum(color['percentage'] for color in approx) or 1.0
+    distance = 0.0
+    for color in approx:
+        nearest = np.linalg.norm(reference - np.array(color['rgb'], dtype=float), axis=1).min()
+        distance += nearest * color['percentage'] / total
+    return distance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='*', help='Image files (synthetic images are used if none are given)')
+    parser.add_argument('--synthetic', type=int, default=3, help='Number of synthetic images')
+    parser.add_argument('--size', type=int, default=2000, help='Side of the synthetic images in pixels')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.images:
+        images = [(path, open(path, 'rb').read()) for path in args.images]
+    else:
+        images = [(f"synthetic-{i}", make_image(args.size, i)) for i in range(args.synthetic)]
+
+    modes = list(QUALITY_MODES)
+    print(f"{'image':<20}" + ''.join(f"{mode + ' ms':>12}" for mode in modes)
+          + ''.join(f"{mode + ' dist':>14}" for mode in modes if mode != 'exact'))
+    for name, data in images:
+        timings, palettes = {}, {}
+        for mode in modes:
+            timings[mode], palettes[mode] = timed(analyze_image_colors, data, quality=mode, repeat=args.repeat)
+        row = f"{name[-20:]:<20}" + ''.join(f"{timings[mode] * 1000:12.1f}" for mode in modes)
+        row += ''.join(f"{palette_distance(palettes['exact'], palettes[mode]):14.2f}"
+                       for mode in modes if mode != 'exact')
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
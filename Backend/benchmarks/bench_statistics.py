@@ -0,0 +1,117 @@
+"""
+Benchmark: batched statistics engine vs the per-column pandas implementation
+
+Usage (from the Backend directory):
+    python benchmarks/bench_statistics.py --rows 10000000 --numeric 40 --categorical 10
+
+The default 10M x 50 frame needs roughly 8 GB of RAM; pass --rows to scale down.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import calculate_statistics  # noqa: E402
+
+
+def legacy_calculate_statistics(df: pd.DataFrame, column_types: Dict[str, str]) -> Dict[str, Any]:
+    """Per-column implementation used before the batched engine (numeric/categorical only)"""
+    stats = {}
+    for col, col_type in column_types.items():
+        if col_type == 'numeric':
+            col_data = df[col].dropna()
+            stats[col] = {
+                'type': 'numeric',
+                'mean': float(col_data.mean()),
+                'median': float(col_data.median()),
+                'std': float(col_data.std()),
+                'min': float(col_data.min()),
+                'max': float(col_data.max()),
+                'q25': float(col_data.quantile(0.25)),
+                'q75': float(col_data.quantile(0.75)),
+                'count': int(col_data.count()),
+                'missing': int(df[col].isna().sum())
+            }
+        else:
+            value_counts = df[col].value_counts().head(20)
+            stats[col] = {
+                'type': 'categorical',
+                'unique_values': int(df[col].nunique()),
+                'top_values': {str(k): int(v) for k, v in value_counts.items()},
+                'count': int(df[col].notna().sum()),
+                'missing': int(df[col].isna().sum())
+            }
+    return stats
+
+
+def make_frame(rows: int, numeric: int, categorical: int, missing_rate: float, seed: int = 0) -> pd.DataFrame:
+    """Synthetic frame with normal/lognormal numerics and Zipf-like categoricals"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(numeric):
+        values = rng.normal(50_000, 12_000, rows) if i % 2 else rng.lognormal(3, 1, rows)
+        if missing_rate and i % 3 == 0:
+            values[rng.random(rows) < missing_rate] = np.nan
+        data[f"num_{i}"] = values
+    labels = np.array([f"cat_{k}" for k in range(500)], dtype=object)
+    for i in range(categorical):
+        codes = np.minimum(rng.zipf(1.5, rows) - 1, len(labels) - 1)
+        data[f"cat_{i}"] = labels[codes]
+    return pd.DataFrame(data)
+
+
+def timed(func, *args, repeat: int = 1) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(expected: Dict[str, Any], actual: Dict[str, Any]) -> float:
+    """Largest relative difference across numeric fields (sanity check)"""
+    worst = 0.0
+    for col, exp in expected.items():
+        for key, value in exp.items():
+            if isinstance(value, float):
+                got = actual[col][key]
+                worst = max(worst, abs(got - value) / max(abs(value), 1e-12))
+            elif value != actual[col][key]:
+                raise AssertionError(f"{col}.{key}: {value!r} != {actual[col][key]!r}")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--numeric', type=int, default=40)
+    parser.add_argument('--categorical', type=int, default=10)
+    parser.add_argument('--missing-rate', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.numeric, args.categorical, args.missing_rate)
+    column_types = {col: ('numeric' if col.startswith('num_') else 'categorical') for col in df.columns}
+    print(f"frame: {args.rows:,} rows x {len(df.columns)} columns "
+          f"({df.memory_usage(deep=True).sum() / 1e9:.2f} GB)")
+
+    legacy = timed(legacy_calculate_statistics, df, column_types, repeat=args.repeat)
+    batched = timed(calculate_statistics, df, column_types, repeat=args.repeat)
+    drift = compare(legacy_calculate_statistics(df, column_types), calculate_statistics(df, column_types))
+
+    print(f"legacy per-column : {legacy:8.3f} s")
+    print(f"batched engine    : {batched:8.3f} s")
+    print(f"speedup           : {legacy / batched:8.2f}x")
+    print(f"max relative diff : {drift:.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+"""
+Benchmark suite: every backend stage and endpoint across dataset sizes
+
+Usage (from the Backend directory):
+    python benchmarks/bench_suite.py --sizes 10k,100k,1m --save results.json
+    python benchmarks/bench_suite.py --sizes 10k,100k,1m --baseline results.json
+    python benchmarks/bench_suite.py --sizes 50m --widths 0 --no-endpoints
+
+Tables are generated from sample_data.csv (see synthetic.py) for every
+combination of --sizes, --widths (extra numeric and categorical columns)
+and --cardinalities (distinct values per categorical column; 'seed' keeps
+the seed's). Text corpora (--text-lines) and images (--image-sizes) are
+generated alongside.
+
+Each stage (parse_*_file, detect_column_types, calculate_statistics,
+get_chart_data, compute_word_frequencies, analyze_image_colors, ...) is
+called directly (parsing also once per installed parser engine, as
+parse_<format>_file[<engine>]), and each endpoint is called through
+FastAPI's TestClient. For every one the suite records the best wall time
+over --repeat runs, the process' peak RSS while it ran and, for
+endpoints, the response bytes.
+
+--save writes the results as JSON. --baseline compares against saved
+results and exits with status 1 when a stage is slower, or uses more
+memory, by more than --tolerance (and by more than --min-seconds, so
+millisecond stages do not flap). Baselines only compare meaningfully on
+the machine that recorded them.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Measure cold parsing, and keep large scenarios from evicting each other
+os.environ.setdefault('UPLOAD_CACHE_DIR', '')
+os.environ.setdefault('DATASET_MAX_MEMORY_MB', str(1 << 20))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from main import (  # noqa: E402
+    parse_csv_file, parse_tsv_file, parse_json_file, parse_txt_file, parse_xlsx_file, parse_spooled_file,
+    detect_column_types, convert_temporal_columns, calculate_statistics, get_chart_data,
+    compute_word_frequencies
+)
+from compaction import compact_frame  # noqa: E402
+from parsers import available_engines, read_frame  # noqa: E402
+from text_index import TextIndex  # noqa: E402
+from image_analysis import QUALITY_MODES, analyze_image_colors  # noqa: E402
+from synthetic import parse_size, scale_frame, text_corpus, to_bytes  # noqa: E402
+from bench_image_colors import make_image  # noqa: E402
+
+Results = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+# ============= MEASUREMENT =============
+
+def _status_kb(field: str) -> Optional[int]:
+    """A memory field of /proc/self/status in kB (None off Linux)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """Restart the peak RSS high-water mark (Linux); False where it cannot be reset"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as refs:
+            refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS since the last reset (or since the process started)"""
+    peak = _status_kb('VmHWM')
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak //= 1024  # bytes on macOS
+    return peak / 1024
+
+
+def measure(func: Callable, *args: Any, repeat: int = 1, **kwargs: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Call func repeat times
+    Returns: (last result, {'seconds': best wall time, 'peak_rss_mb': peak RSS})
+    """
+    best, result, peak = float('inf'), None, 0.0
+    for _ in range(repeat):
+        result = None
+        reset_peak_rss()
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, peak_rss_mb())
+    return result, {'seconds': best, 'peak_rss_mb': round(peak, 1)}
+
+
+def call_endpoint(client: TestClient, method: str, url: str, repeat: int = 1, **kwargs: Any):
+    """measure() for an endpoint call, adding the response size; non-2xx responses abort the suite"""
+    response, record = measure(client.request, method, url, repeat=repeat, **kwargs)
+    if response.status_code >= 300:
+        raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+    record['bytes'] = len(response.content)
+    return response, record
+
+
+# ============= SCENARIOS =============
+
+def bench_table(rows: int, width: int, cardinality: Optional[int], args: argparse.Namespace,
+                client: Optional[TestClient]) -> Dict[str, Dict[str, Any]]:
+    """Parse, type, profile and serve one synthetic table"""
+    repeat, stages = args.repeat, {}
+    frame = scale_frame(rows, cardinality=cardinality, extra_numeric=width, extra_categorical=width // 4,
+                        missing_rate=0.01)
+    contents = to_bytes(frame, 'csv')
+
+    df, stages['parse_csv_file'] = measure(parse_csv_file, contents, repeat=repeat)
+    with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as spool:
+        spool.write(contents)
+    try:
+        _, stages['parse_spooled_file'] = measure(parse_spooled_file, spool.name, 'csv', repeat=repeat)
+    finally:
+        os.remove(spool.name)
+    parsers = [('tsv', parse_tsv_file, None), ('json', parse_json_file, args.json_max_rows),
+               ('xlsx', parse_xlsx_file, args.xlsx_max_rows)]
+    for file_type, parser, max_rows in parsers:
+        if max_rows is None or rows <= max_rows:
+            data = to_bytes(frame, file_type)
+            _, stages[f'parse_{file_type}_file'] = measure(parser, data, repeat=repeat)
+            del data
+    # Every installed parser engine, NDJSON included, against the others
+    formats = [('csv', 'csv', None), ('tsv', 'tsv', None), ('json', 'json', args.json_max_rows),
+               ('ndjson', 'json', args.json_max_rows), ('xlsx', 'xlsx', args.xlsx_max_rows)]
+    for fmt, file_type, max_rows in formats:
+        if max_rows is None or rows <= max_rows:
+            data = to_bytes(frame, fmt)
+            for engine in available_engines(file_type):
+                _, stages[f'parse_{fmt}_file[{engine}]'] = measure(read_frame, data, file_type, engine,
+                                                                    repeat=repeat)
+            del data
+    del frame
+
+    column_types, stages['detect_column_types'] = measure(detect_column_types, df, repeat=repeat)
+    df, stages['convert_temporal_columns'] = measure(convert_temporal_columns, df, column_types)
+    (df, _), stages['compact_frame'] = measure(compact_frame, df, column_types)
+    _, stages['calculate_statistics'] = measure(calculate_statistics, df, column_types, repeat=repeat)
+    _, stages['get_chart_data'] = measure(get_chart_data, df, column_types, repeat=repeat)
+    del df
+
+    if client is not None:
+        stages.update(bench_table_endpoints(client, contents, rows, repeat))
+    return stages
+
+
+def bench_table_endpoints(client: TestClient, contents: bytes, rows: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Every dataset endpoint on the uploaded table, caches cleared before each upload"""
+    stages = {}
+    files = {'file': ('bench.csv', contents, 'text/csv')}
+
+    main.profile_cache.clear()
+    response, stages['POST /upload?stream=ndjson'] = call_endpoint(client, 'POST', '/upload?stream=ndjson',
+                                                                   files=files)
+    events = [json.loads(line) for line in response.text.splitlines()]
+    if events[-1]['stage'] != 'done':
+        raise RuntimeError(f"Streamed upload failed: {events[-1]}")
+    client.delete(f"/datasets/{events[0]['dataset_id']}")
+    main.profile_cache.clear()
+    response, stages['POST /upload'] = call_endpoint(client, 'POST', '/upload', files=files)
+    dataset_id = response.json()['dataset_id']
+    params = {'dataset_id': dataset_id}
+
+    _, stages['DELETE /reset (cached)'] = call_endpoint(client, 'DELETE', '/reset', repeat=repeat, params=params)
+    _, stages['DELETE /reset?stats=approx'] = call_endpoint(
+        client, 'DELETE', '/reset', params={**params, 'stats': 'approx'})
+    _, stages['POST /filter'] = call_endpoint(client, 'POST', '/filter', repeat=repeat, json={
+        'dataset_id': dataset_id,
+        'predicates': [
+            {'column': 'salary', 'filter_type': 'range', 'min_value': 50_000, 'max_value': 65_000},
+            {'column': 'department', 'filter_type': 'category', 'categories': ['Engineering', 'Sales']},
+        ],
+    })
+    _, stages['POST /aggregate'] = call_endpoint(client, 'POST', '/aggregate', repeat=repeat, json={
+        'dataset_id': dataset_id,
+        'group_by': ['department', 'city'],
+        'measures': [{'function': 'count'}, {'column': 'salary', 'function': 'mean'},
+                     {'column': 'age', 'function': 'median'}],
+    })
+    # The first sorted page builds the column's sort order; deeper pages reuse it
+    rows_request = {'dataset_id': dataset_id, 'sort_by': 'city', 'limit': 100}
+    _, stages['POST /rows (sort)'] = call_endpoint(client, 'POST', '/rows', json=rows_request)
+    _, stages['POST /rows (deep page)'] = call_endpoint(client, 'POST', '/rows', json={
+        **rows_request, 'descending': True, 'offset': rows // 2,
+    })
+    _, stages['POST /rows (filtered page)'] = call_endpoint(client, 'POST', '/rows', json={
+        **rows_request, 'offset': 1000,
+        'predicates': [{'column': 'department', 'filter_type': 'category', 'categories': ['Sales']}],
+    })
+    _, stages['POST /correlation'] = call_endpoint(client, 'POST', '/correlation', json={
+        'dataset_id': dataset_id, 'pairs': [['age', 'salary']], 'bins': 100,
+    })
+    _, stages['POST /correlation (spearman)'] = call_endpoint(client, 'POST', '/correlation', json={
+        'dataset_id': dataset_id, 'method': 'spearman',
+    })
+    _, stages['GET /column/{column}'] = call_endpoint(client, 'GET', '/column/salary', repeat=repeat, params=params)
+    _, stages['GET /column/{column}/timeseries'] = call_endpoint(
+        client, 'GET', '/column/hire_date/timeseries', repeat=repeat, params={**params, 'granularity': 'month'})
+    _, stages['GET /column/{column}/values'] = call_endpoint(
+        client, 'GET', '/column/name/values', repeat=repeat, params={**params, 'limit': 1000})
+
+    # Appends grow the dataset, so they run once and last
+    batch = _head_rows(contents, max(1, rows // 100))
+    _, stages['POST /append (1%)'] = call_endpoint(client, 'POST', '/append', params=params,
+                                                   files={'file': ('batch.csv', batch, 'text/csv')})
+    client.delete(f'/datasets/{dataset_id}')
+    return stages
+
+
+def _head_rows(contents: bytes, rows: int) -> bytes:
+    """The header and first rows of a CSV upload"""
+    end = -1
+    for _ in range(rows + 1):
+        end = contents.index(b'\n', end + 1)
+    return contents[:end + 1]
+
+
+def bench_text(lines: int, args: argparse.Namespace, client: Optional[TestClient]) -> Dict[str, Dict[str, Any]]:
+    """Parse and count words of a synthetic text corpus"""
+    repeat, stages = args.repeat, {}
+    contents = text_corpus(lines)
+    df, stages['parse_txt_file'] = measure(parse_txt_file, contents, repeat=repeat)
+    _, stages['compute_word_frequencies'] = measure(compute_word_frequencies, df, 'text', repeat=repeat)
+    _, stages['TextIndex'] = measure(TextIndex, df['text'], repeat=repeat)
+    del df
+    if client is not None:
+        main.profile_cache.clear()
+        response, stages['POST /upload'] = call_endpoint(client, 'POST', '/upload',
+                                                         files={'file': ('bench.txt', contents, 'text/plain')})
+        dataset_id = response.json()['dataset_id']
+        _, stages['POST /filter (search)'] = call_endpoint(client, 'POST', '/filter', repeat=repeat, json={
+            'dataset_id': dataset_id, 'column': 'text', 'filter_type': 'search', 'search_query': 'the',
+        })
+        client.delete(f'/datasets/{dataset_id}')
+    return stages
+
+
+def bench_image(size: int, args: argparse.Namespace, client: Optional[TestClient]) -> Dict[str, Dict[str, Any]]:
+    """Dominant colors of a synthetic photo in every quality mode"""
+    stages = {}
+    image = make_image(size, seed=size)
+    for quality in QUALITY_MODES:
+        _, stages[f'analyze_image_colors[{quality}]'] = measure(analyze_image_colors, image, quality=quality,
+                                                                repeat=args.repeat)
+    if client is not None:
+        _, stages['POST /api/analyze-image'] = call_endpoint(
+            client, 'POST', '/api/analyze-image', repeat=args.repeat,
+            files={'file': ('bench.jpg', image, 'image/jpeg')})
+    return stages
+
+
+def scenarios(args: argparse.Namespace) -> List[Tuple[str, Callable[..., Dict[str, Dict[str, Any]]], tuple]]:
+    """(name, bench function, arguments) for every requested combination"""
+    result = []
+    for size in args.sizes.split(','):
+        for width in args.widths.split(','):
+            for cardinality in args.cardinalities.split(','):
+                rows = parse_size(size)
+                distinct = None if cardinality == 'seed' else parse_size(cardinality)
+                name = f"table rows={rows:,} width=+{int(width)} cardinality={cardinality}"
+                result.append((name, bench_table, (rows, int(width), distinct)))
+    for lines in filter(None, args.text_lines.split(',')):
+        result.append((f"text lines={parse_size(lines):,}", bench_text, (parse_size(lines),)))
+    for size in filter(None, args.image_sizes.split(',')):
+        result.append((f"image {int(size)}x{int(size)}", bench_image, (int(size),)))
+    return result
+
+
+# ============= BASELINES =============
+
+def compare(results: Results, baseline: Results, tolerance: float, min_seconds: float) -> List[str]:
+    """Regressions against a baseline, one line each (stages missing from either side are skipped)"""
+    regressions = []
+    for scenario, stages in results.items():
+        for stage, record in stages.items():
+            before = baseline.get(scenario, {}).get(stage)
+            if before is None:
+                continue
+            slower = record['seconds'] - before['seconds']
+            if slower > min_seconds and record['seconds'] > before['seconds'] * (1 + tolerance):
+                regressions.append(f"{scenario} / {stage}: {before['seconds'] * 1000:.1f} ms -> "
+                                   f"{record['seconds'] * 1000:.1f} ms")
+            if record['peak_rss_mb'] > before['peak_rss_mb'] * (1 + tolerance):
+                regressions.append(f"{scenario} / {stage}: peak RSS {before['peak_rss_mb']:.0f} MB -> "
+                                   f"{record['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def report(scenario: str, stages: Dict[str, Dict[str, Any]], baseline: Results) -> None:
+    print(scenario)
+    for stage, record in stages.items():
+        line = f"  {stage:<34} {record['seconds'] * 1000:10.1f} ms {record['peak_rss_mb']:9.0f} MB"
+        if 'bytes' in record:
+            line += f" {record['bytes'] / 1024:11.1f} KiB"
+        before = baseline.get(scenario, {}).get(stage)
+        if before is not None and before['seconds'] > 0:
+            line += f"   ({(record['seconds'] / before['seconds'] - 1) * 100:+.0f}% vs baseline)"
+        print(line)
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10k,100k,1m', help='Table rows, e.g. 10k,1m,50m')
+    parser.add_argument('--widths', default='0', help='Extra numeric columns per table (plus a quarter as many categorical)')
+    parser.add_argument('--cardinalities', default='seed', help="Distinct values per categorical column, or 'seed'")
+    parser.add_argument('--text-lines', default='10k,100k', help='Lines per text corpus (empty to skip)')
+    parser.add_argument('--image-sizes', default='1000,3000', help='Image edge lengths in pixels (empty to skip)')
+    parser.add_argument('--json-max-rows', type=parse_size, default='5m', help='Largest table parsed as JSON')
+    parser.add_argument('--xlsx-max-rows', type=parse_size, default='100k', help='Largest table parsed as XLSX')
+    parser.add_argument('--no-endpoints', action='store_true', help='Only time the stages, not the endpoints')
+    parser.add_argument('--only', default='', help='Run scenarios whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with results saved by --save')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown / memory growth (0.25 = 25%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.01, help='Ignore slowdowns smaller than this')
+    args = parser.parse_args()
+
+    baseline: Results = {}
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)['results']
+
+    if not reset_peak_rss():
+        print("note: peak RSS cannot be reset on this platform; figures are process-wide high-water marks")
+    client = None if args.no_endpoints else TestClient(main.app)
+    results: Results = {}
+    for name, bench, bench_args in scenarios(args):
+        if args.only not in name:
+            continue
+        results[name] = bench(*bench_args, args, client)
+        report(name, results[name], baseline)
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump({'environment': environment(), 'args': vars(args), 'results': results}, handle, indent=2)
+        print(f"results saved to {args.save}")
+
+    if args.baseline:
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,141 @@
+"""
+Synthetic datasets for the benchmark suite, generated locally and seeded
+
+Tables are scaled up from sample_data.csv: numeric columns are drawn from a
+normal fit of the seed column (integers stay integers, non-negative columns
+stay non-negative), categorical columns from the seed's values, widened to
+a requested cardinality with numbered variants ("Chicago 12"); names stay
+unique per row. Extra numeric and categorical columns widen the table and a
+date column covers temporal paths. Text corpora are Zipf-distributed
+pseudo-words mixed with stop words and URLs.
+"""
+
+import io
+import os
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SEED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        'sample_data.csv')
+
+# Seed columns that identify a row and stay unique at any size
+IDENTIFIER_COLUMNS = ('name',)
+
+# Distinct labels of each extra categorical column unless a cardinality is given
+EXTRA_CATEGORIES = 100
+
+_SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'sa', 'tu', 'vel', 'or', 'an', 'is', 'ep', 'du', 'go', 'har', 'ni', 'qu']
+_STOP_WORDS = ['the', 'and', 'of', 'to', 'a', 'in', 'is', 'it', 'that', 'for']
+
+
+def parse_size(text: str) -> int:
+    """Row counts like 10k, 2.5M or 50m"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([kKmM]?)\s*', text)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    scale = {'': 1, 'k': 10**3, 'm': 10**6}[match.group(2).lower()]
+    return int(float(match.group(1)) * scale)
+
+
+def load_seed(path: str = SEED_CSV) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def _labels(base: np.ndarray, cardinality: int) -> np.ndarray:
+    """cardinality labels: the seed values first, then numbered variants of them"""
+    if cardinality <= len(base):
+        return base[:cardinality].astype(object)
+    rounds = np.arange(cardinality) // len(base)
+    names = base[np.arange(cardinality) % len(base)].astype(str)
+    variants = pd.Series(names).str.cat(rounds.astype(str), sep=' ').to_numpy(dtype=object)
+    variants[:len(base)] = base
+    return variants
+
+
+def _numeric(seed: pd.Series, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """Normal fit of a seed column, clipped to its range widened by one standard deviation"""
+    mean, std = float(seed.mean()), float(seed.std()) or 1.0
+    lo, hi = float(seed.min()) - std, float(seed.max()) + std
+    if seed.min() >= 0:
+        lo = max(lo, 0.0)
+    values = np.clip(rng.normal(mean, std, rows), lo, hi)
+    if pd.api.types.is_integer_dtype(seed):
+        return np.rint(values).astype(np.int64)
+    return np.round(values, 2)
+
+
+def scale_frame(rows: int, cardinality: Optional[int] = None, extra_numeric: int = 0,
+                extra_categorical: int = 0, dates: bool = True, missing_rate: float = 0.0,
+                seed: int = 0, seed_frame: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    A rows-long table shaped like sample_data.csv
+    cardinality: distinct values of every categorical column except names
+    (default: the seed's own)
+    missing_rate: share of missing values in the extra numeric columns
+    """
+    rng = np.random.default_rng(seed)
+    seed_frame = load_seed() if seed_frame is None else seed_frame
+    data = {}
+    for col in seed_frame.columns:
+        series = seed_frame[col].dropna()
+        if pd.api.types.is_numeric_dtype(series):
+            data[col] = _numeric(series, rows, rng)
+            continue
+        base = series.unique()
+        if col in IDENTIFIER_COLUMNS:
+            data[col] = _labels(base, rows)
+            continue
+        labels = _labels(base, cardinality or len(base))
+        data[col] = labels[rng.integers(0, len(labels), rows)]
+    for i in range(extra_numeric):
+        values = rng.normal(100, 25, rows) if i % 2 else rng.lognormal(3, 1, rows)
+        if missing_rate:
+            values[rng.random(rows) < missing_rate] = np.nan
+        data[f'metric_{i}'] = values
+    for i in range(extra_categorical):
+        labels = _labels(np.array([f'tag{i}_{k}' for k in range(EXTRA_CATEGORIES)], dtype=object),
+                         cardinality or EXTRA_CATEGORIES)
+        data[f'tag_{i}'] = labels[rng.integers(0, len(labels), rows)]
+    if dates:
+        days = rng.integers(0, 25 * 365, rows)
+        data['hire_date'] = (np.datetime64('2000-01-01') + days).astype(str)
+    return pd.DataFrame(data)
+
+
+def text_corpus(lines: int, vocabulary: int = 20_000, words_per_line: int = 12,
+                url_rate: float = 0.01, seed: int = 0) -> bytes:
+    """Plain text, one line per document, Zipf-distributed words with frequent stop words"""
+    rng = np.random.default_rng(seed)
+    words = []
+    for i in range(vocabulary):
+        parts, n = [], i + len(_SYLLABLES)
+        while n:
+            n, digit = divmod(n, len(_SYLLABLES))
+            parts.append(_SYLLABLES[digit])
+        words.append(''.join(parts))
+    vocab = np.array(_STOP_WORDS + words, dtype=object)
+    codes = (rng.zipf(1.3, (lines, words_per_line)) - 1) % len(vocab)
+    tokens = vocab[codes]
+    urls = rng.random((lines, words_per_line)) < url_rate
+    tokens[urls] = [f'https://example.com/p{k}' for k in rng.integers(0, 1000, int(urls.sum()))]
+    return '\n'.join(' '.join(row) for row in tokens.tolist()).encode()
+
+
+def to_bytes(df: pd.DataFrame, file_type: str) -> bytes:
+    """The table as an upload of the given type (csv, tsv, json records, ndjson or xlsx)"""
+    if file_type == 'csv':
+        return df.to_csv(index=False).encode()
+    if file_type == 'tsv':
+        return df.to_csv(index=False, sep='\t').encode()
+    if file_type == 'json':
+        return df.to_json(orient='records').encode()
+    if file_type == 'ndjson':
+        return df.to_json(orient='records', lines=True).encode()
+    if file_type == 'xlsx':
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Unsupported file type: {file_type}")
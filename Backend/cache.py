@@ -0,0 +1,87 @@
+"""
+Profile Cache Module
+Size-bounded LRU cache of already-serialized analysis responses, keyed by
+dataset fingerprint and request spec
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Total size of serialized payloads kept by one worker
+PROFILE_CACHE_MAX_BYTES = int(os.environ.get('PROFILE_CACHE_MAX_MB', 256)) * 1024 * 1024
+
+
+def make_cache_key(fingerprint: str, kind: str, spec: Optional[Dict[str, Any]] = None) -> str:
+    """Build a cache key from a dataset fingerprint, a request kind and its parameters"""
+    spec_json = json.dumps(spec or {}, sort_keys=True, default=str)
+    spec_hash = hashlib.sha1(spec_json.encode('utf-8')).hexdigest()
+    return f"{fingerprint}:{kind}:{spec_hash}"
+
+
+class ProfileCache:
+    """Thread-safe LRU cache of serialized payloads bounded by total byte size"""
+
+    def __init__(self, max_bytes: int = PROFILE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached payload for a key, counting the hit or miss"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, payload: bytes) -> None:
+        """Store a payload, evicting least recently used ones to stay within budget"""
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = payload
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, fingerprint: str) -> None:
+        """Drop every payload computed from a given dataset fingerprint"""
+        prefix = f"{fingerprint}:"
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._size -= len(self._entries.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
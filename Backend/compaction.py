@@ -0,0 +1,130 @@
+"""
+Compaction Module
+Ingest-time conversion of parsed DataFrames to compact dtypes: integers are
+downcast, floats narrowed when lossless, repetitive strings become
+categoricals and other strings Arrow-backed, with a per-column memory report
+"""
+
+import pandas as pd
+import numpy as np
+import os
+from typing import Any, Dict, Tuple
+
+try:
+    import pyarrow  # noqa: F401  (backs the 'string[pyarrow]' dtype)
+    ARROW_STRINGS_AVAILABLE = True
+except ImportError:
+    ARROW_STRINGS_AVAILABLE = False
+
+# Set to 0 to keep pandas' default dtypes
+COMPACT_DATASETS = os.environ.get('COMPACT_DATASETS', '1') != '0'
+
+# String columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = float(os.environ.get('CATEGORY_MAX_RATIO', 0.5))
+
+ARROW_STRING_DTYPE = 'string[pyarrow]'
+
+
+def compact_numeric(series: pd.Series) -> pd.Series:
+    """Smallest integer type that holds every value; float32 only if no value changes"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        # Signed even for non-negative columns, so arithmetic never wraps around
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == np.float64:
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32)
+        with np.errstate(invalid='ignore'):
+            if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                return pd.Series(narrowed, index=series.index, name=series.name)
+    return series
+
+
+def compact_strings(series: pd.Series) -> pd.Series:
+    """
+    Categorical for repetitive strings, Arrow-backed strings otherwise
+    Columns mixing strings with other values are left as they are
+    """
+    if series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return series
+    num_valid = int(series.notna().sum())
+    if series.nunique(dropna=True) <= CATEGORY_MAX_RATIO * num_valid:
+        return series.astype('category')
+    if ARROW_STRINGS_AVAILABLE:
+        return series.astype(ARROW_STRING_DTYPE)
+    return series
+
+
+def compact_frame(df: pd.DataFrame, column_types: Dict[str, str]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Convert each column to its compact dtype (columns are replaced, not copied twice)
+    Returns: (compacted DataFrame, memory report with bytes before and after per column)
+    """
+    before = df.memory_usage(deep=True, index=False)
+    dtypes = df.dtypes.astype(str)
+    if COMPACT_DATASETS:
+        for col, col_type in column_types.items():
+            if col_type == 'numeric':
+                df[col] = compact_numeric(df[col])
+            elif col_type == 'categorical':
+                df[col] = compact_strings(df[col])
+    after = df.memory_usage(deep=True, index=False)
+    report = {
+        'before_bytes': int(before.sum()),
+        'after_bytes': int(after.sum()),
+        'columns': {
+            str(col): {
+                'dtype_before': dtypes[col],
+                'dtype': str(df[col].dtype),
+                'before_bytes': int(before[col]),
+                'after_bytes': int(after[col]),
+            }
+            for col in df.columns
+        },
+    }
+    return df, report
+
+
+def match_dtypes(batch: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a batch of new rows to a compacted dataset's dtypes where no value
+    changes, so appending keeps the columns compact (categoricals are unified
+    when the rows are concatenated)
+    """
+    for col in df.columns:
+        target = df[col].dtype
+        series = batch[col]
+        if series.dtype == target or isinstance(target, pd.CategoricalDtype):
+            continue
+        if isinstance(target, pd.StringDtype):
+            if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+                batch[col] = series.astype(target)
+        elif target.kind == 'i' and pd.api.types.is_integer_dtype(series) and len(series):
+            info = np.iinfo(target)
+            if info.min <= series.min() and series.max() <= info.max:
+                batch[col] = series.astype(target)
+        elif target == np.float32 and series.dtype == np.float64:
+            narrowed = compact_numeric(series)
+            if narrowed.dtype == np.float32:
+                batch[col] = narrowed
+    return batch
+
+
+def concat_rows(df: pd.DataFrame, *batches: pd.DataFrame) -> pd.DataFrame:
+    """Append batches of rows column by column; categorical columns gain the batches' new categories"""
+    columns = {}
+    for col in df.columns:
+        parts = [df[col]] + [batch[col] for batch in batches]
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            try:
+                combined = pd.api.types.union_categoricals([part.astype('category') for part in parts],
+                                                           ignore_order=True)
+                columns[col] = pd.Series(combined, name=col)
+                continue
+            except TypeError:
+                # Categories of different types (e.g. numbers appended to strings)
+                columns[col] = pd.concat([part.astype(object) for part in parts], ignore_index=True)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
@@ -0,0 +1,198 @@
+"""
+Correlation Engine Module
+Pearson/Spearman correlation matrices and 2-D density grids of numeric
+columns: the matrix comes from a few float32 matrix products per block of
+rows (BLAS), Spearman ranks from the columns' cached sort orders, and
+density grids from one bincount per column pair
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from filter_engine import ColumnIndex, get_column_index
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+
+# Rows per block of the float32 matrix multiplied at once (bounds memory)
+BLOCK_ROWS = 1 << 16
+
+# Values sampled per column to center and scale it before the float32 products
+CONDITIONING_SAMPLE = 1 << 16
+
+
+def selected_values(series: pd.Series, positions: Optional[np.ndarray]) -> np.ndarray:
+    """The selected rows of a numeric column as float64 (missing values as NaN)"""
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    return values if positions is None else values[positions]
+
+
+def column_ranks(index: ColumnIndex, positions: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Average ranks (1-based, ties share their mean rank) of the selected
+    rows' values as float32, NaN for missing values; read off the column's
+    cached sort order, so no selection is ever sorted again
+    """
+    order, values = index.order, index.sorted_values
+    if positions is not None:
+        # The cached order restricted to the selection is still sorted
+        selected = np.zeros(len(order), dtype=bool)
+        selected[positions] = True
+        keep = selected[order]
+        order, values = order[keep], values[keep]
+    num_valid = int(np.searchsorted(values, np.nan))  # NaNs sort last
+    order, values = order[:num_valid], values[:num_valid]
+    ties = values[1:] == values[:-1]
+    if ties.any():
+        # Tie runs of equal values get the mean of the ranks they span
+        starts = np.flatnonzero(np.r_[True, ~ties])
+        ends = np.r_[starts[1:], num_valid]
+        sorted_ranks = np.repeat(((starts + ends + 1) / 2.0).astype(np.float32), ends - starts)
+    else:
+        sorted_ranks = np.arange(1, num_valid + 1, dtype=np.float32)
+    num_rows = len(index.series) if positions is None else len(positions)
+    ranks = np.full(num_rows, np.nan, dtype=np.float32)
+    ranks[order if positions is None else np.searchsorted(positions, order)] = sorted_ranks
+    return ranks
+
+
+def _conditioning(col: np.ndarray) -> Tuple[float, float]:
+    """
+    Rough center and scale of a column from a strided sample: correlations
+    do not depend on them, they only keep float32 sums well conditioned
+    """
+    sample = col[::max(1, len(col) // CONDITIONING_SAMPLE)]
+    sample = sample[np.isfinite(sample)]
+    if not len(sample):
+        return 0.0, 1.0
+    scale = float(sample.std())
+    return float(sample.mean()), scale if scale > 0 else 1.0
+
+
+def correlation_matrix(columns: Sequence[np.ndarray],
+                       block_rows: int = BLOCK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pearson correlation of every pair of columns over the rows where both
+    are present (pairwise-complete, as pandas computes it)
+
+    Columns are centered and scaled, then multiplied as float32 blocks,
+    one matrix product per block: stacked as [X*X; X; M] with the
+    missing-value mask M (all ones when nothing is missing), the product
+    with [X; M] holds XX', XM', (X*X)M' and MM'. Blocks without missing
+    values only multiply [X; 1]. Totals are accumulated in float64
+    Returns: (correlation matrix, rows counted per pair)
+    """
+    k = len(columns)
+    num_rows = len(columns[0]) if k else 0
+    centers, scales = np.array([_conditioning(col) for col in columns]).reshape(k, 2).T
+    inverse_scales = (1.0 / scales).astype(np.float32)[:, None]
+
+    products = np.zeros((k, k))
+    counts = np.zeros((k, k))
+    sums = np.zeros((k, k))
+    squares = np.zeros((k, k))
+    complete_rows, complete_sums, complete_squares = 0, np.zeros(k), np.zeros(k)
+    # One row per column, so each column's slice is copied contiguously
+    width = min(block_rows, num_rows)
+    stack = np.ones((3 * k, width), dtype=np.float32)
+    missing = np.empty((k, width), dtype=bool)
+    masked = False
+    for lo in range(0, num_rows, block_rows):
+        hi = min(lo + block_rows, num_rows)
+        block = stack[:, :hi - lo]
+        data = block[k:2 * k]
+        for j, col in enumerate(columns):
+            np.subtract(col[lo:hi], centers[j], out=data[j], casting='unsafe')
+        data *= inverse_scales
+        if np.isnan(data.sum()):
+            nan = missing[:, :hi - lo]
+            np.isnan(data, out=nan)
+            np.copyto(data, 0, where=nan)
+            np.logical_not(nan, out=nan)
+            np.copyto(block[2 * k:], nan)
+            np.multiply(data, data, out=block[:k])
+            gram = block @ block[k:].T
+            products += gram[k:2 * k, :k]
+            sums += gram[k:2 * k, k:]
+            squares += gram[:k, k:]
+            counts += gram[2 * k:, k:]
+            masked = True
+        else:
+            if masked:
+                stack[2 * k:] = 1.0
+                masked = False
+            # The first mask row is all ones: the product also yields column sums
+            gram = block[k:2 * k + 1] @ block[k:2 * k + 1].T
+            products += gram[:k, :k]
+            complete_rows += hi - lo
+            complete_sums += gram[:k, k]
+            complete_squares += np.diag(gram)[:k]
+    # Rows of complete blocks count for every pair
+    counts += complete_rows
+    sums += complete_sums[:, None]
+    squares += complete_squares[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = products - sums * sums.T / counts
+        variance_x = squares - sums * sums / counts
+        matrix = covariance / np.sqrt(variance_x * variance_x.T)
+    matrix[(counts < 2) | ~np.isfinite(matrix)] = np.nan
+    return np.clip(matrix, -1.0, 1.0), counts.astype(np.int64)
+
+
+def density_grid(x: np.ndarray, y: np.ndarray, bins: int, block_rows: int = BLOCK_ROWS) -> Dict[str, Any]:
+    """
+    Counts of (x, y) points on a bins x bins grid spanning their ranges,
+    binned block by block into one bincount however many points there are
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if not valid.any():
+        return {'x_edges': [], 'y_edges': [], 'counts': [], 'total': 0}
+    edges, offsets, factors = [], [], []
+    for values in (x, y):
+        lo, hi = float(values[valid].min()), float(values[valid].max())
+        if hi == lo:
+            lo, hi = lo - 0.5, hi + 0.5
+        edges.append(np.linspace(lo, hi, bins + 1))
+        offsets.append(lo)
+        factors.append(bins / (hi - lo))
+    # Cell bins * bins collects the points with a missing coordinate
+    counts = np.zeros(bins * bins + 1, dtype=np.int64)
+    for lo in range(0, len(x), block_rows):
+        hi = lo + block_rows
+        cells = np.zeros(len(x[lo:hi]), dtype=np.int64)
+        for axis, values in enumerate((x[lo:hi], y[lo:hi])):
+            with np.errstate(invalid='ignore'):
+                cell = ((values - offsets[axis]) * factors[axis]).astype(np.int64)
+            np.minimum(cell, bins - 1, out=cell)  # the maximum falls in the last bin
+            cells = cells * bins + cell if axis else cell
+        cells[~valid[lo:hi]] = bins * bins
+        counts += np.bincount(cells, minlength=bins * bins + 1)
+    return {
+        'x_edges': edges[0].tolist(),
+        'y_edges': edges[1].tolist(),
+        'counts': counts[:-1].reshape(bins, bins).tolist(),  # counts[i][j]: x in bin i, y in bin j
+        'total': int(counts[:-1].sum()),
+    }
+
+
+def correlate(df: pd.DataFrame, indexes: Dict[str, ColumnIndex], positions: Optional[np.ndarray],
+              columns: Sequence[str], method: str = 'pearson',
+              pairs: Sequence[Tuple[str, str]] = (), bins: int = 50) -> Dict[str, Any]:
+    """Correlation matrix of the columns and density grids of the pairs, over the selected rows"""
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+    if method == 'spearman':
+        data = [column_ranks(get_column_index(indexes, df, col), positions) for col in columns]
+    else:
+        data = [selected_values(df[col], positions) for col in columns]
+    matrix, counts = correlation_matrix(data)
+    densities = []
+    for x_col, y_col in pairs:
+        grid = density_grid(selected_values(df[x_col], positions), selected_values(df[y_col], positions), bins)
+        densities.append({'x': x_col, 'y': y_col, 'bins': bins, **grid})
+    return {
+        'matrix': [[None if np.isnan(value) else round(float(value), 6) for value in row] for row in matrix],
+        'counts': counts.tolist(),
+        'density': densities,
+    }
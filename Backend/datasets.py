@@ -0,0 +1,516 @@
+"""
+Dataset Registry Module
+Holds several uploaded datasets at once, keyed by dataset ID, with LRU/TTL
+eviction under a memory budget, an optional shared on-disk store and a
+content-addressed cache of parsed uploads
+"""
+
+import pandas as pd
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+from compaction import concat_rows
+from sketches import ColumnSketch
+
+# Total in-memory budget for all datasets held by one worker
+MAX_MEMORY_BYTES = int(os.environ.get('DATASET_MAX_MEMORY_MB', 2048)) * 1024 * 1024
+
+# Datasets not accessed for this long are evicted
+DATASET_TTL_SECONDS = int(os.environ.get('DATASET_TTL_SECONDS', 3600))
+
+# Directory shared by all workers; empty disables the on-disk store
+DATASET_STORE_DIR = os.environ.get('DATASET_STORE_DIR', '')
+
+# How often a worker looks for stale files in the store (and refreshes its own)
+DATASET_STORE_SWEEP_SECONDS = int(os.environ.get('DATASET_STORE_SWEEP_SECONDS', 60))
+
+# Parsed uploads keyed by the hash of their raw bytes; empty (the default) disables the cache
+UPLOAD_CACHE_DIR = os.environ.get('UPLOAD_CACHE_DIR', '')
+UPLOAD_CACHE_MAX_BYTES = int(os.environ.get('UPLOAD_CACHE_MAX_MB', 4096)) * 1024 * 1024
+
+# Bump whenever parsing or type inference changes, so stale conversions are ignored
+UPLOAD_CACHE_VERSION = 2
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> None:
+    """
+    Write a DataFrame as an uncompressed Arrow IPC (Feather v2) file
+    Written to a temporary name first so readers never see a partial file
+    """
+    partial = path.with_name(path.name + '.partial')
+    try:
+        feather.write_feather(df.reset_index(drop=True), partial, compression='uncompressed')
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+def _string_dtype(arrow_type: 'pa.DataType') -> Optional[pd.StringDtype]:
+    """Keep Arrow string columns Arrow-backed instead of converting them to Python objects"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def read_frame(path: Path) -> pd.DataFrame:
+    """
+    Memory-map an Arrow IPC file written by write_frame
+    Nothing is parsed; numeric columns are converted without consolidating
+    them into 2-D blocks and string columns stay in Arrow memory
+    """
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True, types_mapper=_string_dtype)
+
+
+def fingerprint_dataframe(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame (columns, dtypes and values)
+    Identical uploads share a fingerprint, so cached results are reused
+    across datasets and invalidated whenever the content changes
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode('utf-8'))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (e.g. nested JSON lists): fall back to a unique key
+        digest.update(uuid.uuid4().bytes)
+    return digest.hexdigest()
+
+
+def chain_fingerprint(fingerprint: str, batch: pd.DataFrame) -> str:
+    """
+    Fingerprint of a dataset after appending a batch, from its previous
+    fingerprint and the batch alone (earlier rows are not hashed again)
+    """
+    digest = hashlib.sha1(fingerprint.encode('ascii'))
+    digest.update(fingerprint_dataframe(batch).encode('ascii'))
+    return digest.hexdigest()
+
+
+@dataclass
+class DatasetEntry:
+    """
+    A dataset held by the registry together with its upload metadata
+    Appended batches are kept as they arrive and concatenated onto the
+    rows the first time df is read, so an append costs its batch only
+    """
+    dataset_id: str
+    frame: pd.DataFrame  # rows up to the last concatenation; read df instead
+    filename: str
+    file_type: str
+    nbytes: int
+    fingerprint: str
+    column_types: Dict[str, str] = field(default_factory=dict)
+    memory: Dict[str, Any] = field(default_factory=dict)  # ingest compaction report
+    indexes: Dict[str, Any] = field(default_factory=dict)  # per-column filter indexes
+    sketches: Dict[str, Any] = field(default_factory=dict)  # per-column approximate-statistics sketches
+    aggregates: Optional[Any] = None  # incrementally maintained profile, built on first append
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)  # serializes appends
+    batches: List[pd.DataFrame] = field(default_factory=list, repr=False, compare=False)  # appended, not yet in frame
+    stored_batches: int = 0  # batch files written to the shared store after the base frame
+    _batches_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """All rows, appended batches included (concatenated here once)"""
+        with self._batches_lock:
+            if self.batches:
+                self.frame = concat_rows(self.frame, *self.batches)
+                self.batches = []
+            return self.frame
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.frame) + sum(len(batch) for batch in self.batches)
+
+    def head(self, n: int) -> pd.DataFrame:
+        """The first n rows, without concatenating pending batches unless they are needed"""
+        return self.frame.head(n) if len(self.frame) >= n else self.df.head(n)
+
+    def add_batch(self, batch: pd.DataFrame) -> None:
+        with self._batches_lock:
+            self.batches.append(batch)
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary used by the /datasets listing"""
+        return {
+            'dataset_id': self.dataset_id,
+            'filename': self.filename,
+            'file_type': self.file_type,
+            'num_rows': self.num_rows,
+            'num_columns': len(self.frame.columns),
+            'memory_bytes': self.nbytes,
+        }
+
+
+class DatasetRegistry:
+    """
+    Thread-safe LRU/TTL registry of DataFrames
+
+    When a store directory is configured, every dataset is also written as
+    an Arrow IPC file so that any worker can serve a dataset uploaded to
+    another one, and an evicted dataset is transparently reloaded (memory
+    mapped, without parsing) on its next access.
+    """
+
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES, ttl_seconds: int = DATASET_TTL_SECONDS,
+                 store_dir: str = DATASET_STORE_DIR,
+                 sweep_seconds: int = DATASET_STORE_SWEEP_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        self._last_sweep = 0.0
+        self.store_dir = Path(store_dir) if store_dir and ARROW_AVAILABLE else None
+        if self.store_dir is not None:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: 'OrderedDict[str, DatasetEntry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self.latest_id: Optional[str] = None
+
+    # ---- public API ----
+
+    def add(self, df: pd.DataFrame, filename: str, file_type: str,
+            column_types: Optional[Dict[str, str]] = None,
+            fingerprint: Optional[str] = None) -> DatasetEntry:
+        """
+        Register a new dataset (with its inferred schema) and return its entry
+        fingerprint: content hash already known (e.g. from the upload cache)
+        """
+        entry = DatasetEntry(
+            dataset_id=uuid.uuid4().hex,
+            frame=df,
+            filename=filename,
+            file_type=file_type,
+            nbytes=int(df.memory_usage(deep=True).sum()),
+            fingerprint=fingerprint or fingerprint_dataframe(df),
+            column_types=dict(column_types or {}),
+        )
+        self._persist(entry)
+        with self._lock:
+            self._entries[entry.dataset_id] = entry
+            self.latest_id = entry.dataset_id
+            self._evict()
+            self._sweep_store(force=True)
+        return entry
+
+    def get(self, dataset_id: Optional[str] = None) -> Optional[DatasetEntry]:
+        """
+        Look up a dataset by ID (the most recent upload if no ID is given)
+        Returns None if the dataset is unknown or has expired
+        """
+        with self._lock:
+            dataset_id = dataset_id or self.latest_id
+            if dataset_id is None:
+                return None
+            entry = self._entries.get(dataset_id)
+            if entry is not None and self._expired(entry):
+                self._drop(dataset_id)
+                entry = None
+            if entry is None:
+                entry = self._load(dataset_id)
+                if entry is None:
+                    return None
+                self._entries[dataset_id] = entry
+            entry.last_access = time.time()
+            self._entries.move_to_end(dataset_id)
+            self._evict(keep=dataset_id)
+            self._sweep_store()
+            return entry
+
+    def remove(self, dataset_id: str) -> bool:
+        """Forget a dataset in memory and on disk; returns whether it existed"""
+        with self._lock:
+            existed = dataset_id in self._entries
+            self._drop(dataset_id)
+            if self.latest_id == dataset_id:
+                self.latest_id = next(reversed(self._entries), None)
+        for path in self._store_paths(dataset_id):
+            if path.exists():
+                existed = True
+                path.unlink()
+        return existed
+
+    def append(self, entry: DatasetEntry, batch: pd.DataFrame) -> DatasetEntry:
+        """
+        Add rows to a registered dataset in place
+        The batch must have the dataset's columns and dtypes. It is kept
+        as a pending batch (concatenated on the next read of entry.df) and
+        stored as a file of its own, so the append costs the batch alone.
+        Column indexes built for the old rows are dropped and rebuilt on
+        demand, over all rows; sketches and aggregates are the caller's to
+        update.
+        """
+        entry.add_batch(batch)
+        with self._lock:
+            entry.nbytes += int(batch.memory_usage(deep=True, index=False).sum())
+            entry.fingerprint = chain_fingerprint(entry.fingerprint, batch)
+            entry.indexes = {}
+            self._evict(keep=entry.dataset_id)
+        self._persist_batch(entry, batch)
+        return entry
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Describe the datasets currently held in memory, most recent first"""
+        with self._lock:
+            return [entry.describe() for entry in reversed(self._entries.values())]
+
+    def fingerprint_in_use(self, fingerprint: str) -> bool:
+        """Whether a dataset held in memory has this fingerprint (identical uploads share one)"""
+        with self._lock:
+            return any(entry.fingerprint == fingerprint for entry in self._entries.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    # ---- eviction ----
+
+    def _expired(self, entry: DatasetEntry) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry.last_access > self.ttl_seconds
+
+    def _drop(self, dataset_id: str) -> None:
+        self._entries.pop(dataset_id, None)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop expired datasets, then least recently used ones until under budget"""
+        for dataset_id in [k for k, e in self._entries.items() if self._expired(e)]:
+            self._drop(dataset_id)
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                self._entries.move_to_end(oldest)
+                oldest = next(iter(self._entries))
+                if oldest == keep:
+                    break
+            self._drop(oldest)
+
+    # ---- on-disk store ----
+
+    def _store_paths(self, dataset_id: str):
+        """The dataset's files in the store: base frame, metadata, then appended batches"""
+        if self.store_dir is None or not dataset_id.isalnum():
+            return []
+        return ([self.store_dir / f"{dataset_id}.arrow", self.store_dir / f"{dataset_id}.json"]
+                + sorted(self.store_dir.glob(f"{dataset_id}-*.arrow")))
+
+    def _write_meta(self, entry: DatasetEntry, meta_path: Path) -> None:
+        meta_path.write_text(json.dumps({
+            'filename': entry.filename,
+            'file_type': entry.file_type,
+            'fingerprint': entry.fingerprint,
+            'column_types': entry.column_types,
+            'created_at': entry.created_at,
+            'batches': entry.stored_batches,
+            # Mergeable sketches travel with the dataset, so any worker can extend them
+            'sketches': {col: sketch.to_dict() for col, sketch in entry.sketches.items()},
+        }))
+
+    def store_sketches(self, entry: DatasetEntry) -> None:
+        """Record a dataset's (new or merged) sketches in the shared store"""
+        paths = self._store_paths(entry.dataset_id)
+        if not paths or not paths[0].exists():
+            return
+        try:
+            self._write_meta(entry, paths[1])
+        except Exception:
+            self._discard_stored(entry.dataset_id)
+
+    def _discard_stored(self, dataset_id: str) -> None:
+        for path in self._store_paths(dataset_id):
+            if path.exists():
+                path.unlink()
+
+    def _persist(self, entry: DatasetEntry) -> None:
+        """Write the dataset to the shared store; failures only disable sharing"""
+        paths = self._store_paths(entry.dataset_id)
+        if not paths:
+            return
+        data_path, meta_path = paths[:2]
+        try:
+            write_frame(entry.df, data_path)
+            entry.stored_batches = 0
+            self._write_meta(entry, meta_path)
+        except Exception:
+            # e.g. mixed-type object columns that Arrow cannot represent
+            self._discard_stored(entry.dataset_id)
+
+    def _persist_batch(self, entry: DatasetEntry, batch: pd.DataFrame) -> None:
+        """Store an appended batch as a file of its own, next to the ones before it"""
+        paths = self._store_paths(entry.dataset_id)
+        if not paths or not paths[0].exists():
+            return
+        try:
+            write_frame(batch, self.store_dir / f"{entry.dataset_id}-{entry.stored_batches + 1:06d}.arrow")
+            entry.stored_batches += 1
+            self._write_meta(entry, paths[1])
+        except Exception:
+            self._discard_stored(entry.dataset_id)
+
+    def _load(self, dataset_id: str) -> Optional[DatasetEntry]:
+        """Reload a dataset written by this or another worker"""
+        paths = self._store_paths(dataset_id)
+        if not paths or not all(path.exists() for path in paths):
+            return None
+        data_path, meta_path = paths[:2]
+        meta = json.loads(meta_path.read_text())
+        df = read_frame(data_path)
+        batches = [read_frame(path) for path in paths[2:2 + meta.get('batches', 0)]]
+        return DatasetEntry(
+            dataset_id=dataset_id,
+            frame=df,
+            batches=batches,
+            stored_batches=len(batches),
+            filename=meta['filename'],
+            file_type=meta['file_type'],
+            nbytes=int(sum(frame.memory_usage(deep=True).sum() for frame in [df] + batches)),
+            fingerprint=meta.get('fingerprint') or fingerprint_dataframe(df),
+            column_types=meta.get('column_types', {}),
+            sketches={col: ColumnSketch.from_dict(data) for col, data in meta.get('sketches', {}).items()},
+            created_at=meta.get('created_at', time.time()),
+        )
+
+    def _sweep_store(self, force: bool = False) -> None:
+        """
+        Remove stored datasets whose files have not been touched within the TTL
+        Runs when a dataset is stored, otherwise at most once per sweep interval
+        """
+        if self.store_dir is None or self.ttl_seconds <= 0:
+            return
+        now = time.time()
+        if not force and now - self._last_sweep < self.sweep_seconds:
+            return
+        self._last_sweep = now
+        cutoff = now - self.ttl_seconds
+        for path in self.store_dir.glob('*.json'):
+            if path.stem in self._entries:
+                path.touch()
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    for stale in self._store_paths(path.stem):
+                        if stale.exists():
+                            stale.unlink()
+            except OSError:
+                pass
+
+
+class UploadCache:
+    """
+    Parsed uploads keyed by a hash of the raw file bytes
+
+    Each entry is the converted DataFrame as an Arrow IPC file plus its
+    inferred schema and fingerprint, so uploading the same file again skips
+    parsing and type inference entirely: the frame is memory-mapped back.
+    Entries are evicted least recently used first (by file mtime) once the
+    cache exceeds its size budget.
+    """
+
+    def __init__(self, cache_dir: str = UPLOAD_CACHE_DIR, max_bytes: int = UPLOAD_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir and ARROW_AVAILABLE else None
+        self.max_bytes = max_bytes
+        if self.cache_dir is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                self.cache_dir = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, content_hash: str, file_type: str) -> List[Path]:
+        if self.cache_dir is None or not content_hash.isalnum() or not file_type.isalnum():
+            return []
+        stem = f"{content_hash}-{file_type}-v{UPLOAD_CACHE_VERSION}"
+        return [self.cache_dir / f"{stem}.arrow", self.cache_dir / f"{stem}.json"]
+
+    def load(self, content_hash: str, file_type: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """
+        Memory-map a previously parsed upload
+        Returns: (DataFrame, metadata with column_types, fingerprint and
+        compaction report), or None
+        """
+        paths = self._paths(content_hash, file_type)
+        try:
+            if not paths or not all(path.exists() for path in paths):
+                raise FileNotFoundError
+            data_path, meta_path = paths
+            meta = json.loads(meta_path.read_text())
+            df = read_frame(data_path)
+            for path in paths:
+                path.touch()
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return df, meta
+
+    def save(self, content_hash: str, file_type: str, df: pd.DataFrame,
+             column_types: Dict[str, str], fingerprint: str,
+             memory: Optional[Dict[str, Any]] = None) -> bool:
+        """Store a parsed upload; returns False if it cannot be represented in Arrow"""
+        paths = self._paths(content_hash, file_type)
+        if not paths:
+            return False
+        data_path, meta_path = paths
+        try:
+            write_frame(df, data_path)
+            meta_path.write_text(json.dumps({
+                'column_types': column_types,
+                'fingerprint': fingerprint,
+                'memory': memory or {},
+            }))
+        except Exception:
+            for path in paths:
+                if path.exists():
+                    path.unlink()
+            return False
+        self._trim()
+        return True
+
+    def _trim(self) -> None:
+        """Delete least recently used entries until the cache fits its budget"""
+        with self._lock:
+            files = []
+            for path in self.cache_dir.glob('*.arrow'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                for stale in (path, path.with_suffix('.json')):
+                    try:
+                        stale.unlink()
+                    except OSError:
+                        pass
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.cache_dir is not None,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,174 @@
+"""
+Response Encoding Module
+Content negotiation between the default JSON payloads, a compact columnar
+JSON layout (encoded with orjson) and Arrow IPC streams
+"""
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import pandas as pd
+import numpy as np
+import datetime
+import io
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+JSON_MEDIA_TYPE = 'application/json'
+COLUMNAR_MEDIA_TYPE = 'application/vnd.dataviz.columnar+json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Response format -> media type
+FORMATS = {
+    'json': JSON_MEDIA_TYPE,
+    'columnar': COLUMNAR_MEDIA_TYPE,
+    'arrow': ARROW_MEDIA_TYPE,
+}
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pick the response format from an Accept header
+    The first supported media type listed wins (quality values are not
+    weighed); anything else, including */*, gets plain JSON
+    """
+    for part in (accept or '').split(','):
+        media_type = part.split(';')[0].strip().lower()
+        if media_type == COLUMNAR_MEDIA_TYPE:
+            return 'columnar'
+        if media_type == ARROW_MEDIA_TYPE and ARROW_AVAILABLE:
+            return 'arrow'
+        if media_type == JSON_MEDIA_TYPE:
+            return 'json'
+    return 'json'
+
+
+# ============= JSON =============
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for values it cannot encode natively"""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'M':
+            return [None if pd.isna(value) else value.isoformat() for value in pd.to_datetime(obj)]
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return jsonable_encoder(obj)
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes; orjson when available (NaN becomes null, NumPy arrays encode natively)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return JSONResponse(content=jsonable_encoder(payload, custom_encoder={np.ndarray: _default})).body
+
+
+def _tables_to_records(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lay out DataFrame values as lists of row records (the default JSON shape)
+    Missing cells become None, since strict JSON has no NaN
+    """
+    return {key: value.astype(object).where(value.notna(), None).to_dict(orient='records')
+            if isinstance(value, pd.DataFrame) else value
+            for key, value in payload.items()}
+
+
+def column_values(series: pd.Series) -> Any:
+    """
+    A column's values for orjson: a NumPy array, except temporal columns,
+    which become ISO strings with None for NaT (orjson rejects NaT)
+    """
+    if series.dtype.kind in 'mM':
+        return [None if pd.isna(value) else value.isoformat() for value in series]
+    return series.to_numpy()
+
+
+def _tables_to_columns(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Lay out DataFrame values as {column: array of values}"""
+    return {key: {str(col): column_values(value[col]) for col in value.columns}
+            if isinstance(value, pd.DataFrame) else value
+            for key, value in payload.items()}
+
+
+# ============= ARROW =============
+
+def to_arrow_table(df: pd.DataFrame) -> 'pa.Table':
+    """Arrow table of a DataFrame; columns Arrow cannot type (mixed objects) are sent as strings"""
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        try:
+            arrays.append(pa.array(series, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array(series.astype(str).where(series.notna()), from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[str(col) for col in df.columns])
+
+
+def arrow_stream(table: 'pa.Table', metadata: Dict[str, bytes]) -> bytes:
+    """Serialize a table, with JSON blobs in its schema metadata, as an Arrow IPC stream"""
+    table = table.replace_schema_metadata(metadata)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _arrow_payload(payload: Dict[str, Any], table_key: str) -> bytes:
+    """
+    The payload's table (e.g. sample_data) as Arrow record batches; the
+    rest of the payload (statistics, chart data, ...) rides along as
+    compact JSON under the 'payload' schema metadata key
+    """
+    table = payload.get(table_key)
+    if not isinstance(table, pd.DataFrame):
+        table = pd.DataFrame()
+    rest = _tables_to_records({key: value for key, value in payload.items() if key != table_key})
+    return arrow_stream(to_arrow_table(table), {'payload': dumps(rest)})
+
+
+# ============= PUBLIC API =============
+
+def encode_payload(payload: Dict[str, Any], fmt: str = 'json', table_key: str = 'sample_data') -> bytes:
+    """
+    Serialize a response payload whose tabular parts are DataFrames
+    - json: row records, encoded exactly as FastAPI would for a returned dict
+    - columnar: one array per column, compact orjson encoding
+    - arrow: table_key as Arrow IPC record batches, the rest as metadata
+    """
+    if fmt == 'columnar':
+        return dumps(_tables_to_columns(payload))
+    if fmt == 'arrow':
+        return _arrow_payload(payload, table_key)
+    return JSONResponse(content=jsonable_encoder(_tables_to_records(payload))).body
+
+
+def attach_header(header: Dict[str, Any], body: bytes, fmt: str = 'json') -> bytes:
+    """
+    Prepend per-request fields to an already-encoded payload without
+    decoding it again (JSON formats splice bytes; Arrow streams get the
+    header as a 'header' schema metadata entry)
+    """
+    if fmt == 'arrow':
+        table = pa.ipc.open_stream(body).read_all()
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'header'] = dumps(header)
+        return arrow_stream(table, metadata)
+    head = JSONResponse(content=jsonable_encoder(header)).body
+    if body == b'{}':
+        return head
+    return head[:-1] + b',' + body[1:]
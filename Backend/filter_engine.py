@@ -0,0 +1,241 @@
+"""
+Filter Engine Module
+Evaluates compound filter predicates as boolean masks over per-column
+indexes that are built once per dataset and reused across requests
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+from timeseries import sorted_timestamps
+
+
+class ColumnIndex:
+    """
+    Lazily built lookup structures for one column
+
+    - sorted view (argsort permutation + sorted values) for range lookups
+    - sort order of any column (and its inverse) for sorted row pages
+    - sorted timestamps of a datetime column for resampling and time windows
+    - factorized codes for category membership and search over distinct values
+    """
+
+    def __init__(self, series: pd.Series):
+        self.series = series
+        self._order = None
+        self._sorted = None
+        self._num_valid = 0
+        self._sort_order = None
+        self._sort_valid = 0
+        self._rank = None
+        self._timestamps = None
+        self._codes = None
+        self._uniques = None
+        self._code_lookup = None
+
+    # ---- sorted view ----
+
+    def _ensure_sorted(self) -> None:
+        if self._order is not None:
+            return
+        if not pd.api.types.is_numeric_dtype(self.series):
+            raise ValueError(f"Range filters need a numeric column: {self.series.name}")
+        values = self.series.to_numpy(dtype='float64', na_value=np.nan)
+        # NaNs sort to the end, so valid values are sorted[:num_valid]
+        self._order = np.argsort(values, kind='stable')
+        self._sorted = values[self._order]
+        self._num_valid = int(len(values) - np.isnan(values).sum())
+
+    @property
+    def order(self) -> np.ndarray:
+        """Row positions sorted by value, missing values last"""
+        self._ensure_sorted()
+        return self._order
+
+    @property
+    def sorted_values(self) -> np.ndarray:
+        """The column's values as float64 in sort order (aligned with order)"""
+        self._ensure_sorted()
+        return self._sorted
+
+    def range_mask(self, min_value: Optional[float], max_value: Optional[float]) -> Optional[np.ndarray]:
+        """Rows with min_value <= value <= max_value (None bound = open)"""
+        if min_value is None and max_value is None:
+            return None
+        self._ensure_sorted()
+        valid = self._sorted[:self._num_valid]
+        lo = 0 if min_value is None else int(np.searchsorted(valid, min_value, side='left'))
+        hi = self._num_valid if max_value is None else int(np.searchsorted(valid, max_value, side='right'))
+        mask = np.zeros(len(self._order), dtype=bool)
+        if hi > lo:
+            mask[self._order[lo:hi]] = True
+        return mask
+
+    # ---- sort order ----
+
+    def _ensure_sort_order(self) -> None:
+        if self._sort_order is not None:
+            return
+        series = self.series
+        if pd.api.types.is_numeric_dtype(series):
+            # Numeric columns share the range-filter permutation
+            self._ensure_sorted()
+            self._sort_order, self._sort_valid = self._order, self._num_valid
+            return
+        missing = series.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(series):
+            keys = series.to_numpy(dtype='datetime64[ns]').view('int64').copy()
+            keys[missing] = np.iinfo(np.int64).max
+        else:
+            # Rank the distinct values (compared as strings) once, then sort the per-row ranks
+            self._ensure_codes()
+            labels = pd.Index(self._uniques).astype(str).to_numpy(dtype=object)
+            # Smallest key type: stable sorts of 8/16-bit keys are radix sorts
+            ranks = np.empty(len(labels) + 1, dtype=np.min_scalar_type(len(labels)))
+            ranks[np.argsort(labels, kind='stable')] = np.arange(len(labels))
+            ranks[-1] = len(labels)  # code -1 (missing) sorts last
+            keys = ranks[self._codes]
+        order = np.argsort(keys, kind='stable')
+        self._sort_order = order.astype(np.int32) if len(order) < 2**31 else order
+        self._sort_valid = int(len(order) - missing.sum())
+
+    def sort_order(self, descending: bool = False) -> List[np.ndarray]:
+        """
+        Row positions sorted by value, missing values last, as a list of
+        views of the cached permutation (descending reverses the valid part
+        without copying it)
+        """
+        self._ensure_sort_order()
+        valid, missing = self._sort_order[:self._sort_valid], self._sort_order[self._sort_valid:]
+        return [valid[::-1] if descending else valid, missing]
+
+    def sort_position(self, row: int, descending: bool = False) -> int:
+        """Where a row falls in the sort order (inverse permutation, built on first use)"""
+        self._ensure_sort_order()
+        if self._rank is None:
+            rank = np.empty(len(self._sort_order), dtype=self._sort_order.dtype)
+            rank[self._sort_order] = np.arange(len(self._sort_order), dtype=self._sort_order.dtype)
+            self._rank = rank
+        position = int(self._rank[row])
+        if descending and position < self._sort_valid:
+            return self._sort_valid - 1 - position
+        return position
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Non-missing values of a datetime column as sorted datetime64[ns]"""
+        if self._timestamps is None:
+            if not pd.api.types.is_datetime64_any_dtype(self.series):
+                raise ValueError(f"Time series need a temporal column: {self.series.name}")
+            self._timestamps = sorted_timestamps(self.series)
+        return self._timestamps
+
+    # ---- factorized codes ----
+
+    def _ensure_codes(self) -> None:
+        if self._codes is not None:
+            return
+        self._codes, self._uniques = pd.factorize(self.series, sort=False)
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Category code per row (-1 for missing values)"""
+        self._ensure_codes()
+        return self._codes
+
+    @property
+    def uniques(self) -> pd.Index:
+        """Distinct values in first-occurrence order"""
+        self._ensure_codes()
+        return pd.Index(self._uniques)
+
+    def _codes_mask(self, selected: np.ndarray) -> np.ndarray:
+        """Expand a per-distinct-value selection to a per-row mask"""
+        # Extra trailing slot maps the -1 (missing) code to False
+        table = np.zeros(len(self._uniques) + 1, dtype=bool)
+        table[:len(self._uniques)] = selected
+        return table[self._codes]
+
+    def category_mask(self, categories: Optional[Sequence[Any]]) -> Optional[np.ndarray]:
+        """Rows whose value (compared as a string) is one of the categories"""
+        if not categories:
+            return None
+        self._ensure_codes()
+        if self._code_lookup is None:
+            self._code_lookup = {str(value): code for code, value in enumerate(self._uniques)}
+        selected = np.zeros(len(self._uniques), dtype=bool)
+        for category in categories:
+            code = self._code_lookup.get(str(category))
+            if code is not None:
+                selected[code] = True
+        return self._codes_mask(selected)
+
+    def search_mask(self, query: Optional[str]) -> Optional[np.ndarray]:
+        """Rows whose value contains the query (case-insensitive), matched once per distinct value"""
+        if not query:
+            return None
+        self._ensure_codes()
+        matches = pd.Series(self._uniques).astype(str).str.contains(query, case=False, na=False)
+        return self._codes_mask(matches.to_numpy(dtype=bool))
+
+
+def get_column_index(indexes: Dict[str, ColumnIndex], df: pd.DataFrame, column: str) -> ColumnIndex:
+    """Fetch (or build and remember) the index for a column of a dataset"""
+    index = indexes.get(column)
+    if index is None:
+        if column not in df.columns:
+            raise KeyError(f"Unknown column: {column}")
+        index = ColumnIndex(df[column])
+        indexes[column] = index
+    return index
+
+
+def predicate_mask(index: ColumnIndex, predicate: Any) -> Optional[np.ndarray]:
+    """Evaluate one predicate; None means it does not restrict any rows"""
+    if predicate.filter_type == 'range':
+        return index.range_mask(predicate.min_value, predicate.max_value)
+    elif predicate.filter_type == 'category':
+        return index.category_mask(predicate.categories)
+    elif predicate.filter_type == 'search':
+        return index.search_mask(predicate.search_query)
+    else:
+        raise ValueError(f"Unsupported filter type: {predicate.filter_type}")
+
+
+def select_mask(df: pd.DataFrame, predicates: List[Any], combine: str,
+                indexes: Dict[str, ColumnIndex]) -> Optional[np.ndarray]:
+    """
+    Combine predicates with AND/OR into a boolean row mask
+    Returns: the mask, or None when every row is selected
+    """
+    if combine not in ('and', 'or'):
+        raise ValueError(f"Unsupported combine mode: {combine}")
+    masks = []
+    for predicate in predicates:
+        mask = predicate_mask(get_column_index(indexes, df, predicate.column), predicate)
+        if mask is None:
+            if combine == 'or':
+                return None
+            continue
+        masks.append(mask)
+    if not masks:
+        return None
+    return np.logical_and.reduce(masks) if combine == 'and' else np.logical_or.reduce(masks)
+
+
+def select_rows(df: pd.DataFrame, predicates: List[Any], combine: str,
+                indexes: Dict[str, ColumnIndex]) -> Optional[np.ndarray]:
+    """
+    Combine predicates with AND/OR into a row selection
+    Returns: sorted row positions, or None when every row is selected
+    """
+    mask = select_mask(df, predicates, combine, indexes)
+    return None if mask is None else np.flatnonzero(mask)
+
+
+def take_rows(df: pd.DataFrame, positions: Optional[np.ndarray]) -> pd.DataFrame:
+    """Materialize only the selected rows (the full frame is never copied)"""
+    if positions is None:
+        return df
+    return df.take(positions)
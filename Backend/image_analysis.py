@@ -3,105 +3,208 @@ Image Color Analysis Module
 Analyzes images to extract dominant colors using K-Means clustering
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from PIL import Image
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from threadpoolctl import threadpool_limits
+import asyncio
 import io
-from typing import List, Dict
+import json
+import zipfile
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Tuple
+
+from ingestion import spool_upload, discard_spool
+from metrics import stage
+from workers import pool_from_env
 
 router = APIRouter()
 
+# K-Means clustering runs in its own pool, off the event loop. Jobs take and
+# return plain bytes/lists, so a process pool (the default) pickles cheaply;
+# configure with IMAGE_POOL, IMAGE_WORKERS and IMAGE_MAX_PENDING
+image_pool = pool_from_env('image', 'IMAGE', default_kind='process')
+
+# Images are downscaled so their longest side is at most this many pixels
+MAX_IMAGE_SIZE = 300
+
+# Bits kept per channel by the fast mode's RGB histogram (5 -> 32x32x32 bins)
+HISTOGRAM_BITS = 5
+
+# Exact K-Means stays the default; callers opt into the faster approximations
+DEFAULT_QUALITY = 'exact'
+
+ALLOWED_TYPES = ['image/png', 'image/jpeg', 'image/jpg']
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+ZIP_TYPES = {'application/zip', 'application/x-zip-compressed'}
+
 
 def rgb_to_hex(rgb: tuple) -> str:
     """Convert RGB tuple to HEX color string"""
     return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]), int(rgb[1]), int(rgb[2]))
 
 
-def analyze_image_colors(image_bytes: bytes, num_colors: int = 5) -> List[Dict]:
+def load_pixels(image_bytes: bytes, max_size: int = MAX_IMAGE_SIZE,
+                resample: Image.Resampling = Image.Resampling.LANCZOS,
+                draft: bool = False) -> np.ndarray:
     """
-    Extract dominant colors from an image using K-Means clustering
-    
+    Decode an image, downscale it so its longest side is at most max_size
+    and return its pixels as an (n x 3) uint8 array
+    draft: decode JPEGs at a reduced scale even for the exact resampling
+    (the fast resampling modes always do)
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    fast_resample = resample != Image.Resampling.LANCZOS
+    if draft or fast_resample:
+        # JPEG only: decode at a reduced DCT scale that still covers max_size
+        image.draft('RGB', (max_size, max_size))
+
+    # Convert to RGB if needed
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    if max(image.size) > max_size:
+        ratio = max_size / max(image.size)
+        new_size = tuple(max(1, int(dim * ratio)) for dim in image.size)
+        # reducing_gap first shrinks by an integer factor with a box filter,
+        # so only the last small step pays for the resampling filter
+        reducing_gap = 2.0 if fast_resample else None
+        image = image.resize(new_size, resample, reducing_gap=reducing_gap)
+
+    return np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+
+
+def kmeans_palette(pixels: np.ndarray, num_colors: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact mode: K-Means with 10 initializations over every pixel
+    Returns: (cluster centers, pixel count per cluster)
+    """
+    kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=10)
+    kmeans.fit(pixels)
+    return kmeans.cluster_centers_, np.bincount(kmeans.labels_, minlength=num_colors)
+
+
+def minibatch_palette(pixels: np.ndarray, num_colors: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Balanced mode: Mini-Batch K-Means, fitted on small random batches
+    Returns: (cluster centers, pixel count per cluster)
+    """
+    kmeans = MiniBatchKMeans(n_clusters=num_colors, random_state=42, n_init=3,
+                             batch_size=4096)
+    labels = kmeans.fit_predict(pixels.astype(np.float32))
+    return kmeans.cluster_centers_, np.bincount(labels, minlength=num_colors)
+
+
+def histogram_palette(pixels: np.ndarray, num_colors: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fast mode: bin pixels into a 32x32x32 RGB histogram, then cluster the
+    occupied bins (at their mean color, weighted by pixel count)
+    The clustering sees a few thousand weighted bins instead of every pixel
+    Returns: (cluster centers, pixel count per cluster)
+    """
+    shift = 8 - HISTOGRAM_BITS
+    quantized = (pixels >> shift).astype(np.int32)
+    bins = (quantized[:, 0] << (2 * HISTOGRAM_BITS)) | (quantized[:, 1] << HISTOGRAM_BITS) | quantized[:, 2]
+    occupied, inverse, counts = np.unique(bins, return_inverse=True, return_counts=True)
+
+    # Mean color of the pixels in each bin (finer than the bin's center)
+    inverse = inverse.ravel()
+    means = np.column_stack([
+        np.bincount(inverse, weights=pixels[:, channel], minlength=len(occupied))
+        for channel in range(3)
+    ]) / counts[:, None]
+
+    if len(occupied) <= num_colors:
+        return means, counts
+
+    kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=3)
+    labels = kmeans.fit_predict(means, sample_weight=counts)
+    return kmeans.cluster_centers_, np.bincount(labels, weights=counts, minlength=num_colors)
+
+
+# quality -> (resize filter, palette extractor)
+QUALITY_MODES = {
+    'fast': (Image.Resampling.BILINEAR, histogram_palette),
+    'balanced': (Image.Resampling.BILINEAR, minibatch_palette),
+    'exact': (Image.Resampling.LANCZOS, kmeans_palette),
+}
+
+
+def analyze_image_colors(image_bytes: bytes, num_colors: int = 5, quality: str = DEFAULT_QUALITY,
+                         draft: bool = False) -> List[Dict]:
+    """
+    Extract dominant colors from an image
+
     Args:
         image_bytes: Image file bytes
         num_colors: Number of dominant colors to extract
-        
+        quality: 'fast' (RGB histogram + weighted K-Means), 'balanced'
+            (Mini-Batch K-Means) or 'exact' (full K-Means, the default)
+        draft: decode JPEGs at a reduced scale (still at least the
+            downscaled size) whatever the quality
+
     Returns:
         List of color dictionaries with rgb, hex, and percentage
     """
     try:
-        # Load image from bytes
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize image for performance (max dimension 300px)
-        max_size = 300
-        if max(image.size) > max_size:
-            ratio = max_size / max(image.size)
-            new_size = tuple(int(dim * ratio) for dim in image.size)
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-        
-        # Convert image to numpy array
-        img_array = np.array(image)
-        
-        # Reshape to 2D array of pixels (rows x 3 RGB channels)
-        pixels = img_array.reshape(-1, 3)
-        
-        # Remove any pixels with alpha channel issues
-        pixels = pixels[~np.isnan(pixels).any(axis=1)]
-        
-        # Apply K-Means clustering
-        kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=10)
-        kmeans.fit(pixels)
-        
-        # Get cluster centers (dominant colors)
-        colors = kmeans.cluster_centers_
-        
-        # Get labels for each pixel
-        labels = kmeans.labels_
-        
-        # Count occurrences of each label
-        label_counts = np.bincount(labels)
-        
+        resample, palette = QUALITY_MODES[quality]
+        # Stages are traced when the image pool runs threads (not across processes)
+        with stage('decode', bytes_in=len(image_bytes)):
+            pixels = load_pixels(image_bytes, resample=resample, draft=draft)
+
+        # Get dominant colors and the number of pixels assigned to each
+        with stage('palette', rows=len(pixels)):
+            colors, label_counts = palette(pixels, num_colors)
+
         # Calculate percentages
-        total_pixels = len(labels)
-        
+        total_pixels = len(pixels)
+
         # Create result list
         color_analysis = []
         for i, color in enumerate(colors):
+            if label_counts[i] == 0:
+                continue
             rgb = [int(c) for c in color]
             hex_color = rgb_to_hex(rgb)
             percentage = (label_counts[i] / total_pixels) * 100
-            
+
             color_analysis.append({
                 "rgb": rgb,
                 "hex": hex_color,
                 "percentage": round(percentage, 2)
             })
-        
+
         # Sort by percentage (descending)
         color_analysis.sort(key=lambda x: x['percentage'], reverse=True)
-        
+
         return color_analysis
-        
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
+        # Plain exception: HTTPException does not survive the round trip from a process worker
+        raise ValueError(f"Error processing image: {str(e)}")
 
 
 @router.post("/analyze-image")
-async def analyze_image(file: UploadFile = File(...)):
+async def analyze_image(
+    file: UploadFile = File(...),
+    quality: str = Query(DEFAULT_QUALITY, description="Speed/quality trade-off: fast, balanced or exact"),
+):
     """
     Analyze an image to extract dominant colors
     
     Accepts: PNG, JPG, JPEG images
     Returns: JSON with dominant colors, their RGB/HEX values, and percentages
     """
+    if quality not in QUALITY_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid quality. Allowed: {', '.join(QUALITY_MODES)}. Got: {quality}"
+        )
+
     # Validate file type
-    allowed_types = ['image/png', 'image/jpeg', 'image/jpg']
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Allowed: PNG, JPG, JPEG. Got: {file.content_type}"
@@ -109,18 +212,140 @@ async def analyze_image(file: UploadFile = File(...)):
     
     # Read file bytes
     try:
-        contents = await file.read()
+        with stage('read') as counts:
+            contents = await file.read()
+            counts['bytes_in'] = len(contents)
         
-        # Analyze colors
-        colors = analyze_image_colors(contents)
+        # Analyze colors in the image pool
+        with stage('analyze'):
+            colors = await image_pool.run(analyze_image_colors, contents, quality=quality)
         
         return {
             "filename": file.filename,
+            "quality": quality,
             "colors": colors,
             "total_colors": len(colors)
         }
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze image: {str(e)}")
+
+
+# ============= BATCH ANALYSIS =============
+
+def analyze_image_file(path: str, member: Optional[str], quality: str) -> List[Dict]:
+    """
+    Batch job: read one image (a spooled file, or a member of a spooled zip
+    archive) inside the worker and extract its colors
+    BLAS/OpenMP are limited to one thread per job, since the batch already
+    keeps every core busy with a job of its own
+    JPEGs are always decoded with draft(), at the smallest DCT scale that
+    still covers the downscaled size, so exact mode only skips pixels the
+    resize would have averaged away
+    """
+    if member is None:
+        image_bytes = Path(path).read_bytes()
+    else:
+        with zipfile.ZipFile(path) as archive:
+            image_bytes = archive.read(member)
+    with threadpool_limits(limits=1):
+        return analyze_image_colors(image_bytes, quality=quality, draft=True)
+
+
+def iter_batch_images(spooled: List[Tuple[str, str, str]]) -> Iterator[Tuple[str, str, Optional[str], Optional[str]]]:
+    """
+    Expand uploads into individual images
+    Yields: (display name, spooled path, zip member or None, error or None)
+    """
+    for filename, content_type, path in spooled:
+        suffix = Path(filename).suffix.lower()
+        if content_type in ZIP_TYPES or suffix == '.zip':
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    members = [info.filename for info in archive.infolist()
+                               if not info.is_dir()
+                               and Path(info.filename).suffix.lower() in IMAGE_EXTENSIONS
+                               and not info.filename.startswith('__MACOSX/')]
+            except zipfile.BadZipFile:
+                yield filename, path, None, "Invalid zip archive"
+                continue
+            for member in members:
+                yield f"{filename}/{member}", path, member, None
+        elif content_type in ALLOWED_TYPES or suffix in IMAGE_EXTENSIONS:
+            yield filename, path, None, None
+        else:
+            yield filename, path, None, f"Invalid file type. Allowed: PNG, JPG, JPEG, ZIP. Got: {content_type}"
+
+
+async def stream_batch_results(spooled: List[Tuple[str, str, str]], quality: str) -> AsyncIterator[bytes]:
+    """
+    Run one pool job per image, at most one per worker at a time, and yield
+    an NDJSON line for each image as soon as it finishes (completion order)
+    """
+    async def analyze(index: int, name: str, path: str, member: Optional[str]) -> Dict:
+        while True:
+            try:
+                colors = await image_pool.run(analyze_image_file, path, member, quality)
+                return {"index": index, "filename": name, "colors": colors, "total_colors": len(colors)}
+            except HTTPException as e:
+                if e.status_code != 503:
+                    raise
+                # Pool saturated by other requests: this batch was accepted, so wait its turn
+                await asyncio.sleep(image_pool.retry_after)
+            except Exception as e:
+                return {"index": index, "filename": name, "error": str(e)}
+
+    try:
+        running = set()
+        for index, (name, path, member, error) in enumerate(iter_batch_images(spooled)):
+            if error is not None:
+                yield (json.dumps({"index": index, "filename": name, "error": error}) + '\n').encode('utf-8')
+                continue
+            if len(running) >= image_pool.max_workers:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield (json.dumps(task.result()) + '\n').encode('utf-8')
+            running.add(asyncio.ensure_future(analyze(index, name, path, member)))
+        for task in asyncio.as_completed(running):
+            yield (json.dumps(await task) + '\n').encode('utf-8')
+    finally:
+        for task in running:
+            task.cancel()
+        for _, _, path in spooled:
+            discard_spool(path)
+
+
+@router.post("/analyze-images")
+async def analyze_images(
+    files: List[UploadFile] = File(...),
+    quality: str = Query(DEFAULT_QUALITY, description="Speed/quality trade-off: fast, balanced or exact"),
+):
+    """
+    Analyze many images in one request
+
+    Accepts: any number of PNG/JPG/JPEG files and/or ZIP archives of them
+    Returns: NDJSON stream, one line per image in completion order, with
+    either its colors or an error (the line's index gives upload order)
+    """
+    if quality not in QUALITY_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid quality. Allowed: {', '.join(QUALITY_MODES)}. Got: {quality}"
+        )
+
+    # Spool uploads to disk so workers read the images themselves
+    spooled = []
+    try:
+        for file in files:
+            path, _ = await spool_upload(file)
+            spooled.append((file.filename or 'image', file.content_type or '', path))
+    except Exception as e:
+        for _, _, path in spooled:
+            discard_spool(path)
+        raise HTTPException(status_code=500, detail=f"Failed to read uploads: {str(e)}")
+
+    return StreamingResponse(stream_batch_results(spooled, quality), media_type='application/x-ndjson')
@@ -0,0 +1,263 @@
+"""
+Incremental Aggregates Module
+Mergeable per-column state behind a dataset's profile, so appending a batch
+of rows only folds that batch in instead of recomputing every statistic
+and chart over the whole dataset
+"""
+
+import pandas as pd
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from sketches import ColumnSketch, approximate_statistics
+from stats_engine import empty_numeric_stats
+from text_index import word_tokens, countable_words
+from timeseries import temporal_chart
+
+
+class StreamingHistogram:
+    """
+    Equal-width histogram whose bins grow to cover new values
+
+    The first batch gets the bins np.histogram would choose. Values outside
+    the range later add bins of the same width; once there are more than
+    max_bins, adjacent pairs are merged (doubling the width), so existing
+    counts never need the raw values again.
+    """
+
+    def __init__(self, max_bins: int):
+        self.max_bins = max_bins
+        self.lo = 0.0
+        self.width = 0.0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _cover(self, vmin: float, vmax: float) -> None:
+        """Add bins until [vmin, vmax] is inside the histogram's range"""
+        hi = self.lo + len(self.counts) * self.width
+        left = int(np.ceil((self.lo - vmin) / self.width)) if vmin < self.lo else 0
+        right = int(np.ceil((vmax - hi) / self.width)) if vmax > hi else 0
+        if not left and not right:
+            return
+        # Smallest power-of-two widening that fits the new range into max_bins,
+        # worked out before any bins are allocated (an outlier may be far away)
+        span = left + len(self.counts) + right
+        factor = 1
+        while -(-span // factor) > self.max_bins:
+            factor *= 2
+        merged = np.zeros(-(-span // factor), dtype=np.int64)
+        np.add.at(merged, (left + np.arange(len(self.counts))) // factor, self.counts)
+        self.lo -= left * self.width
+        self.width *= factor
+        self.counts = merged
+
+    def update(self, values: np.ndarray) -> None:
+        """Count a batch of non-missing values"""
+        if len(values) == 0:
+            return
+        if self.width == 0.0:
+            num_bins = min(self.max_bins, int(pd.Series(values).nunique()))
+            edges = np.histogram_bin_edges(values, bins=num_bins)
+            self.lo, self.width = float(edges[0]), float(edges[1] - edges[0])
+            self.counts = np.zeros(num_bins, dtype=np.int64)
+        else:
+            self._cover(float(values.min()), float(values.max()))
+        bins = np.floor((values - self.lo) / self.width).astype(np.int64)
+        # The top edge is inclusive, as in np.histogram
+        np.clip(bins, 0, len(self.counts) - 1, out=bins)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def trimmed(self):
+        """(bin edges, counts) without empty bins at either end"""
+        nonzero = np.flatnonzero(self.counts)
+        if len(nonzero) == 0:
+            return np.zeros(0), self.counts[:0]
+        first, last = nonzero[0], nonzero[-1] + 1
+        edges = self.lo + self.width * np.arange(first, last + 1)
+        return edges, self.counts[first:last]
+
+
+class Reservoir:
+    """Uniform random sample of a stream of values (Algorithm R, one batch at a time)"""
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.values = np.zeros(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        free = max(0, self.size - len(self.values))
+        if free:
+            self.values = np.concatenate([self.values, values[:free]])
+        rest = values[free:]
+        if len(rest):
+            # Item t (1-based over the stream) replaces a random slot with probability size / t
+            positions = self.seen + free + np.arange(1, len(rest) + 1)
+            slots = self._rng.integers(0, positions)
+            keep = slots < self.size
+            # Later items overwrite earlier ones, as in the sequential algorithm
+            self.values[slots[keep]] = rest[keep]
+        self.seen += len(values)
+
+
+def _top(counter: Counter, n: int):
+    """Most frequent entries; ties keep first-seen order, like value_counts"""
+    return counter.most_common(n)
+
+
+class ColumnAggregate:
+    """
+    Mergeable state of one column, by column type
+
+    - numeric: running moments (Welford) and a KLL quantile sketch, a
+      streaming histogram and a reservoir sample for the chart
+    - categorical: exact value counters
+    - temporal: exact per-timestamp counts in date order (min, max and the
+      resampled line chart), merged with only the batch's timestamps
+    """
+
+    def __init__(self, column_type: str, histogram_bins: int, sample_size: int):
+        self.column_type = column_type
+        self.count = 0
+        self.missing = 0
+        if column_type == 'numeric':
+            self.sketch = ColumnSketch('numeric')
+            self.histogram = StreamingHistogram(histogram_bins)
+            self.sample = Reservoir(sample_size)
+        elif column_type == 'temporal':
+            # Distinct timestamps (ns since the epoch, UTC for zoned columns), sorted, and their counts
+            self.date_keys = np.empty(0, dtype=np.int64)
+            self.date_counts = np.empty(0, dtype=np.int64)
+            self.tz = None
+        else:
+            self.counts: Counter = Counter()
+
+    def update(self, series: pd.Series) -> None:
+        """Fold one batch of the column in"""
+        if self.column_type == 'numeric':
+            self.sketch.update(series)
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.histogram.update(values)
+            self.sample.update(values)
+            num_valid = len(values)
+        elif self.column_type == 'temporal':
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                series = pd.to_datetime(series, errors='coerce')
+            self.tz = getattr(series.dtype, 'tz', None)
+            stamps = pd.DatetimeIndex(series.dropna()).asi8
+            self._merge_dates(*np.unique(stamps, return_counts=True))
+            num_valid = len(stamps)
+        else:
+            counts = series.value_counts(dropna=True, sort=False)
+            counts = counts[counts > 0]  # categorical dtypes list unobserved categories too
+            self.counts.update(dict(zip(counts.index, counts.to_numpy().tolist())))
+            num_valid = int(counts.sum())
+        self.count += num_valid
+        self.missing += len(series) - num_valid
+
+    def _merge_dates(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Fold in a batch's sorted distinct timestamps: known ones add their
+        counts in place, new ones are inserted (one copy of the arrays), so
+        nothing is re-aligned or re-sorted across all timestamps seen
+        """
+        positions = np.searchsorted(self.date_keys, keys)
+        found = positions < len(self.date_keys)
+        found[found] = self.date_keys[positions[found]] == keys[found]
+        self.date_counts[positions[found]] += counts[found]
+        if not found.all():
+            new = ~found
+            self.date_keys = np.insert(self.date_keys, positions[new], keys[new])
+            self.date_counts = np.insert(self.date_counts, positions[new], counts[new])
+
+    def statistics(self, top_n: int = 20) -> Dict[str, Any]:
+        """Column statistics in the shape calculate_statistics returns"""
+        num_rows = self.count + self.missing
+        if self.column_type == 'numeric':
+            return approximate_statistics(self.sketch, top_n) or empty_numeric_stats(num_rows)
+        if self.column_type == 'temporal':
+            if len(self.date_keys) == 0:
+                return {'type': 'temporal', 'count': 0, 'missing': num_rows}
+            return {
+                'type': 'temporal',
+                'min_date': str(pd.Timestamp(int(self.date_keys[0]), tz=self.tz)),
+                'max_date': str(pd.Timestamp(int(self.date_keys[-1]), tz=self.tz)),
+                'count': self.count,
+                'missing': self.missing
+            }
+        return {
+            'type': 'categorical',
+            'unique_values': len(self.counts),
+            'top_values': {str(value): int(count) for value, count in _top(self.counts, top_n)},
+            'count': self.count,
+            'missing': self.missing
+        }
+
+    def chart(self) -> Dict[str, Any]:
+        """Chart data in the shape get_chart_data returns"""
+        if self.column_type == 'numeric':
+            edges, counts = self.histogram.trimmed()
+            return {
+                'type': 'histogram',
+                'data': {
+                    'labels': [f"{edges[i]:.2f}-{edges[i+1]:.2f}" for i in range(len(counts))],
+                    'values': counts.tolist(),
+                    'bin_edges': edges.tolist(),
+                    'sample': self.sample.values.tolist()
+                }
+            }
+        if self.column_type == 'temporal':
+            return temporal_chart(self.date_keys.view('datetime64[ns]'), weights=self.date_counts)
+        top = _top(self.counts, 15)
+        return {
+            'type': 'bar',
+            'data': {
+                'labels': [str(label) for label, _ in top],
+                'values': [int(count) for _, count in top]
+            }
+        }
+
+
+class DatasetAggregates:
+    """
+    Incrementally maintained profile of a dataset
+
+    Built once from the rows a dataset already has, then updated with each
+    appended batch; statistics, chart data and word frequencies are read
+    from the aggregates without touching earlier rows. Everything is exact
+    except numeric quartiles, which come from KLL sketches and carry error
+    bounds like approximate statistics do.
+    """
+
+    def __init__(self, column_types: Dict[str, str], text_column: Optional[str],
+                 histogram_bins: int, sample_size: int):
+        self.column_types = dict(column_types)
+        self.text_column = text_column
+        self.num_rows = 0
+        self.columns = {col: ColumnAggregate(col_type, histogram_bins, sample_size)
+                        for col, col_type in column_types.items()}
+        self.words: Counter = Counter()
+
+    def update(self, batch: pd.DataFrame) -> None:
+        """Fold a batch of rows (with the dataset's columns) into every aggregate"""
+        for col, aggregate in self.columns.items():
+            aggregate.update(batch[col])
+        if self.text_column is not None:
+            _, codes, vocab = word_tokens(batch[self.text_column])
+            counts = np.bincount(codes, minlength=len(vocab)) * countable_words(vocab)
+            nonzero = np.flatnonzero(counts)
+            self.words.update(dict(zip(vocab[nonzero].tolist(), counts[nonzero].tolist())))
+        self.num_rows += len(batch)
+
+    def statistics(self) -> Dict[str, Any]:
+        return {col: aggregate.statistics() for col, aggregate in self.columns.items()}
+
+    def chart_data(self) -> Dict[str, Any]:
+        return {col: aggregate.chart() for col, aggregate in self.columns.items()}
+
+    def word_frequencies(self, top_n: int = 50) -> Optional[Dict[str, int]]:
+        if self.text_column is None:
+            return None
+        return dict(_top(self.words, top_n))
@@ -0,0 +1,190 @@
+"""
+Streaming Ingestion Module
+Spools uploads to disk and parses them incrementally so that memory
+overhead during ingestion is bounded by the chunk size, not the file size
+"""
+
+from fastapi import UploadFile
+import pandas as pd
+import numpy as np
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Bytes read from the upload stream per await (keeps the event loop responsive)
+SPOOL_CHUNK_BYTES = int(os.environ.get('INGEST_SPOOL_CHUNK_BYTES', 1024 * 1024))
+
+# Rows parsed per chunk for delimited and text files
+PARSE_CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', 100_000))
+
+
+# ============= SPOOLING =============
+
+async def spool_upload(file: UploadFile, chunk_size: int = SPOOL_CHUNK_BYTES,
+                       digest: Optional[Any] = None) -> Tuple[str, int]:
+    """
+    Copy an uploaded file to a temporary file on disk chunk by chunk
+    digest: optional hashlib object updated with every chunk, so the
+    upload is content-hashed without reading it a second time
+
+    Returns: (path of the spooled file, number of bytes written)
+    The caller is responsible for removing the file with discard_spool()
+    """
+    fd, path = tempfile.mkstemp(prefix='upload-', suffix=Path(file.filename or '').suffix.lower())
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                size += len(chunk)
+    except Exception:
+        discard_spool(path)
+        raise
+    return path, size
+
+
+def discard_spool(path: Optional[str]) -> None:
+    """Remove a spooled upload, ignoring files that are already gone"""
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# ============= RUNNING STATISTICS =============
+
+class RunningStats:
+    """
+    Mergeable running moments for a numeric column
+
+    Chunks are folded in with Chan's parallel variant of Welford's
+    algorithm, so the result matches a single pass over the whole column.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'missing')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.missing = 0
+
+    def update(self, values: pd.Series) -> None:
+        """Fold one chunk of a column into the running moments"""
+        arr = values.to_numpy(dtype='float64', na_value=np.nan)
+        valid = arr[~np.isnan(arr)]
+        self.missing += len(arr) - len(valid)
+        if len(valid) == 0:
+            return
+        chunk = RunningStats()
+        chunk.count = len(valid)
+        chunk.mean = float(valid.mean())
+        chunk.m2 = float(((valid - chunk.mean) ** 2).sum())
+        chunk.min = float(valid.min())
+        chunk.max = float(valid.max())
+        self.merge(chunk, include_missing=False)
+
+    def merge(self, other: 'RunningStats', include_missing: bool = True) -> None:
+        """Combine another set of running moments into this one"""
+        if include_missing:
+            self.missing += other.missing
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, matching pandas)"""
+        if self.count < 2:
+            return float('nan')
+        return float(np.sqrt(self.m2 / (self.count - 1)))
+
+    def to_dict(self) -> Dict[str, float]:
+        """Export the moments in the shape used by calculate_statistics"""
+        return {
+            'mean': float(self.mean),
+            'std': self.std,
+            'min': float(self.min),
+            'max': float(self.max),
+            'count': int(self.count),
+            'missing': int(self.missing),
+        }
+
+
+# ============= CHUNKED PARSING =============
+
+def iter_delimited_chunks(path: str, sep: str = ',', chunk_rows: int = PARSE_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield DataFrame chunks of a delimited file without loading it whole"""
+    with pd.read_csv(path, sep=sep, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def iter_text_chunks(path: str, chunk_rows: int = PARSE_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield chunks of non-empty stripped lines from a text file"""
+    lines = []
+    with open(path, 'r', encoding='utf-8', errors='ignore') as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                lines.append(line)
+                if len(lines) >= chunk_rows:
+                    yield pd.DataFrame({'text': lines})
+                    lines = []
+    if lines:
+        yield pd.DataFrame({'text': lines})
+
+
+def consume_chunks(chunks: Iterator[pd.DataFrame]) -> Tuple[pd.DataFrame, Dict[str, RunningStats]]:
+    """
+    Collect parsed chunks into one DataFrame while accumulating running
+    statistics for numeric columns
+
+    Columns whose dtype is not numeric in the final frame (for example a
+    column that only turned non-numeric in a later chunk) are dropped from
+    the running statistics. A column whose chunks were typed differently
+    and that ends up holding mixed values (numbers from early chunks,
+    strings from later ones) is cast to strings, as a single parse of the
+    whole file would have read it.
+    """
+    parts = []
+    running: Dict[str, RunningStats] = {}
+    dtypes: Dict[str, set] = {}
+    for chunk in chunks:
+        for col in chunk.columns:
+            dtypes.setdefault(col, set()).add(chunk[col].dtype)
+            if pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col]):
+                running.setdefault(col, RunningStats()).update(chunk[col])
+        parts.append(chunk)
+
+    if not parts:
+        return pd.DataFrame(), {}
+
+    df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True, copy=False)
+    del parts
+    for col, kinds in dtypes.items():
+        if len(kinds) > 1 and df[col].dtype == object and \
+                pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].map(str, na_action='ignore')
+
+    running = {
+        col: stats for col, stats in running.items()
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col])
+        and stats.count + stats.missing == len(df)
+    }
+    return df, running
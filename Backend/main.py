@@ -4,20 +4,49 @@ FastAPI application for multi-format file processing and analysis
 Supports: CSV, JSON, TXT, TSV, XLSX
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import pandas as pd
 import numpy as np
-import io
+import hashlib
 import json
+import os
 import re
-from collections import Counter
+import warnings
 from pathlib import Path
 
 # Import image analysis router
-from image_analysis import router as image_router
+from image_analysis import router as image_router, image_pool
+from ingestion import RunningStats, spool_upload, discard_spool, consume_chunks
+from parsers import iter_file_chunks, read_frame
+from datasets import DatasetRegistry, DatasetEntry, UploadCache
+from compaction import compact_frame, match_dtypes
+from cache import ProfileCache, make_cache_key
+from encoding import (
+    FORMATS, negotiate_format, encode_payload, attach_header, dumps, to_arrow_table, arrow_stream, column_values
+)
+from stats_engine import numeric_statistics, categorical_statistics, empty_numeric_stats
+from sketches import ColumnSketch, sketch_chunks, sketch_frame, usable_sketch, approximate_statistics
+from incremental import DatasetAggregates
+from filter_engine import ColumnIndex, select_mask, select_rows, take_rows, get_column_index
+from pagination import row_page
+from aggregate_engine import AGGREGATIONS, aggregate
+from correlation_engine import CORRELATION_METHODS, correlate
+from timeseries import (
+    GRANULARITIES, TEMPORAL_CHART_POINTS, MAX_TEMPORAL_POINTS,
+    sorted_timestamps, resample, bucket_labels, temporal_chart
+)
+from workers import WorkerPool, DEFAULT_WORKERS
+from streaming import STREAM_MODES, STREAM_HEADERS, EventChannel, StreamClosed
+from metrics import MetricsMiddleware, PROMETHEUS_MEDIA_TYPE, registry as metrics_registry, stage
+from text_index import (
+    TextIndex, STOP_WORDS, URL_PATTERN, SPECIAL_CHARS_PATTERN,
+    word_tokens, countable_words, top_counts
+)
 
 app = FastAPI(title="Interactive Data Visualization API")
 
@@ -31,16 +60,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Cache"],
 )
 
-# Global variables to store the current dataset
-current_dataset = None
-current_filename = None
-file_metadata = None
+# Per-stage timings: Server-Timing header on every response, aggregates on /metrics
+app.add_middleware(MetricsMiddleware)
 
+# Registry of uploaded datasets, keyed by dataset ID
+datasets = DatasetRegistry()
 
-class FilterRequest(BaseModel):
-    """Model for filter requests"""
+# Serialized analysis responses, keyed by dataset fingerprint and request spec
+profile_cache = ProfileCache()
+
+# Parsed uploads on disk, keyed by the hash of the uploaded bytes
+upload_cache = UploadCache()
+
+# Parsing and analytics run here, off the event loop. Always a thread pool:
+# the datasets live in this process, so a process pool would pickle them
+analytics_pool = WorkerPool('analytics', 'thread',
+                            max_workers=int(os.environ.get('ANALYTICS_WORKERS', DEFAULT_WORKERS)),
+                            max_pending=int(os.environ.get('ANALYTICS_MAX_PENDING', DEFAULT_WORKERS * 4)))
+
+
+class FilterPredicate(BaseModel):
+    """A single filter condition on one column"""
     column: str
     filter_type: str  # 'range' for numeric, 'category' for categorical, 'search' for text
     min_value: Optional[float] = None
@@ -49,6 +92,88 @@ class FilterRequest(BaseModel):
     search_query: Optional[str] = None
 
 
+class FilterRequest(BaseModel):
+    """
+    Model for filter requests
+    Either a single predicate (column/filter_type/...) or a list of
+    predicates combined with 'and' / 'or'
+    """
+    dataset_id: Optional[str] = None  # defaults to the most recent upload
+    column: Optional[str] = None
+    filter_type: Optional[str] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    categories: Optional[List[str]] = None
+    search_query: Optional[str] = None
+    predicates: Optional[List[FilterPredicate]] = None
+    combine: str = 'and'
+    columns: Optional[List[str]] = None  # profile only these columns (all when omitted)
+
+    def all_predicates(self) -> List[FilterPredicate]:
+        """The request's predicates, including the single-predicate form"""
+        predicates = list(self.predicates or [])
+        if self.column is not None and self.filter_type is not None:
+            predicates.insert(0, FilterPredicate(
+                column=self.column,
+                filter_type=self.filter_type,
+                min_value=self.min_value,
+                max_value=self.max_value,
+                categories=self.categories,
+                search_query=self.search_query,
+            ))
+        return predicates
+
+
+class RowsRequest(FilterRequest):
+    """
+    Model for row page requests: the filter of a /filter request, then
+    the selected rows sorted, projected to columns and paged
+    """
+    sort_by: Optional[str] = None  # row order when omitted
+    descending: bool = False
+    offset: int = 0
+    limit: int = 100
+    after: Optional[int] = None  # keyset cursor: next_cursor of the previous page
+
+
+class CorrelationRequest(FilterRequest):
+    """
+    Model for correlation requests: the filter of a /filter request, then
+    the correlation matrix of the numeric columns (all of them unless
+    columns is given) and density grids of chosen column pairs
+    """
+    method: str = 'pearson'  # pearson or spearman
+    pairs: List[Tuple[str, str]] = []  # (x, y) columns of each density grid
+    bins: int = 50  # density grid cells per axis
+
+
+class AggregateMeasure(BaseModel):
+    """One aggregated value per group: a function of a column (or a row count)"""
+    column: Optional[str] = None  # None with function 'count' counts rows
+    function: str = 'count'  # count, sum, mean, min, max, std, median
+    label: Optional[str] = None  # output column name (default '<column>_<function>')
+
+    def output_label(self) -> str:
+        if self.label:
+            return self.label
+        return self.function if self.column is None else f"{self.column}_{self.function}"
+
+
+class AggregateRequest(BaseModel):
+    """
+    Model for group-by aggregation requests
+    Rows are selected with the same predicates as /filter
+    """
+    dataset_id: Optional[str] = None  # defaults to the most recent upload
+    group_by: List[str] = []
+    measures: List[AggregateMeasure] = [AggregateMeasure()]
+    predicates: Optional[List[FilterPredicate]] = None
+    combine: str = 'and'
+    order_by: Optional[str] = None  # a group-by column or measure label (default: group keys)
+    descending: bool = False
+    limit: int = 1000
+
+
 class DataTypeResponse(BaseModel):
     """Response model for data type information"""
     file_type: str
@@ -58,6 +183,36 @@ class DataTypeResponse(BaseModel):
     column_types: Dict[str, str]
 
 
+# Wider datasets get a lazy profile (schema only) unless a full one is requested
+EAGER_PROFILE_MAX_COLUMNS = int(os.environ.get('EAGER_PROFILE_MAX_COLUMNS', 50))
+
+PROFILE_MODES = ('auto', 'full', 'lazy')
+
+# exact: sort/hash-based quantiles, distinct counts and top values
+# approx: mergeable sketches built during ingestion, with error bounds
+STATISTICS_MODES = ('exact', 'approx')
+
+# Values inspected per string column when inferring its type
+TYPE_SAMPLE_ROWS = 1000
+
+# Histogram bins per numeric column and size of the value sample sent with it
+HISTOGRAM_BINS = 20
+HISTOGRAM_SAMPLE_SIZE = int(os.environ.get('HISTOGRAM_SAMPLE_SIZE', 1000))
+
+# Largest page served by the raw column values endpoint
+MAX_VALUES_PAGE = 10_000
+
+# Largest page served by the row browsing endpoint
+MAX_ROWS_PAGE = int(os.environ.get('MAX_ROWS_PAGE', 10_000))
+
+# Most columns in one correlation matrix and most cells per density grid axis
+MAX_CORRELATION_COLUMNS = int(os.environ.get('MAX_CORRELATION_COLUMNS', 200))
+MAX_DENSITY_BINS = 256
+
+# Most groups returned by one aggregation
+MAX_AGGREGATE_GROUPS = int(os.environ.get('MAX_AGGREGATE_GROUPS', 10_000))
+
+
 # ============= FILE DETECTION AND PARSING =============
 
 def detect_file_type(filename: str) -> str:
@@ -67,7 +222,7 @@ def detect_file_type(filename: str) -> str:
         return 'csv'
     elif ext == '.tsv':
         return 'tsv'
-    elif ext == '.json':
+    elif ext in ['.json', '.ndjson', '.jsonl']:
         return 'json'
     elif ext in ['.txt', '.text']:
         return 'txt'
@@ -77,25 +232,19 @@ def detect_file_type(filename: str) -> str:
         raise ValueError(f"Unsupported file format: {ext}")
 
 
-def parse_csv_file(contents: bytes) -> pd.DataFrame:
+def parse_csv_file(contents: bytes, engine: Optional[str] = None) -> pd.DataFrame:
     """Parse CSV file"""
-    return pd.read_csv(io.StringIO(contents.decode('utf-8')))
+    return read_frame(contents, 'csv', engine)
 
 
-def parse_tsv_file(contents: bytes) -> pd.DataFrame:
+def parse_tsv_file(contents: bytes, engine: Optional[str] = None) -> pd.DataFrame:
     """Parse TSV file"""
-    return pd.read_csv(io.StringIO(contents.decode('utf-8')), sep='\t')
+    return read_frame(contents, 'tsv', engine)
 
 
-def parse_json_file(contents: bytes) -> pd.DataFrame:
-    """Parse JSON file"""
-    data = json.loads(contents.decode('utf-8'))
-    if isinstance(data, list):
-        return pd.DataFrame(data)
-    elif isinstance(data, dict):
-        return pd.DataFrame([data])
-    else:
-        raise ValueError("JSON must be an array of objects or a single object")
+def parse_json_file(contents: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse JSON file (an array of objects, a single object or NDJSON)"""
+    return read_frame(contents, 'json', engine)
 
 
 def parse_txt_file(contents: bytes) -> pd.DataFrame:
@@ -106,16 +255,63 @@ def parse_txt_file(contents: bytes) -> pd.DataFrame:
     return pd.DataFrame({'text': lines})
 
 
-def parse_xlsx_file(contents: bytes) -> pd.DataFrame:
+def parse_xlsx_file(contents: bytes, engine: Optional[str] = None) -> pd.DataFrame:
     """Parse XLSX file"""
-    return pd.read_excel(io.BytesIO(contents))
+    return read_frame(contents, 'xlsx', engine)
+
+
+def parse_spooled_file(path: str, file_type: str,
+                       sketches: Optional[Dict[str, ColumnSketch]] = None,
+                       engine: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, RunningStats]]:
+    """
+    Parse an upload that has been spooled to disk, with the parser engine
+    given or configured for its type (see parsers.py)
+    Files are read in chunks where the engine allows, accumulating running
+    statistics for numeric columns as they go
+    sketches: if given, filled with per-column sketches for approximate
+    statistics (chunk by chunk where the format is read in chunks)
+    Returns: (DataFrame, running statistics per numeric column)
+    """
+    return consume_chunks(sketch_chunks(iter_file_chunks(path, file_type, engine), sketches))
 
 
 # ============= DATA TYPE DETECTION =============
 
-def detect_column_types(df: pd.DataFrame) -> Dict[str, str]:
+def sample_column(series: pd.Series, sample_rows: int = TYPE_SAMPLE_ROWS) -> pd.Series:
+    """
+    Take up to sample_rows non-null values spread evenly across a column
+    Evenly spaced positions keep the sample deterministic and cover the
+    whole file rather than just its head
+    """
+    values = series.dropna() if len(series) <= sample_rows else series.iloc[
+        np.linspace(0, len(series) - 1, sample_rows).astype(np.int64)
+    ].dropna()
+    return values.iloc[:sample_rows]
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Convert values to datetime64, turning unparsable entries into NaT
+    The format is inferred from the first value; entries in other formats
+    (e.g. dd/mm/yyyy next to ISO dates) are parsed again one by one
+    """
+    with warnings.catch_warnings():
+        # Per-element dateutil fallback is expected for mixed formats
+        warnings.simplefilter('ignore', UserWarning)
+        parsed = pd.to_datetime(values, errors='coerce')
+        failed = parsed.isna().to_numpy() & values.notna().to_numpy()
+        if failed.any() and pd.api.types.is_datetime64_any_dtype(parsed):
+            retried = pd.to_datetime(values[failed], errors='coerce', format='mixed')
+            if retried.dtype == parsed.dtype:
+                parsed[failed] = retried.to_numpy()
+        return parsed
+
+
+def detect_column_types(df: pd.DataFrame, sample_rows: int = TYPE_SAMPLE_ROWS) -> Dict[str, str]:
     """
     Detect whether columns are numeric, categorical, temporal, or text
+    String columns are classified from a bounded sample of their values,
+    so the cost does not grow with the number of rows
     Returns: dict mapping column names to type strings
     """
     column_types = {}
@@ -128,15 +324,15 @@ def detect_column_types(df: pd.DataFrame) -> Dict[str, str]:
             column_types[col] = 'temporal'
         # Check if might be temporal (string that looks like date)
         elif df[col].dtype == 'object':
-            sample = df[col].dropna().iloc[0] if len(df[col].dropna()) > 0 else None
-            if sample:
+            sample = sample_column(df[col], sample_rows)
+            if len(sample) > 0:
                 try:
-                    pd.to_datetime(df[col], errors='coerce')
-                    if df[col].notna().sum() > len(df[col]) * 0.8:  # >80% valid dates
+                    parsed = parse_dates(sample)
+                    if parsed.notna().sum() > len(sample) * 0.8:  # >80% valid dates
                         column_types[col] = 'temporal'
                     else:
                         column_types[col] = 'categorical'
-                except:
+                except (TypeError, ValueError, OverflowError):
                     column_types[col] = 'categorical'
             else:
                 column_types[col] = 'categorical'
@@ -145,39 +341,52 @@ def detect_column_types(df: pd.DataFrame) -> Dict[str, str]:
     return column_types
 
 
+def convert_temporal_columns(df: pd.DataFrame, column_types: Dict[str, str]) -> pd.DataFrame:
+    """
+    Convert string columns detected as temporal to datetime64 once at ingest,
+    so statistics and charts never reparse them
+    """
+    for col, col_type in column_types.items():
+        if col_type == 'temporal' and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            try:
+                parsed = parse_dates(df[col])
+            except (TypeError, ValueError, OverflowError):
+                continue
+            if pd.api.types.is_datetime64_any_dtype(parsed):
+                df[col] = parsed
+    return df
+
+
 # ============= STATISTICS COMPUTATION =============
 
-def calculate_statistics(df: pd.DataFrame, column_types: Dict[str, str]) -> Dict[str, Any]:
+def calculate_statistics(df: pd.DataFrame, column_types: Dict[str, str],
+                         running_stats: Optional[Dict[str, RunningStats]] = None,
+                         sketches: Optional[Dict[str, ColumnSketch]] = None) -> Dict[str, Any]:
     """
     Calculate comprehensive statistics for all column types
+    Numeric columns are reduced together in batched 2-D blocks and
+    categorical columns in one factorize pass each
+    running_stats: moments already accumulated during chunked ingestion;
+    numeric columns found here only need their quantiles computed
+    sketches: approximate mode; numeric and categorical columns with a
+    sketch covering every row are reported from it (with error bounds)
+    without touching their values
     """
-    stats = {}
+    sketched = {col: sketch for col, col_type in column_types.items()
+                if (sketch := usable_sketch(sketches, col, col_type, len(df))) is not None}
+    numeric_columns = [col for col, col_type in column_types.items()
+                       if col_type == 'numeric' and col not in sketched]
+    numeric_stats = numeric_statistics(df, numeric_columns, running_stats)
     
+    stats = {}
     for col, col_type in column_types.items():
-        if col_type == 'numeric':
-            col_data = df[col].dropna()
-            if len(col_data) > 0:
-                stats[col] = {
-                    'type': 'numeric',
-                    'mean': float(col_data.mean()),
-                    'median': float(col_data.median()),
-                    'std': float(col_data.std()),
-                    'min': float(col_data.min()),
-                    'max': float(col_data.max()),
-                    'q25': float(col_data.quantile(0.25)),
-                    'q75': float(col_data.quantile(0.75)),
-                    'count': int(col_data.count()),
-                    'missing': int(df[col].isna().sum())
-                }
-            else:
-                stats[col] = {
-                    'type': 'numeric',
-                    'mean': 0, 'median': 0, 'std': 0,
-                    'min': 0, 'max': 0, 'q25': 0, 'q75': 0,
-                    'count': 0, 'missing': len(df)
-                }
+        if col in sketched:
+            stats[col] = approximate_statistics(sketched[col], top_n=20) or empty_numeric_stats(len(df))
+        elif col_type == 'numeric':
+            stats[col] = numeric_stats[col]
         elif col_type == 'temporal':
-            col_data = pd.to_datetime(df[col], errors='coerce').dropna()
+            col_data = df[col] if pd.api.types.is_datetime64_any_dtype(df[col]) else parse_dates(df[col])
+            col_data = col_data.dropna()
             if len(col_data) > 0:
                 stats[col] = {
                     'type': 'temporal',
@@ -192,38 +401,21 @@ def calculate_statistics(df: pd.DataFrame, column_types: Dict[str, str]) -> Dict
                     'count': 0, 'missing': len(df)
                 }
         else:  # categorical
-            value_counts = df[col].value_counts().head(20)
-            stats[col] = {
-                'type': 'categorical',
-                'unique_values': int(df[col].nunique()),
-                'top_values': {str(k): int(v) for k, v in value_counts.items()},
-                'count': int(df[col].notna().sum()),
-                'missing': int(df[col].isna().sum())
-            }
+            stats[col] = categorical_statistics(df[col], top_n=20)
     
     return stats
 
 
 # ============= TEXT PROCESSING =============
 
-# Common English stop words
-STOP_WORDS = {
-    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
-    'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that',
-    'the', 'to', 'was', 'will', 'with', 'this', 'but', 'they', 'have',
-    'i', 'you', 'we', 'me', 'him', 'her', 'them', 'what', 'which',
-    'who', 'when', 'where', 'why', 'how', 'all', 'each', 'every'
-}
-
-
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
     # Convert to lowercase
     text = text.lower()
     # Remove URLs
-    text = re.sub(r'http\S+|www\S+', '', text)
+    text = re.sub(URL_PATTERN, '', text)
     # Remove special characters but keep spaces
-    text = re.sub(r'[^a-z0-9\s]', '', text)
+    text = re.sub(SPECIAL_CHARS_PATTERN, '', text)
     # Remove extra spaces
     text = ' '.join(text.split())
     return text
@@ -237,59 +429,88 @@ def tokenize_and_clean(text: str) -> List[str]:
 
 
 def compute_word_frequencies(df: pd.DataFrame, text_column: str = 'text', top_n: int = 50) -> Dict[str, int]:
-    """Compute word frequencies from text data"""
-    all_tokens = []
-    for text in df[text_column].dropna():
-        tokens = tokenize_and_clean(str(text))
-        all_tokens.extend(tokens)
-    
-    word_counts = Counter(all_tokens)
-    return dict(word_counts.most_common(top_n))
+    """
+    Compute word frequencies from text data
+    Tokenizes the whole column in batched regex passes; datasets
+    with a TextIndex use TextIndex.word_frequencies instead
+    """
+    _, codes, vocab = word_tokens(df[text_column])
+    counts = np.bincount(codes, minlength=len(vocab)) * countable_words(vocab)
+    return top_counts(counts, vocab, top_n)
 
 
 # ============= CHART DATA PREPARATION =============
 
-def get_chart_data(df: pd.DataFrame, column_types: Dict[str, str]) -> Dict[str, Any]:
+def sample_values(values: np.ndarray, sample_size: int, seed: int = 0) -> np.ndarray:
     """
-    Prepare data for charts
-    Returns: dict with chart data for each column
+    Bounded uniform random sample of an array, kept in original order
+    Deterministic for a given seed so cached and fresh responses agree
     """
-    chart_data = {}
+    if sample_size <= 0:
+        return values[:0]
+    if len(values) <= sample_size:
+        return values
+    positions = np.random.default_rng(seed).choice(len(values), size=sample_size, replace=False)
+    return values[np.sort(positions)]
+
+
+def histogram_chart(values: np.ndarray, sample_size: int = HISTOGRAM_SAMPLE_SIZE) -> Dict[str, Any]:
+    """
+    Server-side binned histogram of a numeric column
+    Only bin edges, counts and a bounded sample are returned, so the
+    payload size does not depend on the number of rows
+    """
+    if len(values) == 0:
+        return {'type': 'histogram', 'data': {'labels': [], 'values': [], 'bin_edges': [], 'sample': []}}
+    # Hash-based distinct count (np.unique would sort the whole column)
+    num_bins = min(HISTOGRAM_BINS, int(pd.Series(values).nunique()))
+    hist, bins = np.histogram(values, bins=num_bins)
+    return {
+        'type': 'histogram',
+        'data': {
+            'labels': [f"{bins[i]:.2f}-{bins[i+1]:.2f}" for i in range(len(bins)-1)],
+            'values': [int(v) for v in hist.tolist()],
+            'bin_edges': bins.tolist(),
+            'sample': sample_values(values, sample_size).tolist()
+        }
+    }
+
+
+def column_timestamps(df: pd.DataFrame, col: str,
+                      indexes: Optional[Dict[str, ColumnIndex]] = None) -> np.ndarray:
+    """
+    Sorted non-missing timestamps of a temporal column, from the dataset's
+    column index when one is given (sorted once, reused by later requests)
+    """
+    if not pd.api.types.is_datetime64_any_dtype(df[col]):
+        return sorted_timestamps(parse_dates(df[col]))
+    if indexes is None:
+        return sorted_timestamps(df[col])
+    return get_column_index(indexes, df, col).timestamps
+
+
+def get_chart_data(df: pd.DataFrame, column_types: Dict[str, str],
+                   indexes: Optional[Dict[str, ColumnIndex]] = None) -> Dict[str, Any]:
     """
     Prepare data for different chart types based on column types
+    Temporal columns are resampled to a bounded number of points
+    indexes: the dataset's column indexes, when df is the whole dataset
+    Returns: dict with chart data for each column
     """
     chart_data = {}
     
     for col, col_type in column_types.items():
         if col_type == 'numeric':
             values = df[col].dropna().values
-            if len(values) > 0:
-                # Create histogram data
-                hist, bins = np.histogram(values, bins=min(20, len(np.unique(values))))
-                chart_data[col] = {
-                    'type': 'histogram',
-                    'data': {
-                        'labels': [f"{bins[i]:.2f}-{bins[i+1]:.2f}" for i in range(len(bins)-1)],
-                        'values': [int(v) for v in hist.tolist()],
-                        'raw_values': values.tolist()
-                    }
-                }
-            else:
-                chart_data[col] = {'type': 'histogram', 'data': {'labels': [], 'values': [], 'raw_values': []}}
+            chart_data[col] = histogram_chart(values)
                 
         elif col_type == 'temporal':
-            df_sorted = df.sort_values(col)
-            date_counts = df_sorted[col].value_counts().sort_index()
-            chart_data[col] = {
-                'type': 'line',
-                'data': {
-                    'labels': [str(d) for d in date_counts.index],
-                    'values': date_counts.values.tolist()
-                }
-            }
+            chart_data[col] = temporal_chart(column_timestamps(df, col, indexes))
             
         else:  # categorical
-            value_counts = df[col].value_counts().head(15)
+            value_counts = df[col].value_counts()
+            # Categorical dtypes also count categories absent from these rows
+            value_counts = value_counts[value_counts > 0].head(15)
             chart_data[col] = {
                 'type': 'bar',
                 'data': {
@@ -301,204 +522,1127 @@ def get_chart_data(df: pd.DataFrame, column_types: Dict[str, str]) -> Dict[str,
     return chart_data
 
 
+# ============= RESPONSE PROFILES =============
+
+def build_profile(df: pd.DataFrame, file_type: str, column_types: Dict[str, str],
+                  running_stats: Optional[Dict[str, RunningStats]] = None,
+                  text_index: Optional[TextIndex] = None,
+                  sketches: Optional[Dict[str, ColumnSketch]] = None,
+                  indexes: Optional[Dict[str, ColumnIndex]] = None) -> Dict[str, Any]:
+    """
+    Full analysis of a dataset as returned by /upload and /reset
+    (everything except the per-dataset header fields)
+    """
+    # Calculate statistics and chart data
+    statistics, chart_data = {}, {}
+    for col, col_stats, col_chart in profile_columns(df, column_types, running_stats, sketches, indexes):
+        statistics[col] = col_stats
+        chart_data[col] = col_chart
+    
+    # Get word frequencies if text data
+    word_frequencies = profile_word_frequencies(df, file_type, text_index)
+    
+    return assemble_profile(df, column_types, statistics, chart_data, word_frequencies)
+
+
+def profile_columns(df: pd.DataFrame, column_types: Dict[str, str],
+                    running_stats: Optional[Dict[str, RunningStats]] = None,
+                    sketches: Optional[Dict[str, ColumnSketch]] = None,
+                    indexes: Optional[Dict[str, ColumnIndex]] = None) -> Iterator[Tuple[str, Dict, Dict]]:
+    """
+    Statistics and chart data one column at a time, in column order
+    Numeric columns are still reduced together, in one batched pass up front
+    Yields: (column, statistics, chart data)
+    """
+    numeric_types = {col: col_type for col, col_type in column_types.items() if col_type == 'numeric'}
+    with stage('statistics', rows=len(df) if numeric_types else None):
+        numeric_stats = calculate_statistics(df, numeric_types, running_stats, sketches) if numeric_types else {}
+    for col, col_type in column_types.items():
+        single = {col: col_type}
+        if col_type == 'numeric':
+            col_stats = numeric_stats[col]
+        else:
+            with stage('statistics', rows=len(df)):
+                col_stats = calculate_statistics(df, single, running_stats, sketches)[col]
+        with stage('charts', rows=len(df)):
+            col_chart = get_chart_data(df, single, indexes)[col]
+        yield col, col_stats, col_chart
+
+
+def profile_word_frequencies(df: pd.DataFrame, file_type: str,
+                             text_index: Optional[TextIndex] = None) -> Optional[Dict[str, int]]:
+    """Most frequent words of a text dataset (None for other datasets)"""
+    if text_index is None and (file_type != 'txt' or 'text' not in df.columns):
+        return None
+    with stage('word_frequencies', rows=len(df)):
+        if text_index is not None:
+            return text_index.word_frequencies()
+        return compute_word_frequencies(df, 'text')
+
+
+def assemble_profile(df: pd.DataFrame, column_types: Dict[str, str], statistics: Dict[str, Any],
+                     chart_data: Dict[str, Any], word_frequencies: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    """Full profile payload from its computed parts"""
+    # Sample rows stay a DataFrame; the response encoder picks the layout
+    sample_data = df.head(10)
+    
+    return {
+        'profile': 'full',
+        'num_rows': len(df),
+        'num_columns': len(df.columns),
+        'column_names': df.columns.tolist(),
+        'column_types': column_types,
+        'statistics': statistics,
+        'chart_data': chart_data,
+        'word_frequencies': word_frequencies,
+        'sample_data': sample_data
+    }
+
+
+def build_aggregate_profile(entry: DatasetEntry, aggregates: DatasetAggregates) -> Dict[str, Any]:
+    """
+    Full profile read from incrementally maintained aggregates, as returned
+    by /append (numeric quartiles are approximate, everything else exact)
+    Appended batches are not concatenated for it
+    """
+    return {
+        'profile': 'full',
+        'num_rows': entry.num_rows,
+        'num_columns': len(entry.frame.columns),
+        'column_names': entry.frame.columns.tolist(),
+        'column_types': entry.column_types,
+        'statistics': aggregates.statistics(),
+        'chart_data': aggregates.chart_data(),
+        'word_frequencies': aggregates.word_frequencies(),
+        'sample_data': entry.head(10)
+    }
+
+
+def build_schema(df: pd.DataFrame, column_types: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Lazy profile: schema, row count and sample rows only
+    Statistics and chart data are computed per column by GET /column/{column}
+    """
+    return {
+        'profile': 'lazy',
+        'num_rows': len(df),
+        'num_columns': len(df.columns),
+        'column_names': df.columns.tolist(),
+        'column_types': column_types,
+        'statistics': {},
+        'chart_data': {},
+        'word_frequencies': None,
+        'sample_data': df.head(10)
+    }
+
+
+def build_column_profile(df: pd.DataFrame, column: str, column_type: str,
+                         indexes: Optional[Dict[str, ColumnIndex]] = None) -> Dict[str, Any]:
+    """Statistics and chart data of a single column"""
+    frame = df[[column]]
+    column_types = {column: column_type}
+    return {
+        'column': column,
+        'type': column_type,
+        'statistics': calculate_statistics(frame, column_types)[column],
+        'chart_data': get_chart_data(df, column_types, indexes)[column]
+    }
+
+
+def resolve_profile_mode(mode: str, num_columns: int) -> str:
+    """'full' or 'lazy' for a requested profile mode ('auto' decides by width)"""
+    if mode not in PROFILE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid profile mode. Allowed: {', '.join(PROFILE_MODES)}. Got: {mode}"
+        )
+    if mode == 'auto':
+        return 'lazy' if num_columns > EAGER_PROFILE_MAX_COLUMNS else 'full'
+    return mode
+
+
+def validate_statistics_mode(mode: str) -> str:
+    """Reject unknown statistics modes with a 400"""
+    if mode not in STATISTICS_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid statistics mode. Allowed: {', '.join(STATISTICS_MODES)}. Got: {mode}"
+        )
+    return mode
+
+
+def dataset_header(entry: DatasetEntry) -> Dict[str, Any]:
+    """Per-dataset fields that precede a cached profile in responses"""
+    return {
+        'dataset_id': entry.dataset_id,
+        'filename': entry.filename,
+        'file_type': entry.file_type,
+    }
+
+
+def serialize_payload(payload: Dict[str, Any], fmt: str = 'json') -> bytes:
+    """Encode a payload in the negotiated response format"""
+    with stage('encode') as counts:
+        body = encode_payload(payload, fmt)
+        counts['bytes_out'] = len(body)
+    return body
+
+
+def render_response(header: Dict[str, Any], body: bytes, cache_status: str, fmt: str = 'json') -> Response:
+    """
+    Prepend per-request fields to an already-serialized payload
+    without decoding it again
+    """
+    return Response(content=attach_header(header, body, fmt), media_type=FORMATS[fmt],
+                    headers={'X-Cache': cache_status, 'Vary': 'Accept'})
+
+
 # ============= API ENDPOINTS =============
 
+def get_dataset(dataset_id: Optional[str]) -> DatasetEntry:
+    """Resolve a dataset ID (or the most recent upload) or raise an HTTP error"""
+    entry = datasets.get(dataset_id)
+    if entry is None:
+        if dataset_id:
+            raise HTTPException(status_code=404, detail=f"Dataset not found: {dataset_id}")
+        raise HTTPException(status_code=400, detail="No dataset uploaded. Please upload a file first.")
+    if not entry.column_types:
+        entry.column_types = detect_column_types(entry.df)
+    return entry
+
+
+def get_sketches(entry: DatasetEntry) -> Dict[str, ColumnSketch]:
+    """
+    Approximate-statistics sketches of a dataset: those built during
+    ingestion, or built once from the loaded frame and kept with it
+    """
+    if not entry.sketches:
+        columns = [col for col, col_type in entry.column_types.items() if col_type != 'temporal']
+        entry.sketches = sketch_frame(entry.df[columns])
+        datasets.store_sketches(entry)
+    return entry.sketches
+
+
+def get_aggregates(entry: DatasetEntry) -> DatasetAggregates:
+    """
+    The incremental aggregates of a dataset, built from its current rows
+    the first time rows are appended and updated batch by batch afterwards
+    """
+    if entry.aggregates is None:
+        text_column = 'text' if entry.file_type == 'txt' and 'text' in entry.df.columns else None
+        aggregates = DatasetAggregates(entry.column_types, text_column, HISTOGRAM_BINS, HISTOGRAM_SAMPLE_SIZE)
+        aggregates.update(entry.df)
+        entry.aggregates = aggregates
+    return entry.aggregates
+
+
+def get_text_index(entry: DatasetEntry) -> Optional[TextIndex]:
+    """
+    The token index of a text dataset, built once on first use and kept
+    with the dataset's other column indexes; None for non-text datasets
+    """
+    if entry.file_type != 'txt' or 'text' not in entry.df.columns:
+        return None
+    index = entry.indexes.get('text')
+    if not isinstance(index, TextIndex):
+        index = TextIndex(entry.df['text'])
+        entry.indexes['text'] = index
+    return index
+
+
 @app.get("/")
-def read_root():
+async def read_root():
     """Health check endpoint"""
     return {"status": "ok", "message": "Interactive Data Visualization API is running"}
 
 
-@app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+def ingest_upload(spool_path: str, filename: str, file_type: str, content_hash: Optional[str] = None,
+                  stats: str = 'exact') -> Tuple[DatasetEntry, Optional[Dict[str, RunningStats]]]:
     """
-    Upload and process a file (CSV, JSON, TXT, XLSX, TSV)
-    Returns file information, statistics, and chart data
+    Parse a spooled upload and register it
+    A file uploaded before (same content_hash) is memory-mapped from the
+    upload cache instead of being parsed again
+    stats='approx' builds per-column sketches while parsing
+    Returns: (entry, running moments accumulated while parsing, if any)
     """
-    global current_dataset, current_filename, file_metadata
-    
-    try:
-        # Detect file type
-        file_type = detect_file_type(file.filename)
-        
-        # Read and parse file
-        contents = await file.read()
-        
-        if file_type == 'csv':
-            df = parse_csv_file(contents)
-        elif file_type == 'tsv':
-            df = parse_tsv_file(contents)
-        elif file_type == 'json':
-            df = parse_json_file(contents)
-        elif file_type == 'txt':
-            df = parse_txt_file(contents)
-        elif file_type == 'xlsx':
-            df = parse_xlsx_file(contents)
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+    sketches = {} if stats == 'approx' else None
+    with stage('cache_load'):
+        cached = upload_cache.load(content_hash, file_type) if content_hash else None
+    if cached is not None:
+        df, meta = cached
+        column_types = meta['column_types']
+        fingerprint = meta.get('fingerprint')
+        memory = meta.get('memory', {})
+        running_stats = None
+    else:
+        with stage('parse', bytes_in=os.path.getsize(spool_path)) as counts:
+            df, running_stats = parse_spooled_file(spool_path, file_type, sketches)
+            counts['rows'] = len(df)
         
         # Validate data
         if df.empty:
             raise ValueError("Uploaded file is empty")
         
-        # Store dataset globally
-        current_dataset = df
-        current_filename = file.filename
-        file_metadata = {'type': file_type, 'rows': len(df), 'columns': len(df.columns)}
+        # Infer the schema once and parse temporal columns up front
+        with stage('detect_types', rows=len(df)):
+            column_types = detect_column_types(df)
+        with stage('convert_temporal', rows=len(df)):
+            df = convert_temporal_columns(df, column_types)
         
-        # Get basic information
-        num_rows, num_columns = df.shape
-        column_names = df.columns.tolist()
+        # Downcast numbers and store strings compactly before the dataset is held
+        with stage('compact', rows=len(df)):
+            df, memory = compact_frame(df, column_types)
+        fingerprint = None
+    
+    # Register the dataset together with its schema
+    with stage('register', rows=len(df)):
+        entry = datasets.add(df, filename, file_type, column_types, fingerprint)
+        entry.memory = memory
+        if cached is None and content_hash:
+            upload_cache.save(content_hash, file_type, df, column_types, entry.fingerprint, memory)
+    if sketches:
+        entry.sketches = sketches
+        datasets.store_sketches(entry)
+    return entry, running_stats
+
+
+def upload_profile_key(entry: DatasetEntry, fmt: str, stats: str) -> str:
+    """Cache key of an uploaded dataset's full profile"""
+    return make_cache_key(entry.fingerprint, 'profile',
+                          {'file_type': entry.file_type, 'format': fmt, 'stats': stats})
+
+
+def process_upload(spool_path: str, filename: str, file_type: str, fmt: str = 'json',
+                   content_hash: Optional[str] = None, profile: str = 'auto',
+                   stats: str = 'exact') -> Tuple[DatasetEntry, bytes, str]:
+    """
+    Parse a spooled upload, register it and compute its profile
+    Runs in the analytics pool; returns (entry, serialized profile, cache status)
+    """
+    entry, running_stats = ingest_upload(spool_path, filename, file_type, content_hash, stats)
+    df, column_types = entry.df, entry.column_types
+    
+    # Wide datasets only return their schema; columns are profiled on demand
+    if resolve_profile_mode(profile, len(df.columns)) == 'lazy':
+        return entry, serialize_payload(build_schema(df, column_types), fmt), 'MISS'
+    
+    # Compute the full profile once; /reset is then served from the cache
+    cache_key = upload_profile_key(entry, fmt, stats)
+    body = profile_cache.get(cache_key)
+    if body is not None:
+        return entry, body, 'HIT'
+    # Reuse moments accumulated while parsing and tokenize text once
+    body = serialize_payload(build_profile(df, file_type, column_types, running_stats,
+                                           get_text_index(entry),
+                                           get_sketches(entry) if stats == 'approx' else None,
+                                           entry.indexes), fmt)
+    profile_cache.put(cache_key, body)
+    return entry, body, 'MISS'
+
+
+def stream_upload(channel: EventChannel, spool_path: str, filename: str, file_type: str,
+                  content_hash: Optional[str] = None, profile: str = 'auto', stats: str = 'exact') -> None:
+    """
+    Parse, register and profile a spooled upload, emitting each stage as
+    soon as it is ready: 'schema' (header, memory report, row count and
+    column types), 'sample' (sample rows), then for full profiles one
+    'column' event per column and 'words' (word frequencies)
+    The assembled profile is cached as for a JSON /upload
+    Runs in the analytics pool
+    """
+    try:
+        entry, running_stats = ingest_upload(spool_path, filename, file_type, content_hash, stats)
+        df, column_types = entry.df, entry.column_types
+        mode = resolve_profile_mode(profile, len(df.columns))
+        channel.emit('schema', {
+            **dataset_header(entry),
+            'memory': entry.memory,
+            'profile': mode,
+            'num_rows': len(df),
+            'num_columns': len(df.columns),
+            'column_names': df.columns.tolist(),
+            'column_types': column_types,
+        })
+        channel.emit('sample', {'sample_data': df.head(10)})
+        if mode == 'lazy':
+            return
         
-        # Detect column types
-        column_types = detect_column_types(df)
+        # A profile computed before is replayed stage by stage
+        cache_key = upload_profile_key(entry, 'json', stats)
+        body = profile_cache.get(cache_key)
+        if body is not None:
+            cached = json.loads(body)
+            for col, col_stats in cached['statistics'].items():
+                channel.emit('column', {'column': col, 'type': cached['column_types'][col],
+                                        'statistics': col_stats, 'chart_data': cached['chart_data'][col]})
+            channel.emit('words', {'word_frequencies': cached['word_frequencies']})
+            return
         
-        # Calculate statistics
-        statistics = calculate_statistics(df, column_types)
+        statistics, chart_data = {}, {}
+        sketches = get_sketches(entry) if stats == 'approx' else None
+        for col, col_stats, col_chart in profile_columns(df, column_types, running_stats, sketches, entry.indexes):
+            statistics[col] = col_stats
+            chart_data[col] = col_chart
+            channel.emit('column', {'column': col, 'type': column_types[col],
+                                    'statistics': col_stats, 'chart_data': col_chart})
+        word_frequencies = profile_word_frequencies(df, file_type, get_text_index(entry))
+        channel.emit('words', {'word_frequencies': word_frequencies})
+        profile_cache.put(cache_key, serialize_payload(
+            assemble_profile(df, column_types, statistics, chart_data, word_frequencies), 'json'))
+    except (HTTPException, StreamClosed):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+
+
+def conform_batch(batch: pd.DataFrame, entry: DatasetEntry) -> pd.DataFrame:
+    """
+    Check that appended rows have the dataset's columns and convert them to
+    the dataset's schema (column order, temporal and numeric columns, and
+    compact dtypes)
+    """
+    # The rows before any pending batches carry the schema; nothing is concatenated here
+    frame = entry.frame
+    missing = [str(col) for col in frame.columns if col not in batch.columns]
+    unexpected = [str(col) for col in batch.columns if col not in frame.columns]
+    if missing or unexpected:
+        raise ValueError(f"Appended rows must have the dataset's columns "
+                         f"(missing: {missing}, unexpected: {unexpected})")
+    batch = batch[list(frame.columns)].copy()
+    for col, col_type in entry.column_types.items():
+        if col_type == 'temporal' and not pd.api.types.is_datetime64_any_dtype(batch[col]):
+            batch[col] = parse_dates(batch[col])
+        elif col_type == 'numeric' and not pd.api.types.is_numeric_dtype(batch[col]):
+            try:
+                batch[col] = pd.to_numeric(batch[col])
+            except (TypeError, ValueError):
+                raise ValueError(f"Column '{col}' is numeric but appended values are not")
+    return match_dtypes(batch, frame)
+
+
+def process_append(entry: DatasetEntry, spool_path: str, file_type: str, fmt: str = 'json') -> bytes:
+    """
+    Append a spooled batch of rows to a dataset and profile the result
+    Aggregates, sketches, the fingerprint and the stored copy are updated
+    from the batch alone, and the rows are only concatenated on the next
+    read of entry.df, so the cost grows with the batch rather than the
+    dataset. Still O(rows): the first append builds the aggregates from
+    every row, the next query concatenates the pending batches and
+    rebuilds the column indexes it uses, and temporal charts walk every
+    distinct timestamp
+    Runs in the analytics pool; returns the serialized profile
+    """
+    with stage('parse', bytes_in=os.path.getsize(spool_path)) as counts:
+        batch, _ = parse_spooled_file(spool_path, file_type)
+        counts['rows'] = len(batch)
+    if batch.empty:
+        raise ValueError("Appended file is empty")
+    batch = conform_batch(batch, entry)
+    
+    # One append at a time per dataset, so no batch is folded in twice or lost
+    with entry.lock:
+        aggregates = get_aggregates(entry)
+        aggregates.update(batch)
+        if entry.sketches:
+            try:
+                for col, sketch in sketch_frame(batch[list(entry.sketches)]).items():
+                    entry.sketches[col].merge(sketch)
+            except ValueError:
+                # A column changed kind; rebuild the sketches on the next approximate profile
+                entry.sketches = {}
+        previous_fingerprint = entry.fingerprint
+        datasets.append(entry, batch)
+        # Responses cached for the rows before the append are only dropped
+        # once no other dataset (e.g. the same file uploaded again) shares them
+        if not datasets.fingerprint_in_use(previous_fingerprint):
+            profile_cache.invalidate(previous_fingerprint)
+        return serialize_payload(build_aggregate_profile(entry, aggregates), fmt)
+
+
+def compute_filter(entry: DatasetEntry, filter_request: FilterRequest, cache_key: str, fmt: str = 'json') -> bytes:
+    """
+    Apply a filter request and serialize the resulting profile
+    Runs in the analytics pool
+    """
+    # Evaluate predicates as masks over the dataset's column indexes,
+    # then materialize only the selected rows
+    text_index = get_text_index(entry)
+    with stage('select', rows=len(entry.df)):
+        positions = select_rows(entry.df, filter_request.all_predicates(),
+                                filter_request.combine.lower(), entry.indexes)
+        df = take_rows(entry.df, positions)
+    
+    if df.empty:
+        response = {
+            'num_rows': 0,
+            'statistics': {},
+            'chart_data': {},
+            'sample_data': df
+        }
+    else:
+        # Reuse the schema inferred at upload, restricted to the requested columns
+        column_types = entry.column_types
+        if filter_request.columns is not None:
+            wanted = set(filter_request.columns)
+            column_types = {col: col_type for col, col_type in column_types.items() if col in wanted}
         
-        # Get chart data
-        chart_data = get_chart_data(df, column_types)
+        # Calculate updated statistics
+        with stage('statistics', rows=len(df)):
+            statistics = calculate_statistics(df, column_types)
         
-        # Get word frequencies if text data
-        word_frequencies = None
-        if file_type == 'txt' and 'text' in df.columns:
-            word_frequencies = compute_word_frequencies(df, 'text')
+        # Get updated chart data
+        with stage('charts', rows=len(df)):
+            chart_data = get_chart_data(df, column_types)
         
         # Get sample data
-        sample_data = df.head(10).to_dict(orient='records')
+        sample_data = df.head(10)
         
-        # Prepare response
         response = {
-            'filename': file.filename,
-            'file_type': file_type,
-            'num_rows': num_rows,
-            'num_columns': num_columns,
-            'column_names': column_names,
-            'column_types': column_types,
+            'num_rows': len(df),
             'statistics': statistics,
             'chart_data': chart_data,
-            'word_frequencies': word_frequencies,
             'sample_data': sample_data
         }
+    
+    # Word frequencies of the selected rows come straight from the token index
+    if text_index is not None:
+        with stage('word_frequencies', rows=len(df)):
+            response['word_frequencies'] = text_index.word_frequencies(positions) if len(df) else {}
+    
+    body = serialize_payload(response, fmt)
+    profile_cache.put(cache_key, body)
+    return body
+
+
+def validate_rows_request(entry: DatasetEntry, request: RowsRequest) -> None:
+    """Reject unknown columns, bad page bounds and bad cursors with a 400"""
+    columns = list(request.columns or []) + [p.column for p in request.all_predicates()]
+    if request.sort_by is not None:
+        columns.append(request.sort_by)
+    for col in columns:
+        if col not in entry.df.columns:
+            raise HTTPException(status_code=400, detail=f"Unknown column: {col}")
+    if request.offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    if not 1 <= request.limit <= MAX_ROWS_PAGE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_ROWS_PAGE}")
+    if request.after is not None and not 0 <= request.after < len(entry.df):
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {request.after}")
+
+
+def compute_rows(entry: DatasetEntry, request: RowsRequest, cache_key: str, fmt: str = 'json') -> bytes:
+    """
+    Select, sort and page rows; the first page sorted by a column builds
+    its sort order, later pages reuse it
+    Runs in the analytics pool
+    """
+    df = entry.df
+    with stage('select', rows=len(df)):
+        mask = select_mask(df, request.all_predicates(), request.combine.lower(), entry.indexes)
+    index = None if request.sort_by is None else get_column_index(entry.indexes, df, request.sort_by)
+    with stage('page', rows=len(df)):
+        positions, more = row_page(df, mask, index, request.descending,
+                                   request.offset, request.limit, request.after)
+    columns = list(df.columns) if request.columns is None else request.columns
+    
+    response = {
+        'num_rows': len(df) if mask is None else int(np.count_nonzero(mask)),
+        'columns': columns,
+        'sort_by': request.sort_by,
+        'descending': request.descending,
+        'offset': request.offset,
+        'limit': request.limit,
+        'row_ids': positions.tolist(),
+        'next_cursor': int(positions[-1]) if more else None,
+        # Take the page's rows first: projecting first would copy whole columns
+        'rows': df.take(positions)[columns]
+    }
+    with stage('encode') as counts:
+        body = encode_payload(response, fmt, table_key='rows')
+        counts['bytes_out'] = len(body)
+    profile_cache.put(cache_key, body)
+    return body
+
+
+def correlation_columns(entry: DatasetEntry, request: CorrelationRequest) -> List[str]:
+    """The columns to correlate; rejects unknown and non-numeric columns and bad options with a 400"""
+    if request.method not in CORRELATION_METHODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid correlation method. Allowed: {', '.join(CORRELATION_METHODS)}. Got: {request.method}"
+        )
+    numeric = [col for col, col_type in entry.column_types.items() if col_type == 'numeric']
+    columns = numeric if request.columns is None else request.columns
+    for col in [p.column for p in request.all_predicates()]:
+        if col not in entry.df.columns:
+            raise HTTPException(status_code=400, detail=f"Unknown column: {col}")
+    for col in list(columns) + [col for pair in request.pairs for col in pair]:
+        if col not in entry.df.columns:
+            raise HTTPException(status_code=400, detail=f"Unknown column: {col}")
+        if entry.column_types.get(col) != 'numeric':
+            raise HTTPException(status_code=400, detail=f"Column is not numeric: {col}")
+    if len(columns) > MAX_CORRELATION_COLUMNS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {MAX_CORRELATION_COLUMNS} columns can be correlated at once")
+    if not 2 <= request.bins <= MAX_DENSITY_BINS:
+        raise HTTPException(status_code=400, detail=f"bins must be between 2 and {MAX_DENSITY_BINS}")
+    return columns
+
+
+def compute_correlation(entry: DatasetEntry, request: CorrelationRequest, columns: List[str],
+                        cache_key: str, fmt: str = 'json') -> bytes:
+    """
+    Select rows with the request's filter, then correlate the columns and
+    grid the pairs over them
+    Runs in the analytics pool
+    """
+    with stage('select', rows=len(entry.df)):
+        positions = select_rows(entry.df, request.all_predicates(), request.combine.lower(), entry.indexes)
+    num_rows = len(entry.df) if positions is None else len(positions)
+    with stage('correlation', rows=num_rows):
+        result = correlate(entry.df, entry.indexes, positions, columns, request.method,
+                           request.pairs, request.bins)
+    
+    response = {
+        'num_rows': num_rows,
+        'method': request.method,
+        'columns': columns,
+        **result
+    }
+    body = serialize_payload(response, fmt)
+    profile_cache.put(cache_key, body)
+    return body
+
+
+def validate_aggregate_request(entry: DatasetEntry, request: AggregateRequest) -> None:
+    """Reject unknown columns, unsupported functions and bad ordering with a 400"""
+    for col in request.group_by + [p.column for p in request.predicates or []]:
+        if col not in entry.df.columns:
+            raise HTTPException(status_code=400, detail=f"Unknown column: {col}")
+    if not request.measures:
+        raise HTTPException(status_code=400, detail="At least one measure is required")
+    for measure in request.measures:
+        if measure.function not in AGGREGATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid aggregation. Allowed: {', '.join(AGGREGATIONS)}. Got: {measure.function}"
+            )
+        if measure.column is None:
+            if measure.function != 'count':
+                raise HTTPException(status_code=400, detail=f"'{measure.function}' needs a column")
+        elif measure.column not in entry.df.columns:
+            raise HTTPException(status_code=400, detail=f"Unknown column: {measure.column}")
+        elif measure.function != 'count' and entry.column_types.get(measure.column) != 'numeric':
+            raise HTTPException(status_code=400,
+                                detail=f"'{measure.function}' needs a numeric column: {measure.column}")
+    labels = request.group_by + [measure.output_label() for measure in request.measures]
+    if len(set(labels)) != len(labels):
+        raise HTTPException(status_code=400, detail="Group-by columns and measure labels must be unique")
+    if request.order_by is not None and request.order_by not in labels:
+        raise HTTPException(status_code=400, detail=f"Cannot order by {request.order_by}: not in the result")
+    if not 1 <= request.limit <= MAX_AGGREGATE_GROUPS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_AGGREGATE_GROUPS}")
+
+
+def compute_aggregate(entry: DatasetEntry, request: AggregateRequest, cache_key: str, fmt: str = 'json') -> bytes:
+    """
+    Select rows with the request's predicates, group them and compute the measures
+    Runs in the analytics pool
+    """
+    positions = select_rows(entry.df, request.predicates or [], request.combine.lower(), entry.indexes)
+    measures = [(measure.column, measure.function, measure.output_label()) for measure in request.measures]
+    groups = aggregate(entry.df, entry.indexes, positions, request.group_by, measures)
+    if request.order_by is not None:
+        groups = groups.sort_values(request.order_by, ascending=not request.descending,
+                                    kind='stable', na_position='last', ignore_index=True)
+    elif request.descending:
+        groups = groups.iloc[::-1].reset_index(drop=True)
+    
+    response = {
+        'num_rows': len(entry.df) if positions is None else len(positions),
+        'num_groups': len(groups),
+        'group_by': request.group_by,
+        'measures': [label for _, _, label in measures],
+        'groups': groups.head(request.limit)
+    }
+    body = encode_payload(response, fmt, table_key='groups')
+    profile_cache.put(cache_key, body)
+    return body
+
+
+def compute_column_profile(entry: DatasetEntry, column: str, cache_key: str) -> bytes:
+    """
+    Profile one column and memoize it for the dataset's content
+    Runs in the analytics pool
+    """
+    body = serialize_payload(build_column_profile(entry.df, column, entry.column_types[column], entry.indexes))
+    profile_cache.put(cache_key, body)
+    return body
+
+
+def parse_window_bound(value: Optional[str], name: str) -> Optional[np.datetime64]:
+    """Parse a time window bound (ISO 8601; zone-aware values are converted to UTC)"""
+    if not value:
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_datetime64().astype('datetime64[ns]')
+
+
+def compute_timeseries(entry: DatasetEntry, column: str, granularity: str,
+                       start: Optional[np.datetime64], end: Optional[np.datetime64],
+                       points: int, cache_key: str, fmt: str = 'json') -> bytes:
+    """
+    Resample a temporal column over an optional time window and cache the result
+    Served from the column's sorted timestamps (built once per dataset)
+    Runs in the analytics pool
+    """
+    timestamps = column_timestamps(entry.df, column, entry.indexes)
+    granularity, edges, counts = resample(timestamps, granularity, start, end, points)
+    payload = {
+        'column': column,
+        'granularity': granularity,
+        'start': str(pd.Timestamp(edges[0])) if len(counts) else None,
+        'end': str(pd.Timestamp(edges[-1])) if len(counts) else None,
+        'total': int(counts.sum()),
+    }
+    if fmt == 'arrow':
+        payload['series'] = pd.DataFrame({'bucket': edges[:-1], 'count': counts})
+    else:
+        payload['labels'] = bucket_labels(edges)
+        payload['values'] = counts.tolist()
+    body = encode_payload(payload, fmt, table_key='series')
+    profile_cache.put(cache_key, body)
+    return body
+
+
+def compute_profile(entry: DatasetEntry, cache_key: str, fmt: str = 'json', stats: str = 'exact') -> bytes:
+    """
+    Recompute and cache the full profile of a dataset
+    Runs in the analytics pool
+    """
+    body = serialize_payload(build_profile(entry.df, entry.file_type, entry.column_types,
+                                           text_index=get_text_index(entry),
+                                           sketches=get_sketches(entry) if stats == 'approx' else None,
+                                           indexes=entry.indexes), fmt)
+    profile_cache.put(cache_key, body)
+    return body
+
+
+@app.post("/upload")
+async def upload_file(
+    file: UploadFile = File(...),
+    profile: str = Query('auto', description="full, lazy (schema only) or auto (lazy for wide datasets)"),
+    stats: str = Query('exact', description="exact, or approx (sketch-based, with error bounds)"),
+    stream: Optional[str] = Query(None, description="ndjson or sse: send each stage as soon as it is ready"),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Upload and process a file (CSV, JSON, TXT, XLSX, TSV)
+    Returns file information, statistics, and chart data
+    (schema only for lazy profiles; see GET /column/{column})
+    """
+    fmt = negotiate_format(accept)
+    resolve_profile_mode(profile, 0)  # reject unknown modes before reading the upload
+    validate_statistics_mode(stats)
+    if stream is not None and stream not in STREAM_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid stream mode. Allowed: {', '.join(STREAM_MODES)}. Got: {stream}"
+        )
+    if stream is not None:
+        return await stream_upload_response(file, stream, profile, stats)
+    try:
+        # Detect file type
+        file_type = detect_file_type(file.filename)
+        
+        # Spool the upload to disk in chunks, then parse and profile it
+        # in the analytics pool so the event loop stays responsive
+        digest = hashlib.sha256()
+        with stage('spool') as counts:
+            spool_path, counts['bytes_in'] = await spool_upload(file, digest=digest)
+        try:
+            entry, body, cache_status = await analytics_pool.run(
+                process_upload, spool_path, file.filename, file_type, fmt, digest.hexdigest(), profile, stats
+            )
+        finally:
+            discard_spool(spool_path)
         
-        return response
+        # Ingest report: memory per column before and after compaction
+        header = {**dataset_header(entry), 'memory': entry.memory}
+        return render_response(header, body, cache_status, fmt)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
 
+async def stream_upload_response(file: UploadFile, stream: str, profile: str, stats: str) -> StreamingResponse:
+    """
+    /upload as a stream of stage events (NDJSON lines or Server-Sent Events)
+    The upload is spooled and admitted to the analytics pool first, so bad
+    file types and a saturated pool still fail with an HTTP status; later
+    errors arrive as an 'error' event
+    """
+    try:
+        file_type = detect_file_type(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    digest = hashlib.sha256()
+    with stage('spool') as counts:
+        spool_path, counts['bytes_in'] = await spool_upload(file, digest=digest)
+    channel = EventChannel(stream)
+    try:
+        job = analytics_pool.start(stream_upload, channel, spool_path, file.filename, file_type,
+                                   digest.hexdigest(), profile, stats)
+    except BaseException:
+        discard_spool(spool_path)
+        raise
+    job.add_done_callback(lambda _: discard_spool(spool_path))
+    return StreamingResponse(channel.events(job), media_type=STREAM_MODES[stream], headers=STREAM_HEADERS)
+
+
+@app.post("/append")
+async def append_rows(
+    file: UploadFile = File(...),
+    dataset_id: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Append the rows of a file (any supported format) to an existing dataset
+    Returns the updated statistics and chart data, computed incrementally
+    """
+    entry = get_dataset(dataset_id)
+    fmt = negotiate_format(accept)
+    try:
+        file_type = detect_file_type(file.filename)
+        with stage('spool') as counts:
+            spool_path, counts['bytes_in'] = await spool_upload(file)
+        try:
+            body = await analytics_pool.run(process_append, entry, spool_path, file_type, fmt)
+        finally:
+            discard_spool(spool_path)
+        
+        return render_response(dataset_header(entry), body, 'MISS', fmt)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error appending file: {str(e)}")
+
+
 @app.post("/filter")
-async def filter_data(filter_request: FilterRequest):
+async def filter_data(filter_request: FilterRequest, accept: Optional[str] = Header(None)):
     """
     Filter the current dataset based on specified criteria
     Returns updated statistics and chart data
     """
-    global current_dataset
+    entry = get_dataset(filter_request.dataset_id)
+    fmt = negotiate_format(accept)
     
-    if current_dataset is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded. Please upload a file first.")
+    # Identical filters on the same data are served from the cache
+    spec = filter_request.model_dump(exclude={'dataset_id'})
+    spec['format'] = fmt
+    cache_key = make_cache_key(entry.fingerprint, 'filter', spec)
+    body = profile_cache.get(cache_key)
+    if body is not None:
+        return render_response({'dataset_id': entry.dataset_id}, body, 'HIT', fmt)
     
     try:
-        df = current_dataset.copy()
-        
-        # Apply filter based on type
-        if filter_request.filter_type == 'range':
-            if filter_request.min_value is not None:
-                df = df[df[filter_request.column] >= filter_request.min_value]
-            if filter_request.max_value is not None:
-                df = df[df[filter_request.column] <= filter_request.max_value]
-                
-        elif filter_request.filter_type == 'category':
-            if filter_request.categories:
-                df = df[df[filter_request.column].isin(filter_request.categories)]
-        
-        elif filter_request.filter_type == 'search':
-            if filter_request.search_query:
-                mask = df[filter_request.column].astype(str).str.contains(
-                    filter_request.search_query, case=False, na=False
-                )
-                df = df[mask]
-        
-        if df.empty:
-            return {
-                'num_rows': 0,
-                'statistics': {},
-                'chart_data': {},
-                'sample_data': []
-            }
-        
-        # Get column types
-        column_types = detect_column_types(df)
+        body = await analytics_pool.run(compute_filter, entry, filter_request, cache_key, fmt)
+        return render_response({'dataset_id': entry.dataset_id}, body, 'MISS', fmt)
         
-        # Calculate updated statistics
-        statistics = calculate_statistics(df, column_types)
-        
-        # Get updated chart data
-        chart_data = get_chart_data(df, column_types)
-        
-        # Get sample data
-        sample_data = df.head(10).to_dict(orient='records')
+    except HTTPException:
+        raise
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Error filtering data: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error filtering data: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error filtering data: {str(e)}")
+
+
+@app.post("/rows")
+async def browse_rows(request: RowsRequest, accept: Optional[str] = Header(None)):
+    """
+    A page of rows (optionally filtered) for a data grid, in row order or
+    sorted by any column, with offset or keyset (after=next_cursor) paging
+    """
+    entry = get_dataset(request.dataset_id)
+    validate_rows_request(entry, request)
+    fmt = negotiate_format(accept)
+    
+    spec = request.model_dump(exclude={'dataset_id'})
+    spec['format'] = fmt
+    cache_key = make_cache_key(entry.fingerprint, 'rows', spec)
+    body = profile_cache.get(cache_key)
+    if body is not None:
+        return render_response({'dataset_id': entry.dataset_id}, body, 'HIT', fmt)
+    
+    try:
+        body = await analytics_pool.run(compute_rows, entry, request, cache_key, fmt)
+        return render_response({'dataset_id': entry.dataset_id}, body, 'MISS', fmt)
         
-        response = {
-            'num_rows': len(df),
-            'statistics': statistics,
-            'chart_data': chart_data,
-            'sample_data': sample_data
-        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error reading rows: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading rows: {str(e)}")
+
+
+@app.post("/correlation")
+async def correlation_data(request: CorrelationRequest, accept: Optional[str] = Header(None)):
+    """
+    Pearson or Spearman correlation matrix of numeric columns and 2-D
+    density grids (heatmaps) of column pairs, over the filtered rows
+    """
+    entry = get_dataset(request.dataset_id)
+    columns = correlation_columns(entry, request)
+    fmt = negotiate_format(accept)
+    
+    spec = request.model_dump(exclude={'dataset_id'})
+    spec['format'] = fmt
+    cache_key = make_cache_key(entry.fingerprint, 'correlation', spec)
+    body = profile_cache.get(cache_key)
+    if body is not None:
+        return render_response({'dataset_id': entry.dataset_id}, body, 'HIT', fmt)
+    
+    try:
+        body = await analytics_pool.run(compute_correlation, entry, request, columns, cache_key, fmt)
+        return render_response({'dataset_id': entry.dataset_id}, body, 'MISS', fmt)
         
-        return response
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error correlating data: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error correlating data: {str(e)}")
+
+
+@app.post("/aggregate")
+async def aggregate_data(request: AggregateRequest, accept: Optional[str] = Header(None)):
+    """
+    Group rows (optionally filtered) by columns and aggregate measures per group
+    e.g. mean salary by department, for charts that combine columns
+    """
+    entry = get_dataset(request.dataset_id)
+    validate_aggregate_request(entry, request)
+    fmt = negotiate_format(accept)
+    
+    spec = request.model_dump(exclude={'dataset_id'})
+    spec['format'] = fmt
+    cache_key = make_cache_key(entry.fingerprint, 'aggregate', spec)
+    body = profile_cache.get(cache_key)
+    if body is not None:
+        return render_response({'dataset_id': entry.dataset_id}, body, 'HIT', fmt)
+    
+    try:
+        body = await analytics_pool.run(compute_aggregate, entry, request, cache_key, fmt)
+        return render_response({'dataset_id': entry.dataset_id}, body, 'MISS', fmt)
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error aggregating data: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error filtering data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error aggregating data: {str(e)}")
 
 
 @app.delete("/reset")
-async def reset_data():
+async def reset_data(dataset_id: Optional[str] = Query(None, description="Dataset to reset (defaults to the most recent upload)"),
+                     profile: str = Query('auto', description="full, lazy (schema only) or auto (lazy for wide datasets)"),
+                     stats: str = Query('exact', description="exact, or approx (sketch-based, with error bounds)"),
+                     accept: Optional[str] = Header(None)):
     """
     Reset to original uploaded dataset
     """
-    global current_dataset, current_filename
+    entry = get_dataset(dataset_id)
+    fmt = negotiate_format(accept)
+    validate_statistics_mode(stats)
     
-    if current_dataset is None:
-        raise HTTPException(status_code=400, detail="No dataset to reset")
+    if resolve_profile_mode(profile, len(entry.df.columns)) == 'lazy':
+        body = serialize_payload(build_schema(entry.df, entry.column_types), fmt)
+        return render_response(dataset_header(entry), body, 'MISS', fmt)
     
     try:
-        # Get column types
-        column_types = detect_column_types(current_dataset)
-        
-        # Calculate statistics
-        statistics = calculate_statistics(current_dataset, column_types)
-        
-        # Get chart data
-        chart_data = get_chart_data(current_dataset, column_types)
-        
-        # Get word frequencies if text data
-        word_frequencies = None
-        if file_metadata and file_metadata['type'] == 'txt' and 'text' in current_dataset.columns:
-            word_frequencies = compute_word_frequencies(current_dataset, 'text')
-        
-        # Get sample data
-        sample_data = current_dataset.head(10).to_dict(orient='records')
+        cache_key = upload_profile_key(entry, fmt, stats)
+        body = profile_cache.get(cache_key)
+        cache_status = 'HIT'
+        if body is None:
+            cache_status = 'MISS'
+            body = await analytics_pool.run(compute_profile, entry, cache_key, fmt, stats)
         
-        response = {
-            'filename': current_filename,
-            'file_type': file_metadata['type'] if file_metadata else 'unknown',
-            'num_rows': len(current_dataset),
-            'num_columns': len(current_dataset.columns),
-            'column_names': current_dataset.columns.tolist(),
-            'column_types': column_types,
-            'statistics': statistics,
-            'chart_data': chart_data,
-            'word_frequencies': word_frequencies,
-            'sample_data': sample_data
-        }
-        
-        return response
+        return render_response(dataset_header(entry), body, cache_status, fmt)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error resetting data: {str(e)}")
 
 
+@app.get("/column/{column}")
+async def get_column_profile(
+    column: str,
+    dataset_id: Optional[str] = Query(None, description="Dataset to read (defaults to the most recent upload)"),
+):
+    """
+    Statistics and chart data of a single column, computed on first request
+    and memoized for the dataset (lazy profiles return schema only)
+    """
+    entry = get_dataset(dataset_id)
+    if column not in entry.df.columns:
+        raise HTTPException(status_code=404, detail=f"Column not found: {column}")
+    
+    cache_key = make_cache_key(entry.fingerprint, 'column', {'column': column})
+    body = profile_cache.get(cache_key)
+    if body is not None:
+        return render_response({'dataset_id': entry.dataset_id}, body, 'HIT')
+    
+    try:
+        body = await analytics_pool.run(compute_column_profile, entry, column, cache_key)
+        return render_response({'dataset_id': entry.dataset_id}, body, 'MISS')
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error profiling column: {str(e)}")
+
+
+@app.get("/column/{column}/values")
+def get_column_values(
+    column: str,
+    dataset_id: Optional[str] = Query(None, description="Dataset to read (defaults to the most recent upload)"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=MAX_VALUES_PAGE),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Page through the raw non-missing values of a column, in row order
+    Charts only carry binned data; this serves raw values on demand
+    """
+    entry = get_dataset(dataset_id)
+    if column not in entry.df.columns:
+        raise HTTPException(status_code=404, detail=f"Column not found: {column}")
+    fmt = negotiate_format(accept)
+    
+    series = entry.df[column]
+    values = series.dropna() if series.hasnans else series
+    page = values.iloc[offset:offset + limit]
+    
+    header = {
+        'dataset_id': entry.dataset_id,
+        'column': column,
+        'offset': offset,
+        'limit': limit,
+        'total': len(values),
+    }
+    if fmt == 'arrow':
+        table = to_arrow_table(page.to_frame(name=column))
+        return Response(content=arrow_stream(table, {'header': dumps(header)}), media_type=FORMATS[fmt])
+    if fmt == 'columnar':
+        return Response(content=dumps({**header, 'values': column_values(page)}), media_type=FORMATS[fmt])
+    return {**header, 'values': jsonable_encoder(page.tolist())}
+
+
+@app.get("/column/{column}/timeseries")
+async def get_column_timeseries(
+    column: str,
+    dataset_id: Optional[str] = Query(None, description="Dataset to read (defaults to the most recent upload)"),
+    granularity: str = Query('auto', description="auto, second, minute, hour, day, week, month or year"),
+    start: Optional[str] = Query(None, description="Window start (inclusive), e.g. 2024-01-01T00:00"),
+    end: Optional[str] = Query(None, description="Window end (inclusive)"),
+    points: int = Query(TEMPORAL_CHART_POINTS, ge=1, le=MAX_TEMPORAL_POINTS,
+                        description="Target number of points for granularity=auto"),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Event counts of a temporal column per time bucket, for zooming into
+    a time window or switching granularity without re-uploading
+    """
+    entry = get_dataset(dataset_id)
+    if column not in entry.df.columns:
+        raise HTTPException(status_code=404, detail=f"Column not found: {column}")
+    if entry.column_types.get(column) != 'temporal':
+        raise HTTPException(status_code=400, detail=f"Column is not temporal: {column}")
+    if granularity != 'auto' and granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid granularity. Allowed: auto, {', '.join(GRANULARITIES)}. Got: {granularity}"
+        )
+    window_start = parse_window_bound(start, 'start')
+    window_end = parse_window_bound(end, 'end')
+    fmt = negotiate_format(accept)
+    
+    spec = {'column': column, 'granularity': granularity, 'start': start, 'end': end,
+            'points': points, 'format': fmt}
+    cache_key = make_cache_key(entry.fingerprint, 'timeseries', spec)
+    body = profile_cache.get(cache_key)
+    cache_status = 'HIT'
+    if body is None:
+        cache_status = 'MISS'
+        try:
+            body = await analytics_pool.run(compute_timeseries, entry, column, granularity,
+                                            window_start, window_end, points, cache_key, fmt)
+        except ValueError as e:
+            # Too many buckets for the requested granularity
+            raise HTTPException(status_code=400, detail=str(e))
+    return render_response({'dataset_id': entry.dataset_id}, body, cache_status, fmt)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and occupancy of the profile and upload caches"""
+    return {**profile_cache.stats(), 'upload_cache': upload_cache.stats()}
+
+
+def resource_metrics():
+    """Scrape-time gauges: worker pools, caches and held datasets"""
+    for pool in (analytics_pool, image_pool):
+        stats = pool.stats()
+        labels = {'pool': pool.name}
+        yield 'dataviz_pool_pending', 'gauge', 'Jobs running or queued per worker pool', labels, stats['pending']
+        yield 'dataviz_pool_completed_total', 'counter', 'Jobs finished per worker pool', labels, stats['completed']
+        yield 'dataviz_pool_rejected_total', 'counter', 'Jobs rejected with 503 per worker pool', labels, stats['rejected']
+    stats = profile_cache.stats()
+    for field in ('hits', 'misses', 'evictions'):
+        yield f'dataviz_profile_cache_{field}_total', 'counter', f'Profile cache {field}', {}, stats[field]
+    yield 'dataviz_profile_cache_bytes', 'gauge', 'Bytes held by the profile cache', {}, stats['size_bytes']
+    stats = upload_cache.stats()
+    for field in ('hits', 'misses'):
+        yield f'dataviz_upload_cache_{field}_total', 'counter', f'Upload cache {field}', {}, stats[field]
+    yield 'dataviz_datasets', 'gauge', 'Datasets held in memory', {}, len(datasets.list())
+    yield 'dataviz_dataset_bytes', 'gauge', 'Memory held by datasets', {}, datasets.total_bytes
+
+
+metrics_registry.add_collector(resource_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request, stage, pool and cache metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics_registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+@app.get("/datasets")
+def list_datasets():
+    """List the datasets currently held in memory, most recent first"""
+    return {'datasets': datasets.list()}
+
+
+@app.delete("/datasets/{dataset_id}")
+def delete_dataset(dataset_id: str):
+    """Remove a dataset from memory and from the shared store"""
+    if not datasets.remove(dataset_id):
+        raise HTTPException(status_code=404, detail=f"Dataset not found: {dataset_id}")
+    return {'status': 'deleted', 'dataset_id': dataset_id}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,334 @@
+"""
+Metrics Module
+Per-request stage instrumentation (duration, rows, bytes in/out and, when
+enabled, peak traced allocation of each stage), aggregated for a
+Prometheus-style /metrics endpoint and reported per request in a
+Server-Timing header, with sampled cProfile dumps of slow requests
+"""
+
+import cProfile
+import contextvars
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Share of requests run under cProfile (0 disables profiling); a sampled
+# request's profile is written only when it takes at least PROFILE_SLOW_MS
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 1000))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'dataviz-profiles'))
+
+# Peak Python/NumPy allocation per stage via tracemalloc; off by default
+# since tracing slows every allocation down
+TRACE_ALLOCATIONS = os.environ.get('METRICS_TRACE_ALLOCATIONS', '0') == '1'
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_MEDIA_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+# ============= REGISTRY =============
+
+class MetricsRegistry:
+    """
+    Counters, max-gauges and histograms keyed by metric name and labels,
+    rendered in the Prometheus text exposition format
+    Collectors add gauges computed at scrape time (pool and cache occupancy)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._collectors: List[Callable[[], Iterator[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_max(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """Gauge holding the largest value seen"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = max(series.get(key, 0.0), value)
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """Add an observation to a histogram: per-bucket counts, then sum and count"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0.0] * (len(DURATION_BUCKETS) + 2)
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def add_collector(self, collector: Callable[[], Iterator[Tuple[str, str, str, Dict[str, str], float]]]) -> None:
+        """collector() yields (name, kind, help, labels, value) samples when metrics are scraped"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            values = {name: dict(series) for name, series in self._values.items()}
+            histograms = {name: {key: list(state) for key, state in series.items()}
+                          for name, series in self._histograms.items()}
+        for name, series in sorted(values.items()):
+            header(name, *self._help.get(name, ('untyped', name)))
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        for name, series in sorted(histograms.items()):
+            header(name, *self._help.get(name, ('histogram', name)))
+            for key, state in sorted(series.items()):
+                # Buckets are cumulative already: each observation counts in every bucket it fits
+                for bound, count in zip(DURATION_BUCKETS, state):
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', repr(bound)),))} {_format_value(count)}")
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {_format_value(state[-1])}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+                lines.append(f"{name}_count{_format_labels(key)} {_format_value(state[-1])}")
+        described = set()
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                if name not in described:
+                    header(name, kind, help_text)
+                    described.add(name)
+                lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+registry.describe('dataviz_requests_total', 'counter', 'HTTP requests by endpoint, method and status')
+registry.describe('dataviz_request_duration_seconds', 'histogram',
+                  'Time until the response headers were sent (time to first byte for streams)')
+registry.describe('dataviz_stage_duration_seconds', 'histogram', 'Time spent in each request stage')
+registry.describe('dataviz_stage_rows_total', 'counter', 'Rows processed by each request stage')
+registry.describe('dataviz_stage_bytes_in_total', 'counter', 'Bytes read by each request stage')
+registry.describe('dataviz_stage_bytes_out_total', 'counter', 'Bytes produced by each request stage')
+registry.describe('dataviz_stage_peak_alloc_bytes', 'gauge',
+                  'Largest traced allocation peak of each stage (METRICS_TRACE_ALLOCATIONS=1)')
+registry.describe('dataviz_profiles_written_total', 'counter', 'cProfile dumps written for sampled slow requests')
+
+
+# ============= REQUEST TRACES =============
+
+class RequestTrace:
+    """
+    Stages of one request, filled in by stage() from the event loop or any
+    worker thread running in the request's context
+    Stages entered more than once (e.g. per column) accumulate
+    """
+
+    def __init__(self, sampled: bool = False):
+        self.endpoint = 'unmatched'
+        self.started = time.perf_counter()
+        self.sampled = sampled
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, rows: Optional[int], bytes_in: Optional[int],
+               bytes_out: Optional[int], peak_alloc: Optional[int]) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(name, {'seconds': 0.0})
+            totals['seconds'] += seconds
+            # A stage repeated per column covers the same rows, while bytes add up
+            if rows is not None:
+                totals['rows'] = max(totals.get('rows', 0), rows)
+            for field, value in (('bytes_in', bytes_in), ('bytes_out', bytes_out)):
+                if value is not None:
+                    totals[field] = totals.get(field, 0) + value
+            if peak_alloc is not None:
+                totals['peak_alloc'] = max(totals.get('peak_alloc', 0), peak_alloc)
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self.profiles.append(profile)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: each stage so far and the total, in milliseconds"""
+        with self._lock:
+            parts = [f"{_metric_token(name)};dur={totals['seconds'] * 1000:.1f}" for name, totals in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ', '.join(parts)
+
+    def publish(self) -> None:
+        """Add the request's stages to the registry"""
+        with self._lock:
+            stages = {name: dict(totals) for name, totals in self.stages.items()}
+        for name, totals in stages.items():
+            labels = {'endpoint': self.endpoint, 'stage': name}
+            registry.observe('dataviz_stage_duration_seconds', labels, totals['seconds'])
+            for field in ('rows', 'bytes_in', 'bytes_out'):
+                if field in totals:
+                    registry.inc(f'dataviz_stage_{field}_total', labels, totals[field])
+            if 'peak_alloc' in totals:
+                registry.set_max('dataviz_stage_peak_alloc_bytes', labels, totals['peak_alloc'])
+
+    def dump_profile(self, elapsed: float) -> Optional[str]:
+        """Write the merged worker profiles of a sampled slow request; returns the file path"""
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles or elapsed * 1000 < PROFILE_SLOW_MS:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', self.endpoint).strip('-') or 'root'
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{int(elapsed * 1000)}ms.prof")
+        stats.dump_stats(path)
+        registry.inc('dataviz_profiles_written_total', {'endpoint': self.endpoint})
+        logger.warning("Slow request to %s took %.0f ms; profile written to %s", self.endpoint, elapsed * 1000, path)
+        return path
+
+
+def _metric_token(name: str) -> str:
+    """Server-Timing metric names are HTTP tokens"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar('request_trace', default=None)
+
+if TRACE_ALLOCATIONS and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None, bytes_in: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block as a stage of the current request (nothing is recorded
+    outside a request). Counts known only at the end are set on the yielded
+    dict: with stage('encode') as counts: ...; counts['bytes_out'] = len(body)
+    Allocation peaks are process-wide, so concurrent requests inflate them
+    """
+    counts: Dict[str, Any] = {'rows': rows, 'bytes_in': bytes_in, 'bytes_out': None}
+    trace = _current_trace.get()
+    if trace is None:
+        yield counts
+        return
+    if TRACE_ALLOCATIONS:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield counts
+    finally:
+        peak_alloc = tracemalloc.get_traced_memory()[1] - baseline if TRACE_ALLOCATIONS else None
+        trace.record(name, time.perf_counter() - start, counts['rows'], counts['bytes_in'],
+                     counts['bytes_out'], peak_alloc)
+
+
+def in_request_context(func: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Wrap a job for a worker thread so its stages count toward the submitting
+    request, and run it under cProfile when the request was sampled
+    """
+    context = contextvars.copy_context()
+    trace = context.get(_current_trace)
+    if trace is None or not trace.sampled:
+        return lambda: context.run(func)
+
+    def profiled() -> Any:
+        profile = cProfile.Profile()
+        try:
+            return context.run(profile.runcall, func)
+        finally:
+            trace.add_profile(profile)
+    return profiled
+
+
+# ============= ASGI MIDDLEWARE =============
+
+def _route_template(scope) -> str:
+    """Path template of the matched route (e.g. /column/{column}), so labels stay few"""
+    route = scope.get('route')
+    template = getattr(route, 'path', None)
+    if template is None:
+        return 'unmatched'
+    path, regex = scope.get('path', ''), getattr(route, 'path_regex', None)
+    if regex is not None and not regex.match(path):
+        # Routes of included routers carry their path without the router's prefix
+        for i in range(1, len(path)):
+            if path[i] == '/' and regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Traces every HTTP request: stages recorded while it runs go into its
+    Server-Timing header and, once the response is complete, into the
+    registry under the matched route's path template
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace(sampled=PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+        token = _current_trace.set(trace)
+        status = {'code': 500, 'headers_sent': None}
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                status['headers_sent'] = time.perf_counter() - trace.started
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', trace.server_timing().encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            trace.endpoint = _route_template(scope)
+            labels = {'endpoint': trace.endpoint, 'method': scope['method']}
+            elapsed = status['headers_sent'] if status['headers_sent'] is not None else time.perf_counter() - trace.started
+            registry.inc('dataviz_requests_total', {**labels, 'status': str(status['code'])})
+            registry.observe('dataviz_request_duration_seconds', labels, elapsed)
+            trace.publish()
+            if trace.sampled:
+                trace.dump_profile(time.perf_counter() - trace.started)
@@ -0,0 +1,87 @@
+"""
+Pagination Module
+Serves pages of a dataset's rows, optionally filtered and sorted, from the
+cached per-column sort orders: a page is sliced (or scanned chunk by chunk
+for filtered rows) out of the permutation instead of re-sorting the frame
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence, Tuple, Union
+
+from filter_engine import ColumnIndex
+
+# Row positions checked against the filter mask per step of a page scan
+SCAN_CHUNK = 65_536
+
+# Row positions in order: a view of a sort permutation, or a range for row order
+Segment = Union[np.ndarray, range]
+
+
+def _positions(segment: Segment, lo: int, hi: int) -> np.ndarray:
+    """segment[lo:hi] as an array (ranges are only materialized one slice at a time)"""
+    part = segment[lo:hi]
+    if isinstance(part, range):
+        return np.arange(part.start, part.stop, part.step, dtype=np.int64)
+    return part
+
+
+def page_positions(segments: Sequence[Segment], mask: Optional[np.ndarray],
+                   start: int, skip: int, limit: int) -> Tuple[np.ndarray, bool]:
+    """
+    Row positions of one page
+
+    segments: the row order, as consecutive arrays of row positions
+    mask: rows passing the filter (None = every row)
+    start: position in the row order to begin at (keyset pagination)
+    skip: matching rows to pass over first (offset pagination)
+    Returns: the positions and whether more matching rows follow
+    """
+    if mask is None:
+        start, skip = start + skip, 0
+    found: List[np.ndarray] = []
+    wanted = limit + 1  # one extra row tells whether another page exists
+    for segment in segments:
+        if start >= len(segment):
+            start -= len(segment)
+            continue
+        if mask is None:
+            taken = _positions(segment, start, start + wanted)
+            found.append(taken)
+            wanted -= len(taken)
+        else:
+            for lo in range(start, len(segment), SCAN_CHUNK):
+                chunk = _positions(segment, lo, lo + SCAN_CHUNK)
+                hits = chunk[mask[chunk]]
+                if skip:
+                    # Offset rows are counted, never collected
+                    dropped = min(skip, len(hits))
+                    hits, skip = hits[dropped:], skip - dropped
+                hits = hits[:wanted]
+                found.append(hits)
+                wanted -= len(hits)
+                if wanted == 0:
+                    break
+        start = 0
+        if wanted == 0:
+            break
+    positions = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+    return positions[:limit], len(positions) > limit
+
+
+def row_page(df: pd.DataFrame, mask: Optional[np.ndarray], index: Optional[ColumnIndex],
+             descending: bool, offset: int, limit: int,
+             after: Optional[int] = None) -> Tuple[np.ndarray, bool]:
+    """
+    One page of row positions in row order, or in the order of a column's
+    index; after (a row position, the previous page's last row) resumes
+    right behind that row instead of counting offset rows from the start
+    """
+    if index is None:
+        # Row order, read backwards for descending
+        segments = [range(len(df) - 1, -1, -1) if descending else range(len(df))]
+        start = 0 if after is None else (len(df) - after if descending else after + 1)
+    else:
+        segments = index.sort_order(descending)
+        start = 0 if after is None else index.sort_position(after, descending) + 1
+    return page_positions(segments, mask, start, offset, limit)
@@ -0,0 +1,519 @@
+"""
+Parsers Module
+Pluggable parsing engines per file type. Every engine reads a spooled
+upload (a path or a binary file object) and yields DataFrame chunks, so
+ingestion (running statistics, sketches, compaction) works the same
+whichever engine parsed the file
+
+- csv/tsv: pandas' C engine in row chunks, or pyarrow's streaming reader
+- json: json.loads of the whole document, or a streaming reader of JSON
+  arrays and NDJSON that hands blocks of records to orjson
+- xlsx: pandas.read_excel, openpyxl read-only row streaming, or calamine
+"""
+
+import pandas as pd
+import numpy as np
+import io
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from ingestion import PARSE_CHUNK_ROWS, iter_delimited_chunks, iter_text_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+try:
+    import python_calamine  # noqa: F401  (used through pandas' calamine engine)
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+# Bytes of CSV/TSV parsed per chunk by the pyarrow engine
+CSV_BLOCK_BYTES = int(os.environ.get('INGEST_CSV_BLOCK_BYTES', 16 * 1024 * 1024))
+
+# Bytes of a JSON array scanned per step of the streaming reader
+JSON_BLOCK_BYTES = int(os.environ.get('INGEST_JSON_BLOCK_BYTES', 4 * 1024 * 1024))
+
+Source = Union[str, BinaryIO]
+
+
+# ============= ENGINE SELECTION =============
+
+# Engines per file type, in order of preference for 'auto'
+ENGINES: Dict[str, Tuple[str, ...]] = {
+    'csv': ('pandas', 'pyarrow'),
+    'json': ('stream', 'stdlib'),
+    'xlsx': ('calamine', 'openpyxl', 'pandas'),
+}
+
+# TSV files share the CSV engines
+ENGINE_FAMILY = {'csv': 'csv', 'tsv': 'csv', 'json': 'json', 'xlsx': 'xlsx'}
+
+# Environment variable selecting the engine of each family (default: auto)
+ENGINE_SETTINGS = {'csv': 'CSV_PARSER', 'json': 'JSON_PARSER', 'xlsx': 'XLSX_PARSER'}
+
+
+def engine_available(family: str, engine: str) -> bool:
+    if engine == 'pyarrow':
+        return PYARROW_AVAILABLE
+    if engine == 'calamine':
+        return CALAMINE_AVAILABLE
+    if engine == 'openpyxl':
+        return OPENPYXL_AVAILABLE
+    return engine in ENGINES[family]
+
+
+def available_engines(file_type: str) -> List[str]:
+    """Engines installed for a file type, most preferred first"""
+    family = ENGINE_FAMILY.get(file_type)
+    if family is None:
+        return []
+    return [engine for engine in ENGINES[family] if engine_available(family, engine)]
+
+
+def resolve_engine(file_type: str, engine: Optional[str] = None) -> Optional[str]:
+    """
+    The engine to parse a file type with: the one given, else the one
+    configured by <FAMILY>_PARSER, else the most preferred installed one
+    None for file types without a choice of engine (txt)
+    """
+    family = ENGINE_FAMILY.get(file_type)
+    if family is None:
+        return None
+    engine = (engine or os.environ.get(ENGINE_SETTINGS[family], 'auto')).lower()
+    if engine == 'auto':
+        return available_engines(file_type)[0]
+    if engine not in ENGINES[family]:
+        raise ValueError(f"Unknown {family} parser: {engine}. Allowed: auto, {', '.join(ENGINES[family])}")
+    if not engine_available(family, engine):
+        raise ValueError(f"The {engine} parser is not installed")
+    return engine
+
+
+@contextmanager
+def open_source(source: Source) -> Iterator[BinaryIO]:
+    """A binary handle on a path (closed afterwards) or on an already open file object"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as handle:
+            yield handle
+    else:
+        yield source
+
+
+# ============= CSV / TSV =============
+
+def _arrow_frame(table: 'pa.Table') -> pd.DataFrame:
+    """
+    DataFrame of a table read by pyarrow, with the column types pandas' C
+    engine would give downstream code: inferred dates and timestamps become
+    datetime64[ns] (already temporal, nothing to reparse), times stay strings
+    """
+    for i, field in enumerate(table.schema):
+        target = None
+        if pa.types.is_date(field.type) or (pa.types.is_timestamp(field.type) and field.type.unit != 'ns'):
+            target = pa.timestamp('ns', tz=getattr(field.type, 'tz', None))
+        elif pa.types.is_time(field.type):
+            target = pa.string()
+        elif pa.types.is_null(field.type):
+            target = pa.float64()  # an empty column, NaN-filled like pandas
+        if target is not None:
+            try:
+                table = table.set_column(i, field.name, table.column(i).cast(target))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                pass  # out of the datetime64[ns] range: left as Python objects
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _header_names(values: Sequence[Any]) -> List[Any]:
+    """Column names from a header row, filled and de-duplicated as pandas does (a, a.1, ...)"""
+    header = [f"Unnamed: {i}" if name is None or name == '' else name for i, name in enumerate(values)]
+    names, counts = [], {}
+    for name in header:
+        base, count = name, counts.get(name, 0)
+        while count:
+            counts[base] = count + 1
+            name = f"{base}.{count}"
+            # Suffixes taken by other header names are skipped
+            count = count + 1 if name in header else counts.get(name, 0)
+        counts[name] = count + 1
+        names.append(name)
+    return names
+
+
+def _short_rows_table(rows: List[Tuple[int, str]], schema: 'pa.Schema', sep: str) -> 'pa.Table':
+    """Padded short rows, converted to the types of the other rows"""
+    names = [f"f{i}" for i in range(len(schema))]
+    table = pa_csv.read_csv(
+        io.BytesIO('\n'.join(text for _, text in rows).encode()),
+        read_options=pa_csv.ReadOptions(column_names=names),
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: field.type for name, field in zip(names, schema)},
+            strings_can_be_null=True,
+        ),
+    )
+    return table.rename_columns(schema.names)
+
+
+def iter_pyarrow_csv(source: Source, sep: str = ',', block_bytes: int = CSV_BLOCK_BYTES) -> Iterator[pd.DataFrame]:
+    """
+    Stream a delimited file through pyarrow's reader (parsing and type
+    conversion run on pyarrow's threads), one chunk per block_bytes
+
+    Read as pandas reads it: duplicate and empty header names are renamed
+    (a, a.1, Unnamed: 2) and short rows are padded with missing values.
+    Column types are inferred from the first block; a later value of
+    another type fails the parse (the pandas engine handles such files)
+    """
+    short_rows: List[Tuple[int, str]] = []
+
+    def pad_short_row(row) -> str:
+        # Short rows are padded and put back in place below; long ones are errors as in pandas
+        if row.actual_columns < row.expected_columns and row.number is not None:
+            short_rows.append((row.number, row.text + sep * (row.expected_columns - row.actual_columns)))
+            return 'skip'
+        return 'error'
+
+    with open_source(source) as handle:
+        reader = pa_csv.open_csv(
+            handle,
+            read_options=pa_csv.ReadOptions(block_size=block_bytes),
+            parse_options=pa_csv.ParseOptions(delimiter=sep, invalid_row_handler=pad_short_row),
+            # Empty quoted strings are missing values, as in pandas
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+        )
+        names = _header_names(reader.schema.names)
+        done = 0  # data rows yielded so far
+        for batch in reader:
+            table = pa.Table.from_batches([batch])
+            # Record numbers count the header as 1: a short row's data row is number - 2
+            short_rows.sort()
+            end, inserted = done + batch.num_rows, []
+            while short_rows and short_rows[0][0] - 2 < end:
+                inserted.append(short_rows.pop(0))
+                end += 1
+            if inserted:
+                at = np.array([number - 2 - done for number, _ in inserted])
+                order = np.empty(end - done, dtype=np.int64)
+                others = np.ones(end - done, dtype=bool)
+                others[at] = False
+                order[others] = np.arange(batch.num_rows)
+                order[at] = batch.num_rows + np.arange(len(at))
+                table = pa.concat_tables([table, _short_rows_table(inserted, table.schema, sep)]).take(order)
+            done = end
+            yield _arrow_frame(table.rename_columns(names))
+        if short_rows:
+            # Only short rows after the last block
+            yield _arrow_frame(_short_rows_table(short_rows, reader.schema, sep).rename_columns(names))
+
+
+def iter_csv_chunks(source: Source, sep: str, engine: str) -> Iterator[pd.DataFrame]:
+    if engine == 'pyarrow':
+        return iter_pyarrow_csv(source, sep)
+    return iter_delimited_chunks(source, sep=sep)
+
+
+# ============= JSON =============
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def _records_frame(data: Any) -> pd.DataFrame:
+    """DataFrame of a parsed JSON document: an array of records or a single object"""
+    if isinstance(data, list):
+        return pd.DataFrame(data)
+    elif isinstance(data, dict):
+        return pd.DataFrame([data])
+    else:
+        raise ValueError("JSON must be an array of objects or a single object")
+
+
+def iter_json_stdlib(source: Source) -> Iterator[pd.DataFrame]:
+    """The whole document through json.loads (NDJSON line by line)"""
+    with open_source(source) as handle:
+        text = handle.read().decode('utf-8-sig')
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # NDJSON: one document per line
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    yield _records_frame(data)
+
+
+# Byte classes of the array scanner: 0 for bytes that never matter
+_QUOTE, _OPEN, _CLOSE, _COMMA = 1, 2, 3, 4
+_BYTE_CLASS = np.zeros(256, dtype=np.uint8)
+_BYTE_CLASS[ord('"')] = _QUOTE
+_BYTE_CLASS[[ord('{'), ord('[')]] = _OPEN
+_BYTE_CLASS[[ord('}'), ord(']')]] = _CLOSE
+_BYTE_CLASS[ord(',')] = _COMMA
+
+
+class _ArrayScanner:
+    """
+    Finds the top-level element boundaries of a JSON array in consecutive
+    blocks of bytes, vectorized over the structural bytes only: string
+    state and nesting depth are prefix sums over them, carried from block
+    to block (escaped quotes are rare and checked one by one)
+    """
+
+    def __init__(self):
+        self.backslashes = 0  # backslashes ending the previous block
+        self.in_string = False
+        self.depth = 1  # inside the array
+
+    def _escaped(self, block: bytes, quote: int) -> bool:
+        """Whether a quote is preceded by an odd run of backslashes"""
+        start = quote
+        while start and block[start - 1] == 0x5C:
+            start -= 1
+        run = quote - start + (self.backslashes if start == 0 else 0)
+        return run % 2 == 1
+
+    def scan(self, block: bytes) -> Tuple[np.ndarray, int]:
+        """
+        Returns: (positions of top-level commas, position of the closing
+        bracket or -1)
+        """
+        chars = np.frombuffer(block, dtype=np.uint8)
+        if not len(chars):
+            return np.empty(0, dtype=np.int64), -1
+        classes = _BYTE_CLASS[chars]
+        positions = np.flatnonzero(classes)
+        kinds = classes[positions]
+        quotes = kinds == _QUOTE
+        candidates = positions[quotes]
+        # Quotes right after a backslash (or a block ending in one) may be escaped
+        suspects = candidates[chars[np.maximum(candidates - 1, 0)] == 0x5C]
+        if self.backslashes and len(candidates) and candidates[0] == 0:
+            suspects = np.r_[0, suspects]
+        escaped = [q for q in suspects.tolist() if self._escaped(block, q)]
+        if escaped:
+            keep = ~np.isin(positions, escaped)
+            positions, kinds, quotes = positions[keep], kinds[keep], quotes[keep]
+        inside = (np.cumsum(quotes, dtype=np.int64) + self.in_string) % 2 == 1
+        outside = ~inside & ~quotes
+        steps = np.where(outside & (kinds == _OPEN), 1, 0) - np.where(outside & (kinds == _CLOSE), 1, 0)
+        depth = self.depth + np.cumsum(steps)
+        ends = np.flatnonzero((steps < 0) & (depth == 0))
+        commas = positions[outside & (kinds == _COMMA) & (depth == 1)]
+        if len(ends):
+            end = int(positions[ends[0]])
+            return commas[commas < end], end
+        trailing = len(block) - len(block.rstrip(b'\\'))
+        self.backslashes = trailing + (self.backslashes if trailing == len(block) else 0)
+        if len(positions):
+            self.in_string = bool(inside[-1])
+            self.depth = int(depth[-1])
+        return commas, -1
+
+
+def _record_boundary(data: bytes, tries: int = 16) -> int:
+    """
+    Position of the last '}' followed by ',' and '{' (the end of a record
+    followed by another), or -1; only a guess, it may lie inside a string
+    """
+    pos = len(data)
+    for _ in range(tries):
+        pos = data.rfind(b'}', 0, pos)
+        if pos < 0:
+            return -1
+        rest = data[pos + 1:pos + 65].lstrip()
+        if rest[:1] == b',' and rest[1:].lstrip()[:1] == b'{':
+            return pos
+    return -1
+
+
+def _iter_json_array(handle: BinaryIO, head: bytes, block_bytes: int) -> Iterator[pd.DataFrame]:
+    """
+    Parse the array's elements a block at a time, each block in one orjson
+    call. Blocks are cut at the last record boundary, which orjson's parse
+    confirms (a cut inside a string or a nested value never parses); when
+    there is none the block is scanned for its top-level commas
+    """
+    pending = head[head.index(b'[') + 1:]
+    while True:
+        block = handle.read(block_bytes)
+        if not block:
+            break
+        data = pending + block
+        cut = _record_boundary(data)
+        if cut >= 0:
+            try:
+                records = _loads(b'[' + data[:cut + 1] + b']')
+            except ValueError:
+                cut = -1
+        if cut < 0:
+            # Pending data always starts right after a top-level comma
+            commas, _ = _ArrayScanner().scan(data)
+            if not len(commas):
+                pending = data
+                continue
+            cut = int(commas[-1]) - 1
+            records = _loads(b'[' + data[:cut + 1] + b']')
+        yield _records_frame(records)
+        pending = data[cut + 1:].lstrip().lstrip(b',')
+    pending = pending.rstrip()
+    if not pending.endswith(b']'):
+        raise ValueError("Invalid JSON: unterminated array")
+    if pending[:-1].strip():
+        yield _records_frame(_loads(b'[' + pending[:-1] + b']'))
+
+
+def _iter_ndjson(handle: BinaryIO, head: bytes, block_bytes: int,
+                 chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """One record per line, chunk_rows lines per orjson call"""
+    lines: List[bytes] = []
+    partial = b''
+    block = head
+    while block:
+        block_lines = (partial + block).split(b'\n')
+        partial = block_lines.pop()
+        lines.extend(line for line in block_lines if line.strip())
+        while len(lines) >= chunk_rows:
+            yield _records_frame(_loads(b'[' + b','.join(lines[:chunk_rows]) + b']'))
+            del lines[:chunk_rows]
+        block = handle.read(block_bytes)
+    if partial.strip():
+        lines.append(partial)
+    if lines:
+        yield _records_frame(_loads(b'[' + b','.join(lines) + b']'))
+
+
+def iter_json_stream(source: Source, chunk_rows: int = PARSE_CHUNK_ROWS,
+                     block_bytes: int = JSON_BLOCK_BYTES) -> Iterator[pd.DataFrame]:
+    """
+    Stream a JSON array of records or NDJSON without holding the parsed
+    document: records are parsed a block at a time and yielded as chunks
+    A file whose first line is not a complete JSON value is a single
+    (pretty-printed) object and is parsed whole
+    """
+    with open_source(source) as handle:
+        head = handle.read(block_bytes)
+        if head.startswith(b'\xef\xbb\xbf'):
+            head = head[3:]
+        first = head.lstrip()[:1]
+        if first == b'[':
+            yield from _iter_json_array(handle, head, block_bytes)
+            return
+        if first != b'{':
+            raise ValueError("JSON must be an array of objects or a single object")
+        while b'\n' not in head.lstrip():
+            more = handle.read(block_bytes)
+            if not more:
+                break
+            head += more
+        try:
+            _loads(head.lstrip().split(b'\n', 1)[0])
+        except ValueError:
+            yield _records_frame(_loads(head + handle.read()))
+            return
+        yield from _iter_ndjson(handle, head, block_bytes, chunk_rows)
+
+
+def iter_json_chunks(source: Source, engine: str) -> Iterator[pd.DataFrame]:
+    if engine == 'stream':
+        return iter_json_stream(source)
+    return iter_json_stdlib(source)
+
+
+# ============= XLSX =============
+
+def _sheet_frame(rows: List[Tuple[Any, ...]], names: List[Any]) -> pd.DataFrame:
+    """DataFrame of sheet rows typed as read_excel types them (empty columns are float NaN)"""
+    df = pd.DataFrame.from_records(rows, columns=names).infer_objects()
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object and df.iloc[:, i].isna().all():
+            df.isetitem(i, df.iloc[:, i].astype('float64'))
+    return df
+
+
+def iter_openpyxl_rows(source: Source, chunk_rows: int = PARSE_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Stream the first sheet's rows with openpyxl in read-only mode (cell
+    values only, no cell objects), chunk_rows rows per DataFrame
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1  # trailing empty header cells
+        names = _header_names(header[:width])
+        chunk, blank, yielded = [], 0, False
+        for row in rows:
+            row = row[:width]
+            if all(value is None for value in row):
+                # Blank rows only count when data follows them
+                blank += 1
+                continue
+            chunk.extend([(None,) * width] * blank)
+            blank = 0
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield _sheet_frame(chunk, names)
+                chunk, yielded = [], True
+        if chunk or not yielded:
+            yield _sheet_frame(chunk, names)
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_chunks(source: Source, engine: str) -> Iterator[pd.DataFrame]:
+    if engine == 'openpyxl':
+        return iter_openpyxl_rows(source)
+    if engine == 'calamine':
+        return iter([pd.read_excel(source, engine='calamine')])
+    return iter([pd.read_excel(source)])
+
+
+# ============= PUBLIC API =============
+
+def iter_file_chunks(source: Source, file_type: str, engine: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    DataFrame chunks of a file, parsed by the engine given (or configured)
+    for its type
+    """
+    engine = resolve_engine(file_type, engine)
+    if file_type == 'csv':
+        return iter_csv_chunks(source, ',', engine)
+    elif file_type == 'tsv':
+        return iter_csv_chunks(source, '\t', engine)
+    elif file_type == 'json':
+        return iter_json_chunks(source, engine)
+    elif file_type == 'xlsx':
+        return iter_xlsx_chunks(source, engine)
+    elif file_type == 'txt':
+        return iter_text_chunks(source)
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
+def read_frame(contents: bytes, file_type: str, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse an in-memory file into one DataFrame"""
+    chunks = list(iter_file_chunks(io.BytesIO(contents), file_type, engine))
+    if not chunks:
+        return pd.DataFrame()
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True, copy=False)
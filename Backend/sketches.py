@@ -0,0 +1,388 @@
+"""
+Sketches Module
+Mergeable, fixed-size summaries for approximate column statistics: a KLL
+sketch for quantiles, HyperLogLog for distinct counts and Space-Saving for
+top values. Sketches are filled chunk by chunk during ingestion and can be
+merged across chunks, datasets and workers.
+"""
+
+import pandas as pd
+import numpy as np
+import base64
+import math
+from typing import Any, Dict, Iterator, List, Optional
+
+from ingestion import RunningStats, PARSE_CHUNK_ROWS
+
+# KLL accuracy parameter: rank error ~1.3% at k=200 (99% confidence)
+KLL_K = 200
+
+# HyperLogLog registers = 2**HLL_PRECISION; relative standard error 1.04 / sqrt(registers)
+HLL_PRECISION = 14
+
+# Counters kept by Space-Saving; top values are reliable well below this
+SPACE_SAVING_CAPACITY = 256
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty)
+
+    Items live in levels; an item on level h stands for 2**h input values.
+    A level over its capacity is sorted and every other item (random
+    offset) is promoted to the next level, so the sketch stays at about
+    3k items whatever the input size. Whole chunks are inserted at once.
+    """
+
+    def __init__(self, k: int = KLL_K, seed: int = 0):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind at its level
+                keep = items[len(items) - len(items) % 2:]
+                promoted = items[int(self._rng.integers(2)):len(items) - len(items) % 2:2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        """Insert a chunk of values (no NaNs)"""
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype='float64')])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> None:
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, qs: List[float]) -> np.ndarray:
+        """Approximate quantiles (0 <= q <= 1) of everything inserted so far"""
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_h), 2 ** h, dtype=np.int64)
+                                  for h, items_h in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side='left')
+        return items[order][np.clip(positions, 0, len(items) - 1)]
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error of a single quantile query (99% confidence)"""
+        return 2.296 / self.k ** 0.9723
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'k': self.k, 'count': self.count, 'levels': [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'KLLSketch':
+        sketch = cls(k=data['k'])
+        sketch.count = data['count']
+        sketch.levels = [np.asarray(level, dtype='float64') for level in data['levels']]
+        return sketch
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit pandas value hashes"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray) -> None:
+        """Add values (duplicates are free, so distinct values of a chunk suffice)"""
+        if len(values) == 0:
+            return
+        # Stable across processes (unlike hash()), so registers merge across workers
+        hashes = pd.util.hash_array(np.asarray(values), categorize=False)
+        tail_bits = 64 - self.precision
+        index = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        # Position of the leftmost 1-bit in the tail (tail < 2**50, exact in float64)
+        bit_length = np.frexp(tail.astype(np.float64))[1]
+        rank = (tail_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HyperLogLog':
+        sketch = cls(precision=data['precision'])
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters with mergeable summaries
+
+    Keeps at most `capacity` counters. Each reported count overestimates
+    the true count by at most its error; a value without a counter occurs
+    at most min_count times.
+    """
+
+    def __init__(self, capacity: int = SPACE_SAVING_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+
+    def min_count(self) -> int:
+        """Count floor of untracked values (0 until the summary is full)"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return int(self.counts.min())
+
+    def _merge(self, counts: pd.Series, errors: pd.Series, floor: int) -> None:
+        own_floor = self.min_count()
+        if isinstance(counts.index, pd.CategoricalIndex):
+            plain = counts.index.astype(counts.index.categories.dtype)
+            counts, errors = counts.set_axis(plain), errors.set_axis(plain)
+        index = counts.index if self.counts.empty else self.counts.index.union(counts.index, sort=False)
+        merged = (self.counts.reindex(index, fill_value=own_floor)
+                  + counts.reindex(index, fill_value=floor))
+        merged_errors = (self.errors.reindex(index, fill_value=own_floor)
+                         + errors.reindex(index, fill_value=floor))
+        if len(merged) > self.capacity:
+            merged = merged.nlargest(self.capacity)
+        else:
+            merged = merged.sort_values(ascending=False, kind='stable')
+        self.counts = merged.astype(np.int64)
+        self.errors = merged_errors.reindex(merged.index).astype(np.int64)
+
+    def update_counts(self, counts: pd.Series) -> None:
+        """Fold exact counts of a chunk (e.g. value_counts) into the summary"""
+        floor = 0
+        if len(counts) > self.capacity:
+            # Summarize the chunk first: its top counters, with the largest
+            # dropped count as the floor of everything else
+            top = counts.nlargest(self.capacity + 1)
+            floor = int(top.iloc[-1])
+            counts = top.iloc[:-1]
+        self._merge(counts, pd.Series(0, index=counts.index, dtype=np.int64), floor)
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        self._merge(other.counts, other.errors, other.min_count())
+
+    def top(self, n: int) -> pd.Series:
+        """The n largest counters, largest first"""
+        return self.counts.iloc[:n]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'capacity': self.capacity,
+            'values': self.counts.index.tolist(),
+            'counts': self.counts.tolist(),
+            'errors': self.errors.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SpaceSaving':
+        sketch = cls(capacity=data['capacity'])
+        index = pd.Index(data['values'], dtype=object)
+        sketch.counts = pd.Series(data['counts'], index=index, dtype=np.int64)
+        sketch.errors = pd.Series(data['errors'], index=index, dtype=np.int64)
+        return sketch
+
+
+class ColumnSketch:
+    """
+    All sketches kept for one column
+
+    - numeric: exact running moments plus a KLL sketch for quartiles
+    - categorical: HyperLogLog distinct count plus Space-Saving top values
+    """
+
+    def __init__(self, kind: str):
+        if kind not in ('numeric', 'categorical'):
+            raise ValueError(f"Unsupported sketch kind: {kind}")
+        self.kind = kind
+        self.count = 0
+        self.missing = 0
+        if kind == 'numeric':
+            self.moments = RunningStats()
+            self.quantiles = KLLSketch()
+        else:
+            self.distinct = HyperLogLog()
+            self.top_values = SpaceSaving()
+
+    @staticmethod
+    def kind_of(series: pd.Series) -> str:
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return 'numeric'
+        return 'categorical'
+
+    def update(self, series: pd.Series) -> None:
+        """Fold one chunk of the column into the sketches"""
+        if self.kind == 'numeric':
+            self.moments.update(series)
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.quantiles.update(values)
+            num_valid = len(values)
+        else:
+            counts = series.value_counts(dropna=True, sort=False)
+            counts = counts[counts > 0]  # categorical dtypes list unobserved categories too
+            # Distinct values of the chunk are enough for HyperLogLog
+            self.distinct.update(counts.index.to_numpy())
+            self.top_values.update_counts(counts)
+            num_valid = int(counts.sum())
+        self.count += num_valid
+        self.missing += len(series) - num_valid
+
+    def merge(self, other: 'ColumnSketch') -> None:
+        if other.kind != self.kind:
+            raise ValueError("Cannot merge sketches of different kinds")
+        self.count += other.count
+        self.missing += other.missing
+        if self.kind == 'numeric':
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.distinct.merge(other.distinct)
+            self.top_values.merge(other.top_values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'kind': self.kind, 'count': self.count, 'missing': self.missing}
+        if self.kind == 'numeric':
+            data['moments'] = {'count': self.moments.count, 'mean': self.moments.mean, 'm2': self.moments.m2,
+                               'min': self.moments.min, 'max': self.moments.max,
+                               'missing': self.moments.missing}
+            data['quantiles'] = self.quantiles.to_dict()
+        else:
+            data['distinct'] = self.distinct.to_dict()
+            data['top_values'] = self.top_values.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ColumnSketch':
+        sketch = cls(data['kind'])
+        sketch.count = data['count']
+        sketch.missing = data['missing']
+        if sketch.kind == 'numeric':
+            for key, value in data['moments'].items():
+                setattr(sketch.moments, key, value)
+            sketch.quantiles = KLLSketch.from_dict(data['quantiles'])
+        else:
+            sketch.distinct = HyperLogLog.from_dict(data['distinct'])
+            sketch.top_values = SpaceSaving.from_dict(data['top_values'])
+        return sketch
+
+
+def sketch_chunks(chunks: Iterator[pd.DataFrame],
+                  sketches: Optional[Dict[str, ColumnSketch]]) -> Iterator[pd.DataFrame]:
+    """
+    Pass chunks through unchanged while folding them into per-column sketches
+    A column whose kind changes between chunks loses its sketch (its
+    count then no longer matches the frame and it is ignored)
+    """
+    for chunk in chunks:
+        if sketches is not None:
+            for col in chunk.columns:
+                kind = ColumnSketch.kind_of(chunk[col])
+                sketch = sketches.setdefault(col, ColumnSketch(kind))
+                if sketch.kind == kind:
+                    sketch.update(chunk[col])
+        yield chunk
+
+
+def sketch_frame(df: pd.DataFrame, chunk_rows: int = PARSE_CHUNK_ROWS) -> Dict[str, ColumnSketch]:
+    """Sketch an already-loaded DataFrame chunk by chunk"""
+    sketches: Dict[str, ColumnSketch] = {}
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    for _ in sketch_chunks(chunks, sketches):
+        pass
+    return sketches
+
+
+def usable_sketch(sketches: Optional[Dict[str, ColumnSketch]], col: str,
+                  column_type: str, num_rows: int) -> Optional[ColumnSketch]:
+    """The sketch of a column if it covers every row and matches the column's type"""
+    sketch = (sketches or {}).get(col)
+    if sketch is None or sketch.count + sketch.missing != num_rows:
+        return None
+    if sketch.kind != column_type:
+        return None
+    return sketch
+
+
+def approximate_statistics(sketch: ColumnSketch, top_n: int = 20) -> Optional[Dict[str, Any]]:
+    """
+    Column statistics from its sketches, in the shape of the exact ones plus
+    error bounds; None for a numeric column without any values
+    """
+    if sketch.kind == 'numeric':
+        if sketch.count == 0:
+            return None
+        moments = sketch.moments.to_dict()
+        q25, median, q75 = sketch.quantiles.quantiles([0.25, 0.5, 0.75])
+        return {
+            'type': 'numeric',
+            'mean': float(moments['mean']),
+            'median': float(median),
+            'std': float(moments['std']) if sketch.count > 1 else 0.0,
+            'min': float(moments['min']),
+            'max': float(moments['max']),
+            'q25': float(q25),
+            'q75': float(q75),
+            'count': int(sketch.count),
+            'missing': int(sketch.missing),
+            'approximate': True,
+            # Quartiles are within this fraction of the rank of the true ones
+            'error_bounds': {'quantile_rank': round(sketch.quantiles.rank_error, 4)},
+        }
+    top = sketch.top_values.top(top_n)
+    errors = sketch.top_values.errors.reindex(top.index)
+    return {
+        'type': 'categorical',
+        'unique_values': sketch.distinct.estimate(),
+        'top_values': {str(value): int(count) for value, count in top.items()},
+        'count': int(sketch.count),
+        'missing': int(sketch.missing),
+        'approximate': True,
+        'error_bounds': {
+            # Relative standard error of unique_values
+            'unique_values': round(sketch.distinct.relative_error, 4),
+            # Largest overestimate among the reported top_values counts
+            'top_values': int(errors.max()) if len(errors) else 0,
+        },
+    }
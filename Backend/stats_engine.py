@@ -0,0 +1,139 @@
+"""
+Statistics Engine Module
+Batched, vectorized column statistics: numeric columns are reduced together
+as 2-D NumPy blocks and categorical columns in a single factorize pass
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from ingestion import RunningStats
+
+# Numeric columns reduced together per block (bounds the float64 copy to
+# rows x NUMERIC_BLOCK_COLUMNS x 8 bytes)
+NUMERIC_BLOCK_COLUMNS = 16
+
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+def empty_numeric_stats(num_rows: int) -> Dict[str, Any]:
+    """Statistics reported for a numeric column with no valid values"""
+    return {
+        'type': 'numeric',
+        'mean': 0, 'median': 0, 'std': 0,
+        'min': 0, 'max': 0, 'q25': 0, 'q75': 0,
+        'count': 0, 'missing': num_rows
+    }
+
+
+def reduce_block(block: np.ndarray, moments: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Reduce a (columns x rows) float64 block without missing values in one go
+    Returns per-column arrays of mean, std, min, max and quartiles; the
+    block is used as scratch space and is reordered by the partition
+    """
+    count = block.shape[1]
+    result = {}
+    if moments:
+        means = block.mean(axis=1)
+        centered = block - means[:, None]
+        sq = np.einsum('ij,ij->i', centered, centered)
+        del centered
+        result['mean'] = means
+        result['std'] = np.sqrt(sq / (count - 1)) if count > 1 else np.zeros(len(block))
+        result['min'] = block.min(axis=1)
+        result['max'] = block.max(axis=1)
+    quartiles = np.quantile(block, QUANTILES, axis=1, overwrite_input=True)
+    result['q25'], result['median'], result['q75'] = quartiles
+    return result
+
+
+def numeric_statistics(df: pd.DataFrame, columns: List[str],
+                       running_stats: Optional[Dict[str, RunningStats]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute count, missing, mean, std, min, max and quartiles for numeric
+    columns in batched 2-D reductions
+    Complete columns are packed into one contiguous block per batch; columns
+    with missing values are compressed and reduced on their own
+    running_stats: moments already accumulated during chunked ingestion;
+    those columns only need their quartiles computed
+    """
+    running_stats = running_stats or {}
+    stats = {}
+    num_rows = len(df)
+
+    def has_running(col):
+        return col in running_stats and running_stats[col].count > 0
+
+    def emit(col, reduced, i, count, missing):
+        if has_running(col):
+            moments = running_stats[col].to_dict()
+            if count < 2:
+                moments['std'] = 0.0
+        else:
+            moments = {key: reduced[key][i] for key in ('mean', 'std', 'min', 'max')}
+        stats[col] = {
+            'type': 'numeric',
+            'mean': float(moments['mean']),
+            'median': float(reduced['median'][i]),
+            'std': float(moments['std']),
+            'min': float(moments['min']),
+            'max': float(moments['max']),
+            'q25': float(reduced['q25'][i]),
+            'q75': float(reduced['q75'][i]),
+            'count': int(count),
+            'missing': int(missing)
+        }
+
+    # Columns needing moments and quartile-only columns are batched separately
+    groups = [[col for col in columns if not has_running(col)],
+              [col for col in columns if has_running(col)]]
+    for group_index, group in enumerate(groups):
+        need_moments = group_index == 0
+        for start in range(0, len(group), NUMERIC_BLOCK_COLUMNS):
+            cols = group[start:start + NUMERIC_BLOCK_COLUMNS]
+            block = np.empty((len(cols), num_rows))
+            complete_cols = []
+            for col in cols:
+                values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+                nan_mask = np.isnan(values)
+                if not nan_mask.any():
+                    block[len(complete_cols)] = values
+                    complete_cols.append(col)
+                    continue
+                valid = values[~nan_mask]
+                missing = num_rows - len(valid)
+                if len(valid) == 0:
+                    stats[col] = empty_numeric_stats(num_rows)
+                else:
+                    emit(col, reduce_block(valid[None, :], need_moments), 0, len(valid), missing)
+
+            if complete_cols and num_rows > 0:
+                reduced = reduce_block(block[:len(complete_cols)], need_moments)
+                for i, col in enumerate(complete_cols):
+                    emit(col, reduced, i, num_rows, 0)
+            else:
+                for col in complete_cols:
+                    stats[col] = empty_numeric_stats(num_rows)
+
+    return {col: stats[col] for col in columns}
+
+
+def categorical_statistics(series: pd.Series, top_n: int = 20) -> Dict[str, Any]:
+    """
+    Distinct count, top values and missing count from one factorize pass
+    Ties in frequency keep first-occurrence order, like value_counts
+    """
+    codes, uniques = pd.factorize(series, sort=False)
+    valid_codes = codes[codes >= 0]
+    counts = np.bincount(valid_codes, minlength=len(uniques))
+    order = np.argsort(-counts, kind='stable')[:top_n]
+    missing = len(codes) - len(valid_codes)
+    return {
+        'type': 'categorical',
+        'unique_values': int(len(uniques)),
+        'top_values': {str(uniques[i]): int(counts[i]) for i in order},
+        'count': int(len(valid_codes)),
+        'missing': int(missing)
+    }
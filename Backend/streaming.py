@@ -0,0 +1,87 @@
+"""
+Streaming Module
+Progressive responses: a worker thread emits stages (schema, sample rows,
+one event per column, ...) as it finishes them, and the event loop relays
+each one to the client as an NDJSON line or a Server-Sent Event
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+from encoding import encode_payload
+
+# Streaming mode -> media type
+STREAM_MODES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+# Keep proxies from buffering events until the response ends
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+class StreamClosed(Exception):
+    """Raised in the worker when the client has gone away"""
+
+
+def encode_event(stage: str, data: Dict[str, Any], mode: str) -> bytes:
+    """
+    One event as bytes: the stage name and its data in one compact JSON
+    object (DataFrames as row records), framed as an NDJSON line or an SSE event
+    """
+    body = encode_payload({'stage': stage, **data}, 'json')
+    if mode == 'sse':
+        return b'event: ' + stage.encode() + b'\ndata: ' + body + b'\n\n'
+    return body + b'\n'
+
+
+class EventChannel:
+    """
+    Hands events from a worker thread to the response generator
+
+    emit() encodes in the calling (worker) thread, so the event loop only
+    moves bytes. Once the client disconnects, emit() raises StreamClosed so
+    the worker stops instead of computing stages nobody will read.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(self, stage: str, data: Dict[str, Any]) -> None:
+        """Queue a stage for the client (safe to call from any thread)"""
+        if self.closed:
+            raise StreamClosed()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, encode_event(stage, data, self.mode))
+
+    async def events(self, job: 'asyncio.Future') -> AsyncIterator[bytes]:
+        """
+        Relay events until the job producing them finishes, then a final
+        'done' event, or an 'error' event with the job's error detail
+        """
+        def finished(future: 'asyncio.Future') -> None:
+            # Runs on the loop after every event the job queued before finishing;
+            # the error is retrieved even when the client left before reading it
+            if not future.cancelled():
+                future.exception()
+            self._queue.put_nowait(None)
+
+        job.add_done_callback(finished)
+        try:
+            while True:
+                event = await self._queue.get()
+                if event is None:
+                    break
+                yield event
+            error = None if job.cancelled() else job.exception()
+            if error is None:
+                yield encode_event('done', {}, self.mode)
+            else:
+                yield encode_event('error', {
+                    'status_code': getattr(error, 'status_code', 500),
+                    'detail': getattr(error, 'detail', None) or str(error),
+                }, self.mode)
+        finally:
+            self.closed = True
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the backend modules from the Backend directory, without the upload cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('UPLOAD_CACHE_DIR', '')
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from aggregate_engine import AGGREGATIONS, aggregate
+
+
+def frame(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    values = rng.normal(100, 20, rows)
+    values[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        'dept': pd.Series(rng.choice(['ops', 'eng', 'sales', None], rows), dtype=object),
+        'level': rng.integers(1, 4, rows),
+        'city': pd.Categorical(rng.choice(['Oslo', 'Lima', np.nan], rows)),
+        'salary': values,
+    })
+
+
+def expected(df: pd.DataFrame, group_by) -> pd.DataFrame:
+    grouped = df.groupby(group_by, observed=True)
+    result = grouped['salary'].agg(list(AGGREGATIONS))
+    result.columns = [f'salary_{function}' for function in AGGREGATIONS]
+    result.insert(0, 'rows', grouped.size())
+    return result.reset_index()
+
+
+def measures():
+    return [(None, 'count', 'rows')] + [('salary', function, f'salary_{function}') for function in AGGREGATIONS]
+
+
+def test_group_by_matches_pandas_and_skips_missing_keys():
+    df = frame(3000, seed=18)
+    for group_by in (['dept'], ['dept', 'level'], ['city', 'dept']):
+        result = aggregate(df, {}, None, group_by, measures())
+        baseline = expected(df, group_by)
+        for col in group_by:
+            result[col] = result[col].astype(object)
+            baseline[col] = baseline[col].astype(object)
+        pd.testing.assert_frame_equal(result, baseline, check_dtype=False, obj=str(group_by))
+
+
+def test_group_by_over_selected_rows():
+    df = frame(2000, seed=5)
+    positions = np.flatnonzero(df['level'].to_numpy() != 2)
+    result = aggregate(df, {}, positions, ['dept'], measures())
+    pd.testing.assert_frame_equal(result, expected(df.iloc[positions], ['dept']), check_dtype=False)
+
+
+def test_no_group_by_is_one_group():
+    df = frame(500, seed=1)
+    result = aggregate(df, {}, None, [], measures())
+    assert len(result) == 1
+    assert result['rows'][0] == len(df)
+    assert result['salary_count'][0] == df['salary'].count()
+    np.testing.assert_allclose(result['salary_mean'][0], df['salary'].mean())
+    np.testing.assert_allclose(result['salary_median'][0], df['salary'].median())
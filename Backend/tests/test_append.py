@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from datasets import DatasetRegistry
+from incremental import StreamingHistogram
+
+
+def test_appended_batches_are_concatenated_lazily(tmp_path):
+    registry = DatasetRegistry(store_dir=str(tmp_path))
+    entry = registry.add(pd.DataFrame({'x': [1, 2]}), 'a.csv', 'csv')
+    registry.append(entry, pd.DataFrame({'x': [3]}))
+    registry.append(entry, pd.DataFrame({'x': [4, 5]}))
+    assert len(entry.batches) == 2 and entry.num_rows == 5
+    assert entry.df['x'].tolist() == [1, 2, 3, 4, 5]
+    assert entry.batches == []
+
+    # Another worker reloads the base rows and both stored batches
+    reloaded = DatasetRegistry(store_dir=str(tmp_path)).get(entry.dataset_id)
+    assert reloaded.df['x'].tolist() == [1, 2, 3, 4, 5]
+    assert registry.remove(entry.dataset_id)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_append_profile_matches_rows():
+    client = TestClient(main.app)
+    upload = client.post('/upload', files={'file': ('t.csv', b'n,when\n1,2024-01-02\n2,2024-01-01\n', 'text/csv')})
+    dataset_id = upload.json()['dataset_id']
+    response = client.post('/append', params={'dataset_id': dataset_id},
+                           files={'file': ('more.csv', b'n,when\n3,2023-12-31\n4,2024-01-02\n', 'text/csv')})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body['num_rows'] == 4
+    assert body['statistics']['when']['min_date'].startswith('2023-12-31')
+    assert body['statistics']['when']['count'] == 4
+
+    reset = client.delete('/reset', params={'dataset_id': dataset_id})
+    assert reset.json()['num_rows'] == 4
+
+
+def test_append_drops_cached_responses_of_previous_rows():
+    client = TestClient(main.app)
+    upload = client.post('/upload', files={'file': ('c.csv', b'n\n1\n2\n', 'text/csv')})
+    dataset_id = upload.json()['dataset_id']
+    fingerprint = main.datasets.get(dataset_id).fingerprint
+    assert any(key.startswith(f'{fingerprint}:') for key in main.profile_cache._entries)
+
+    client.post('/append', params={'dataset_id': dataset_id},
+                files={'file': ('more.csv', b'n\n3\n', 'text/csv')})
+    assert not any(key.startswith(f'{fingerprint}:') for key in main.profile_cache._entries)
+
+
+def test_append_keeps_cached_responses_shared_with_identical_upload():
+    client = TestClient(main.app)
+    content = b'n\n10\n20\n30\n'
+    first = client.post('/upload', files={'file': ('s.csv', content, 'text/csv')}).json()['dataset_id']
+    second = client.post('/upload', files={'file': ('s.csv', content, 'text/csv')}).json()['dataset_id']
+    fingerprint = main.datasets.get(first).fingerprint
+    assert main.datasets.get(second).fingerprint == fingerprint
+
+    client.post('/append', params={'dataset_id': first},
+                files={'file': ('more.csv', b'n\n40\n', 'text/csv')})
+    assert any(key.startswith(f'{fingerprint}:') for key in main.profile_cache._entries)
+
+
+def test_outlier_batch_widens_histogram_without_allocating_old_width_bins():
+    histogram = StreamingHistogram(20)
+    histogram.update(np.array([1, 1.5, 2, 2.5, 3]))
+    histogram.update(np.array([1e9]))
+    histogram.update(np.array([-1e9]))
+    edges, counts = histogram.trimmed()
+    assert len(histogram.counts) <= 20
+    assert counts.sum() == 7
+    assert edges[0] <= -1e9 and edges[-1] >= 1e9
@@ -0,0 +1,22 @@
+import pandas as pd
+
+import main
+
+
+def test_mixed_date_formats_are_temporal():
+    dates = ['2024-01-15', '15/01/2024', '2024-02-01', '28/02/2024', 'March 3, 2024']
+    df = pd.DataFrame({
+        'when': dates * 20,
+        'name': ['apple', 'pear', 'fig', 'kiwi', 'plum'] * 20,
+    })
+    column_types = main.detect_column_types(df)
+    assert column_types == {'when': 'temporal', 'name': 'categorical'}
+
+    converted = main.convert_temporal_columns(df, column_types)
+    expected = [pd.Timestamp(value) for value in dates]
+    assert converted['when'].iloc[:5].tolist() == expected
+
+
+def test_unparsable_entries_stay_missing():
+    parsed = main.parse_dates(pd.Series(['2024-01-15', 'not a date', None, '02/03/2024']))
+    assert parsed.isna().tolist() == [False, True, True, False]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation_engine import correlate, correlation_matrix
+
+
+def frame(rows: int, seed: int, missing: float = 0.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=rows)
+    df = pd.DataFrame({
+        'a': base * 1e6 + 5e8,  # large offset and scale
+        'b': base + rng.normal(scale=0.5, size=rows),
+        'c': rng.integers(0, 10, rows).astype(float),  # ties
+        'd': -np.exp(base),
+    })
+    if missing:
+        for col in df:
+            df.loc[rng.random(rows) < missing, col] = np.nan
+    return df
+
+
+def matrix(result) -> np.ndarray:
+    return np.array([[np.nan if value is None else value for value in row] for row in result['matrix']])
+
+
+def test_pearson_matches_dataframe_corr_with_missing_values():
+    df = frame(5000, seed=24, missing=0.1)
+    result = correlate(df, {}, None, list(df.columns), 'pearson')
+    np.testing.assert_allclose(matrix(result), df.corr('pearson').to_numpy(), atol=1e-5)
+    np.testing.assert_array_equal(np.array(result['counts']), df.notna().astype(int).T @ df.notna().astype(int))
+
+
+@pytest.mark.parametrize('block_rows', [64, 1 << 16])
+def test_blocks_do_not_change_the_matrix(block_rows):
+    df = frame(1000, seed=2, missing=0.05)
+    result, _ = correlation_matrix([df[col].to_numpy() for col in df], block_rows=block_rows)
+    np.testing.assert_allclose(result, df.corr('pearson').to_numpy(), atol=1e-5)
+
+
+def test_spearman_matches_dataframe_corr():
+    df = frame(5000, seed=7)
+    result = correlate(df, {}, None, list(df.columns), 'spearman')
+    np.testing.assert_allclose(matrix(result), df.corr('spearman').to_numpy(), atol=1e-5)
+
+
+def test_spearman_over_selected_rows():
+    df = frame(4000, seed=9)
+    df.loc[df.index % 7 == 0, ['a', 'b', 'c', 'd']] = np.nan  # rows missing in every column
+    positions = np.flatnonzero(df['c'].to_numpy() != 3)
+    result = correlate(df, {}, positions, list(df.columns), 'spearman')
+    np.testing.assert_allclose(matrix(result), df.iloc[positions].corr('spearman').to_numpy(), atol=1e-5)
@@ -0,0 +1,24 @@
+import os
+import time
+
+import pandas as pd
+
+from datasets import DatasetRegistry
+
+
+def test_store_is_swept_on_store_not_on_every_get(tmp_path):
+    registry = DatasetRegistry(ttl_seconds=60, store_dir=str(tmp_path), sweep_seconds=3600)
+    entry = registry.add(pd.DataFrame({'x': [1, 2]}), 'a.csv', 'csv')
+
+    # A dataset another worker stored long ago
+    other = DatasetRegistry(ttl_seconds=60, store_dir=str(tmp_path)).add(pd.DataFrame({'y': [1]}), 'b.csv', 'csv')
+    stale = time.time() - 120
+    for path in tmp_path.glob(f'{other.dataset_id}*'):
+        os.utime(path, (stale, stale))
+
+    assert registry.get(entry.dataset_id) is entry
+    assert any(tmp_path.glob(f'{other.dataset_id}*'))
+
+    registry.add(pd.DataFrame({'z': [1]}), 'c.csv', 'csv')
+    assert not any(tmp_path.glob(f'{other.dataset_id}*'))
+    assert any(tmp_path.glob(f'{entry.dataset_id}*'))
@@ -0,0 +1,32 @@
+import orjson
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from encoding import COLUMNAR_MEDIA_TYPE, encode_payload
+
+DATES_CSV = b'id,when\n1,2024-01-01\n2,\n3,2024-01-03\n'
+
+
+def test_columnar_encodes_missing_datetimes_as_null():
+    df = pd.DataFrame({
+        'when': pd.to_datetime(['2024-01-01', None]),
+        'took': pd.to_timedelta(['1h', None]),
+        'zoned': pd.to_datetime(['2024-01-01', None]).tz_localize('UTC'),
+    })
+    payload = orjson.loads(encode_payload({'sample_data': df}, 'columnar'))
+    assert payload['sample_data']['when'] == ['2024-01-01T00:00:00', None]
+    assert payload['sample_data']['took'][1] is None
+    assert payload['sample_data']['zoned'] == ['2024-01-01T00:00:00+00:00', None]
+
+
+def test_columnar_upload_and_rows_with_missing_dates():
+    client = TestClient(main.app)
+    headers = {'Accept': COLUMNAR_MEDIA_TYPE}
+    response = client.post('/upload', files={'file': ('dates.csv', DATES_CSV, 'text/csv')}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()['sample_data']['when'][1] is None
+
+    rows = client.post('/rows', json={'dataset_id': response.json()['dataset_id'], 'sort_by': 'when'},
+                       headers=headers)
+    assert rows.status_code == 200, rows.text
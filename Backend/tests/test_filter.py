@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from filter_engine import select_mask
+from main import FilterPredicate
+
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope='module')
+def dataset_id(client):
+    upload = client.post('/upload', files={'file': (
+        'f.csv', b'n,s,when\n1,a,2024-01-01\n2,b,2024-01-02\n3,a,2024-01-03\n', 'text/csv')})
+    return upload.json()['dataset_id']
+
+
+@pytest.mark.parametrize('body, detail', [
+    ({'predicates': [{'column': 'n', 'filter_type': 'bogus'}]}, 'Unsupported filter type'),
+    ({'predicates': [{'column': 's', 'filter_type': 'range', 'min_value': 0}]}, 'numeric column'),
+    ({'predicates': [{'column': 'when', 'filter_type': 'range', 'min_value': 0}]}, 'numeric column'),
+    ({'predicates': [{'column': 'nope', 'filter_type': 'range', 'min_value': 0}]}, 'Unknown column: nope'),
+    ({'predicates': [{'column': 'n', 'filter_type': 'range', 'min_value': 0}], 'combine': 'xor'}, 'combine mode'),
+])
+def test_bad_filters_are_client_errors(client, dataset_id, body, detail):
+    response = client.post('/filter', json={'dataset_id': dataset_id, **body})
+    assert response.status_code == 400
+    assert detail in response.json()['detail']
+
+
+def test_compound_masks_match_pandas_baseline():
+    rng = np.random.default_rng(6)
+    rows = 2000
+    x = rng.normal(size=rows)
+    x[rng.random(rows) < 0.1] = np.nan
+    df = pd.DataFrame({
+        'x': x,
+        'k': pd.Series(rng.choice(['red', 'green', 'blue', None], rows), dtype=object),
+        't': rng.choice(['Quick fox', 'lazy dog', 'FOXTROT', 'cat'], rows),
+    })
+    predicates = [
+        FilterPredicate(column='x', filter_type='range', min_value=-0.5, max_value=1.0),
+        FilterPredicate(column='k', filter_type='category', categories=['red', 'blue']),
+        FilterPredicate(column='t', filter_type='search', search_query='fox'),
+    ]
+    baselines = [
+        (df['x'] >= -0.5) & (df['x'] <= 1.0),
+        df['k'].isin(['red', 'blue']),
+        df['t'].str.contains('fox', case=False, na=False),
+    ]
+    indexes = {}
+    for combine, reduce in [('and', np.logical_and.reduce), ('or', np.logical_or.reduce)]:
+        for count in range(1, len(predicates) + 1):
+            mask = select_mask(df, predicates[:count], combine, indexes)
+            expected = reduce([baseline.to_numpy() for baseline in baselines[:count]])
+            np.testing.assert_array_equal(mask, expected, err_msg=f'{combine} {count}')
+
+    # A predicate without bounds selects every row: ignored by AND, everything for OR
+    unbounded = FilterPredicate(column='x', filter_type='range')
+    np.testing.assert_array_equal(select_mask(df, [predicates[1], unbounded], 'and', indexes),
+                                  baselines[1].to_numpy())
+    assert select_mask(df, [predicates[1], unbounded], 'or', indexes) is None
@@ -0,0 +1,33 @@
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
+
+import image_analysis
+import main
+
+
+def test_analyze_image_defaults_to_exact_quality():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), (200, 10, 10)).save(buffer, 'PNG')
+    client = TestClient(main.app)
+    response = client.post('/api/analyze-image', files={'file': ('red.png', buffer.getvalue(), 'image/png')})
+    assert response.status_code == 200, response.text
+    assert response.json()['quality'] == 'exact'
+
+
+def test_batch_worker_drafts_jpegs_in_exact_mode(tmp_path, monkeypatch):
+    path = tmp_path / 'big.jpg'
+    gradient = Image.linear_gradient('L').resize((2400, 1600))
+    Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.ROTATE_180), gradient)).save(path, 'JPEG')
+    drafted = []
+    original = JpegImageFile.draft
+    monkeypatch.setattr(JpegImageFile, 'draft',
+                        lambda self, mode, size: drafted.append(size) or original(self, mode, size))
+
+    colors = image_analysis.analyze_image_file(str(path), None, 'exact')
+    assert drafted == [(image_analysis.MAX_IMAGE_SIZE, image_analysis.MAX_IMAGE_SIZE)]
+    assert sum(color['percentage'] for color in colors) > 99
+    pixels = image_analysis.load_pixels(path.read_bytes(), draft=True)
+    assert len(pixels) == 300 * 200
@@ -0,0 +1,22 @@
+import io
+
+import pandas as pd
+
+from ingestion import consume_chunks, iter_delimited_chunks
+
+
+def test_type_change_in_a_later_chunk_becomes_strings():
+    contents = b'id,code\n' + b''.join(b'%d,%d\n' % (i, i) for i in range(10)) + b'10,X7\n11,\n'
+    df, running = consume_chunks(iter_delimited_chunks(io.BytesIO(contents), chunk_rows=4))
+    whole = pd.read_csv(io.BytesIO(contents))
+    assert df['code'].tolist()[:-1] == whole['code'].tolist()[:-1]
+    assert all(isinstance(value, str) for value in df['code'].dropna())
+    assert df['code'].isna().tolist() == whole['code'].isna().tolist()
+    assert 'code' not in running and 'id' in running
+
+
+def test_numeric_chunks_of_different_types_stay_numeric():
+    contents = b'x\n1\n2\n3\n\n4.5\n'
+    df, running = consume_chunks(iter_delimited_chunks(io.BytesIO(contents), chunk_rows=2))
+    assert df['x'].dtype == 'float64'
+    assert running['x'].count == 4
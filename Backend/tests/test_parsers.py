@@ -0,0 +1,47 @@
+import io
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from parsers import available_engines, iter_pyarrow_csv, read_frame, resolve_engine
+
+CSV_ENGINES = available_engines('csv')
+
+
+def test_pandas_is_the_default_csv_engine():
+    assert resolve_engine('csv') == 'pandas'
+
+
+@pytest.mark.parametrize('engine', CSV_ENGINES)
+def test_duplicate_headers_are_renamed(engine):
+    contents = b'a,a,b,,a.1,a\n1,2,3,4,5,6\n'
+    df = read_frame(contents, 'csv', engine)
+    assert list(df.columns) == ['a', 'a.2', 'b', 'Unnamed: 3', 'a.1', 'a.3']
+    assert list(df.columns) == list(pd.read_csv(io.BytesIO(contents)).columns)
+
+
+@pytest.mark.parametrize('engine', CSV_ENGINES)
+def test_short_rows_are_padded(engine):
+    df = read_frame(b'a,b\n1,2\n3\n5,6\n', 'csv', engine)
+    assert df['a'].tolist() == [1, 3, 5]
+    assert df['b'].isna().tolist() == [False, True, False]
+
+
+@pytest.mark.skipif('pyarrow' not in CSV_ENGINES, reason='pyarrow is not installed')
+def test_pyarrow_streams_short_rows_in_place():
+    lines = [f'{i},{i}' if i % 97 else f'{i}' for i in range(5000)]
+    data = ('x,y\n' + '\n'.join(lines) + '\n').encode()
+    chunks = list(iter_pyarrow_csv(io.BytesIO(data), block_bytes=1024))
+    assert len(chunks) > 1
+    df = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(df, pd.read_csv(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize('contents', [b'a,a,b\n1,2,3\n4,5,6\n', b'a,b\n1,2\n3\n'])
+def test_upload_accepts_ragged_and_duplicate_header_csv(contents):
+    client = TestClient(main.app)
+    response = client.post('/upload', files={'file': ('data.csv', contents, 'text/csv')})
+    assert response.status_code == 200, response.text
+    assert response.json()['num_rows'] == 2
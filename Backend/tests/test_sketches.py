@@ -0,0 +1,50 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from datasets import DatasetRegistry
+from sketches import ColumnSketch, approximate_statistics, sketch_frame
+
+
+def frame(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'x': rng.normal(size=rows),
+        'n': rng.integers(0, 1000, rows),
+        'c': rng.choice(['a', 'b', 'c'], rows),
+        'k': pd.Categorical(rng.choice(['p', 'q'], rows)),
+        'b': rng.choice([True, False], rows),
+    })
+
+
+def test_merging_sketches_raises_no_warnings():
+    sketches = sketch_frame(frame(1000, 0))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        for col, sketch in sketch_frame(frame(1000, 1)).items():
+            sketches[col].merge(sketch)
+    assert sketches['c'].count == 2000
+
+
+def test_sketches_persist_and_merge_across_workers(tmp_path):
+    df = frame(5000, 0)
+    writer = DatasetRegistry(store_dir=str(tmp_path))
+    entry = writer.add(df, 'a.csv', 'csv')
+    entry.sketches = sketch_frame(df)
+    writer.store_sketches(entry)
+
+    # Another worker reloads the dataset with its sketches and extends them
+    reader = DatasetRegistry(store_dir=str(tmp_path))
+    loaded = reader.get(entry.dataset_id)
+    assert set(loaded.sketches) == set(entry.sketches)
+    for col, sketch in entry.sketches.items():
+        assert approximate_statistics(loaded.sketches[col]) == approximate_statistics(sketch)
+
+    batch = frame(1000, 1)
+    for col, sketch in sketch_frame(batch).items():
+        loaded.sketches[col].merge(sketch)
+    reader.append(loaded, batch)
+    again = DatasetRegistry(store_dir=str(tmp_path)).get(entry.dataset_id)
+    assert again.sketches['x'].count == 6000
+    assert isinstance(again.sketches['c'], ColumnSketch)
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from text_index import TextIndex
+
+
+def baseline(series: pd.Series, query: str) -> np.ndarray:
+    return series.astype(str).str.contains(query, case=False, na=False).to_numpy(dtype=bool)
+
+
+def test_search_matches_case_insensitive_scan():
+    series = pd.Series(['İstanbul trip', 'istanbul', 'ISTANBUL nights', None,
+                        'Kelvin K', 'ankara', 'Straße', 'STRASSE'])
+    index = TextIndex(series)
+    for query in ['istanbul', 'istanbul nights', 'k', 'kelvin', 'strasse', 'ankara', 'trip']:
+        np.testing.assert_array_equal(index.search_mask(query), baseline(series, query), err_msg=query)
+
+
+def test_search_ascii_column_uses_postings():
+    series = pd.Series(['red fox', 'Red Panda', 'blue whale', None] * 50)
+    index = TextIndex(series)
+    assert len(index._non_ascii_rows) == 0
+    np.testing.assert_array_equal(index.search_mask('red'), baseline(series, 'red'))
+    np.testing.assert_array_equal(index.search_mask('red panda'), baseline(series, 'red panda'))
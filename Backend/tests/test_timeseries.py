@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeseries import resample, sorted_timestamps
+
+PANDAS_RULES = {
+    'second': 's', 'minute': 'min', 'hour': 'h', 'day': 'D',
+    'month': 'MS', 'year': 'YS',
+}
+
+
+def timestamps(rows: int, span: str, seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2021-03-14 05:17:23')
+    offsets = rng.integers(0, pd.Timedelta(span).value, rows)
+    series = pd.Series(start + pd.to_timedelta(offsets, unit='ns'))
+    series[rng.random(rows) < 0.05] = pd.NaT
+    return series
+
+
+def pandas_counts(series: pd.Series, rule: str, **kwargs) -> pd.Series:
+    frame = pd.DataFrame({'when': series.dropna(), 'one': 1})
+    return frame.resample(rule, on='when', **kwargs)['one'].count()
+
+
+@pytest.mark.parametrize('granularity, span', [
+    ('second', '10min'), ('minute', '6h'), ('hour', '9D'), ('day', '200D'),
+    ('month', '1500D'), ('year', '20000D'),
+])
+def test_buckets_match_dataframe_resample(granularity, span):
+    series = timestamps(5000, span, seed=len(granularity))
+    used, edges, counts = resample(sorted_timestamps(series), granularity)
+    expected = pandas_counts(series, PANDAS_RULES[granularity])
+    assert used == granularity
+    assert pd.DatetimeIndex(edges[:-1]).equals(pd.DatetimeIndex(expected.index))
+    np.testing.assert_array_equal(counts, expected.to_numpy())
+
+
+def test_weeks_start_on_monday():
+    series = timestamps(3000, '400D', seed=7)
+    _, edges, counts = resample(sorted_timestamps(series), 'week')
+    expected = pandas_counts(series, 'W-MON', label='left', closed='left')
+    assert pd.DatetimeIndex(edges[:-1]).equals(pd.DatetimeIndex(expected.index))
+    np.testing.assert_array_equal(counts, expected.to_numpy())
+
+
+def test_window_and_weights_match_resample_of_the_rows():
+    series = timestamps(4000, '90D', seed=3)
+    start, end = np.datetime64('2021-04-01T12:00'), np.datetime64('2021-05-10')
+    within = series[(series >= start) & (series <= end)]
+    _, edges, counts = resample(sorted_timestamps(series), 'day', start=start, end=end)
+    expected = pandas_counts(within, 'D')
+    assert pd.DatetimeIndex(edges[:-1]).equals(pd.DatetimeIndex(expected.index))
+    np.testing.assert_array_equal(counts, expected.to_numpy())
+
+    # Distinct timestamps with counts give the same buckets as the rows themselves
+    keys, weights = np.unique(sorted_timestamps(series), return_counts=True)
+    _, weighted_edges, weighted_counts = resample(keys, 'day', start=start, end=end, weights=weights)
+    np.testing.assert_array_equal(weighted_edges, edges)
+    np.testing.assert_array_equal(weighted_counts, counts)
@@ -0,0 +1,211 @@
+"""
+Text Index Module
+Tokenizes a text column once with batched regex passes over the whole corpus and
+keeps a token -> rows postings index, so search filters and filtered word
+frequencies never rescan the raw text
+"""
+
+import pandas as pd
+import numpy as np
+import re
+from typing import Dict, Optional, Tuple
+
+from filter_engine import ColumnIndex
+
+# Common English stop words
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
+    'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that',
+    'the', 'to', 'was', 'will', 'with', 'this', 'but', 'they', 'have',
+    'i', 'you', 'we', 'me', 'him', 'her', 'them', 'what', 'which',
+    'who', 'when', 'where', 'why', 'how', 'all', 'each', 'every'
+}
+
+URL_PATTERN = r'http\S+|www\S+'
+SPECIAL_CHARS_PATTERN = r'[^a-z0-9\s]'
+
+# Queries made only of lowercase alphanumeric words separated by single
+# spaces can be answered from the index (they contain no regex syntax)
+PLAIN_QUERY = re.compile(r'[a-z0-9]+(?: [a-z0-9]+)*')
+
+# Above this many matching vocabulary entries a search gathers rows with one
+# vectorized pass over all tokens instead of one slice per posting list
+POSTINGS_GATHER_LIMIT = 1000
+
+
+def _joined_lowercase(series: pd.Series) -> Tuple[np.ndarray, str]:
+    """
+    Non-missing values of a column lowercased and joined into one string,
+    one row per line, so regex passes run once over the whole corpus
+    Returns: (row positions of the joined lines, joined text)
+    """
+    values = pd.Series(series.to_numpy(), dtype=object)
+    values = values[values.notna()]
+    texts = values.astype(str)
+    if texts.str.contains('\n', regex=False).any():
+        # Embedded newlines are whitespace to the tokenizer either way
+        texts = texts.str.replace('\n', ' ', regex=False)
+    return values.index.to_numpy(dtype=np.int64), '\n'.join(texts.tolist()).lower()
+
+
+# Marks row boundaries inside a joined corpus; never survives tokenization
+ROW_SEPARATOR = '\x01'
+
+
+def _tokenize_lines(positions: np.ndarray, text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Whitespace-split a joined text (one row per line) in a single pass
+    Row boundaries become separator tokens, so the row of every token is a
+    cumulative count of the separators before it
+    Returns: (row position of each token, token codes, vocabulary)
+    """
+    if len(positions) == 0:
+        return positions, np.array([], dtype=np.int64), np.array([], dtype=object)
+    tokens = np.array(text.replace('\n', f' {ROW_SEPARATOR} ').split(), dtype=object)
+    codes, vocab = pd.factorize(tokens, sort=False)
+    del tokens
+    separator = np.flatnonzero(vocab == ROW_SEPARATOR)
+    if len(separator) == 0:
+        return np.full(len(codes), positions[0], dtype=np.int64), codes, vocab
+    is_separator = codes == separator[0]
+    rows = positions[np.cumsum(is_separator)[~is_separator]]
+    codes = codes[~is_separator]
+    # Drop the separator from the vocabulary and close the gap in the codes
+    codes = codes - (codes > separator[0])
+    vocab = np.delete(vocab, separator[0])
+    return rows, codes, vocab
+
+
+def search_tokens(series: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Maximal lowercase alphanumeric runs of every row
+    Returns: (row position of each token, token codes, vocabulary)
+    """
+    positions, text = _joined_lowercase(series)
+    return _tokenize_lines(positions, re.sub(r'[^a-z0-9\n]+', ' ', text))
+
+
+def non_ascii_rows(series: pd.Series) -> np.ndarray:
+    """
+    Row positions of values with non-ASCII text; lowercasing them does not
+    always agree with case-insensitive matching (e.g. 'İ' -> 'i̇')
+    """
+    values = pd.Series(series.to_numpy(), dtype=object)
+    values = values[values.notna()].astype(str)
+    return values.index.to_numpy(dtype=np.int64)[~values.map(str.isascii).to_numpy(dtype=bool)]
+
+
+def word_tokens(series: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Batched equivalent of tokenize_and_clean over a whole column (before
+    stop-word filtering): lowercase, strip URLs and special characters
+    The regexes run once over the joined column instead of once per row
+    Returns: (row position of each token, token codes, vocabulary)
+    """
+    positions, text = _joined_lowercase(series)
+    text = re.sub(URL_PATTERN, '', text)
+    text = re.sub(SPECIAL_CHARS_PATTERN, '', text)
+    return _tokenize_lines(positions, text)
+
+
+def countable_words(vocab: np.ndarray) -> np.ndarray:
+    """Mask of vocabulary entries that count as words (no stop words, length > 2)"""
+    return np.fromiter((len(word) > 2 and word not in STOP_WORDS for word in vocab),
+                       dtype=bool, count=len(vocab))
+
+
+def top_counts(counts: np.ndarray, vocab: np.ndarray, top_n: int) -> Dict[str, int]:
+    """Most frequent tokens, ties in first-occurrence order (like Counter.most_common)"""
+    order = np.argsort(-counts, kind='stable')[:top_n]
+    return {str(vocab[i]): int(counts[i]) for i in order if counts[i] > 0}
+
+
+class TextIndex(ColumnIndex):
+    """
+    Column index for free text
+
+    - search postings: every maximal lowercase alphanumeric run of each row,
+      used to answer substring searches without scanning the text
+    - word tokens: the cleaned, stop-word-filtered tokens behind word
+      frequencies, counted per row selection with one bincount
+    """
+
+    def __init__(self, series: pd.Series):
+        super().__init__(series)
+        self.num_rows = len(series)
+
+        rows, codes, vocab = search_tokens(series)
+        order = np.argsort(codes, kind='stable')
+        self._search_vocab = pd.Series(vocab, dtype=object)
+        self._search_token_rows = rows
+        self._search_token_codes = codes
+        self._postings = rows[order]
+        self._offsets = np.searchsorted(codes[order], np.arange(len(vocab) + 1))
+        self._non_ascii_rows = non_ascii_rows(series)
+
+        rows, codes, vocab = word_tokens(series)
+        # Stop words and short tokens stay in the vocabulary but never count
+        self._word_rows = rows
+        self._word_codes = codes
+        self._word_vocab = vocab
+        self._word_countable = countable_words(vocab)
+        self._word_counts = np.bincount(codes, minlength=len(vocab)) * self._word_countable
+
+    def _rows_matching(self, word: str) -> np.ndarray:
+        """Mask of rows with a token containing the word"""
+        hits = np.flatnonzero(self._search_vocab.str.contains(word, regex=False).to_numpy())
+        mask = np.zeros(self.num_rows, dtype=bool)
+        if len(hits) > POSTINGS_GATHER_LIMIT:
+            selected = np.zeros(len(self._search_vocab), dtype=bool)
+            selected[hits] = True
+            mask[self._search_token_rows[selected[self._search_token_codes]]] = True
+        else:
+            for code in hits:
+                mask[self._postings[self._offsets[code]:self._offsets[code + 1]]] = True
+        return mask
+
+    def search_mask(self, query: Optional[str]) -> Optional[np.ndarray]:
+        """
+        Rows containing the query (case-insensitive), answered from postings
+
+        Every occurrence of an alphanumeric word lies inside one indexed
+        token, so single-word results are exact. Multi-word queries
+        intersect the words' rows and confirm only those candidates against
+        the raw text. Rows with non-ASCII text are matched like the scan
+        does, since lowercasing them can disagree with case-insensitive
+        matching. Anything else falls back to a scan.
+        """
+        if not query:
+            return None
+        lowered = query.lower()
+        if not PLAIN_QUERY.fullmatch(lowered):
+            return super().search_mask(query)
+
+        words = lowered.split(' ')
+        mask = self._rows_matching(words[0])
+        for word in words[1:]:
+            mask &= self._rows_matching(word)
+        if len(words) > 1:
+            candidates = np.flatnonzero(mask)
+            confirmed = self.series.iloc[candidates].astype(str).str.contains(
+                query, case=False, na=False, regex=False
+            ).to_numpy(dtype=bool)
+            mask[:] = False
+            mask[candidates[confirmed]] = True
+        if len(self._non_ascii_rows):
+            rows = self._non_ascii_rows
+            mask[rows] = self.series.iloc[rows].astype(str).str.contains(
+                query, case=False, na=False
+            ).to_numpy(dtype=bool)
+        return mask
+
+    def word_frequencies(self, positions: Optional[np.ndarray] = None, top_n: int = 50) -> Dict[str, int]:
+        """Top word counts over all rows, or over a row selection"""
+        if positions is None:
+            counts = self._word_counts
+        else:
+            selected = np.zeros(self.num_rows, dtype=bool)
+            selected[positions] = True
+            counts = np.bincount(self._word_codes[selected[self._word_rows]],
+                                 minlength=len(self._word_vocab)) * self._word_countable
+        return top_counts(counts, self._word_vocab, top_n)
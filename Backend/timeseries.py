@@ -0,0 +1,125 @@
+"""
+Time Series Module
+Resamples temporal columns into calendar buckets (second to year) so line
+charts carry a bounded number of points, counted with binary searches over
+pre-sorted timestamps instead of a pass over every row
+"""
+
+import pandas as pd
+import numpy as np
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# Points aimed for when the granularity is chosen automatically
+TEMPORAL_CHART_POINTS = int(os.environ.get('TEMPORAL_CHART_POINTS', 500))
+
+# Upper bound on buckets for an explicitly requested granularity
+MAX_TEMPORAL_POINTS = int(os.environ.get('MAX_TEMPORAL_POINTS', 10_000))
+
+NANOS_PER_DAY = 86_400 * 10**9
+
+# Granularity -> nominal bucket width in nanoseconds, finest first
+GRANULARITIES = {
+    'second': 10**9,
+    'minute': 60 * 10**9,
+    'hour': 3_600 * 10**9,
+    'day': NANOS_PER_DAY,
+    'week': 7 * NANOS_PER_DAY,
+    'month': int(30.436875 * NANOS_PER_DAY),
+    'year': int(365.2425 * NANOS_PER_DAY),
+}
+
+# Fixed-width granularities and their NumPy datetime units
+_UNITS = {'second': 's', 'minute': 'm', 'hour': 'h', 'day': 'D', 'month': 'M', 'year': 'Y'}
+
+
+def sorted_timestamps(series: pd.Series) -> np.ndarray:
+    """Non-missing timestamps of a column as sorted datetime64[ns] (tz-aware columns in UTC)"""
+    values = series.to_numpy(dtype='datetime64[ns]')
+    return np.sort(values[~np.isnat(values)])
+
+
+def choose_granularity(start: np.datetime64, end: np.datetime64,
+                       target_points: int = TEMPORAL_CHART_POINTS) -> str:
+    """Finest granularity that covers [start, end] in at most target_points buckets"""
+    span = int((end - start) / np.timedelta64(1, 'ns'))
+    for name, width in GRANULARITIES.items():
+        if span // width + 1 <= target_points:
+            return name
+    return 'year'
+
+
+def _floor(value: np.datetime64, granularity: str) -> np.datetime64:
+    """Start of the bucket containing a timestamp (weeks start on Monday)"""
+    if granularity == 'week':
+        day = value.astype('datetime64[D]')
+        # 1970-01-01 was a Thursday
+        return day - np.timedelta64((day.astype(np.int64) + 3) % 7, 'D')
+    return value.astype(f'datetime64[{_UNITS[granularity]}]')
+
+
+def bucket_edges(start: np.datetime64, end: np.datetime64, granularity: str) -> np.ndarray:
+    """Bucket boundaries (datetime64[ns]) from the bucket of start through the bucket of end"""
+    first, last = _floor(start, granularity), _floor(end, granularity)
+    step = np.timedelta64(1, 'W') if granularity == 'week' else np.timedelta64(1, _UNITS[granularity])
+    num_buckets = int((last - first) // step) + 1
+    if num_buckets > MAX_TEMPORAL_POINTS:
+        raise ValueError(f"{num_buckets} {granularity} buckets exceed the limit of {MAX_TEMPORAL_POINTS}; "
+                         f"choose a coarser granularity or a narrower window")
+    return (first + np.arange(num_buckets + 1) * step).astype('datetime64[ns]')
+
+
+def bucket_counts(timestamps: np.ndarray, edges: np.ndarray,
+                  weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Count sorted timestamps per bucket with one binary search per edge
+    weights: count of each timestamp when they are distinct values
+    """
+    positions = np.searchsorted(timestamps, edges, side='left')
+    if weights is None:
+        return np.diff(positions)
+    cumulative = np.concatenate([[0], np.cumsum(weights)])
+    return np.diff(cumulative[positions])
+
+
+def resample(timestamps: np.ndarray, granularity: str = 'auto',
+             start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None,
+             target_points: int = TEMPORAL_CHART_POINTS,
+             weights: Optional[np.ndarray] = None) -> Tuple[str, np.ndarray, np.ndarray]:
+    """
+    Bucketed counts of sorted timestamps, optionally within [start, end]
+    Returns: (granularity used, bucket edges, counts per bucket)
+    """
+    if start is not None or end is not None:
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+        timestamps = timestamps[lo:hi]
+        if weights is not None:
+            weights = weights[lo:hi]
+    if len(timestamps) == 0:
+        return (granularity if granularity != 'auto' else 'day'), timestamps[:0], np.zeros(0, dtype=np.int64)
+    first = timestamps[0] if start is None else max(start, timestamps[0])
+    last = timestamps[-1] if end is None else min(end, timestamps[-1])
+    if granularity == 'auto':
+        granularity = choose_granularity(first, last, target_points)
+    edges = bucket_edges(first, last, granularity)
+    return granularity, edges, bucket_counts(timestamps, edges, weights)
+
+
+def bucket_labels(edges: np.ndarray) -> list:
+    """Bucket start labels (date only when every bucket starts at midnight)"""
+    return pd.DatetimeIndex(edges[:-1]).astype(str).tolist()
+
+
+def temporal_chart(timestamps: np.ndarray, granularity: str = 'auto',
+                   weights: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Line chart of a temporal column resampled to a bounded number of points"""
+    granularity, edges, counts = resample(timestamps, granularity, weights=weights)
+    return {
+        'type': 'line',
+        'data': {
+            'labels': bucket_labels(edges),
+            'values': counts.tolist(),
+            'granularity': granularity
+        }
+    }
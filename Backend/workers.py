@@ -0,0 +1,146 @@
+"""
+Worker Pool Module
+Runs CPU-bound stages (parsing, analytics, image clustering) outside the
+asyncio event loop, with a bound on in-flight jobs for backpressure
+"""
+
+from fastapi import HTTPException
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from metrics import in_request_context
+
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+
+class WorkerPool:
+    """
+    Lazily started thread or process pool with admission control
+
+    At most max_pending jobs may be running or queued at once; further
+    submissions are rejected immediately with 503 and a Retry-After header
+    instead of piling up behind a saturated pool.
+
+    Thread pools suit work on data held by this process (pandas and NumPy
+    release the GIL in their heavy loops); process pools suit self-contained
+    jobs whose inputs and outputs are cheap to pickle.
+    """
+
+    def __init__(self, name: str, kind: str = 'thread', max_workers: int = DEFAULT_WORKERS,
+                 max_pending: Optional[int] = None, retry_after: int = 1):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unsupported pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending if max_pending is not None else self.max_workers * 2
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    # spawn avoids forking a process whose BLAS/OpenMP threads are running
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-worker",
+                    )
+            return self._executor
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Server busy: {self.name} pool is saturated, retry shortly",
+                    headers={'Retry-After': str(self.retry_after)},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def _job(self, func: Callable, *args: Any, **kwargs: Any) -> Callable[[], Any]:
+        """
+        The callable submitted to the executor: thread jobs run in the
+        request's context so their stages are traced; process jobs cannot
+        carry it across the pickle boundary
+        """
+        job = partial(func, *args, **kwargs)
+        return in_request_context(job) if self.kind == 'thread' else job
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run func(*args, **kwargs) in the pool without blocking the event loop"""
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._job(func, *args, **kwargs))
+        finally:
+            self._release()
+
+    def start(self, func: Callable, *args: Any, **kwargs: Any) -> 'asyncio.Future':
+        """
+        Admit and submit func(*args, **kwargs) right away, so a saturated
+        pool still fails with 503 before a streamed response has begun
+        Returns the job's future; its slot is released when it finishes
+        """
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self._job(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def pool_from_env(name: str, prefix: str, default_kind: str = 'thread') -> WorkerPool:
+    """
+    Build a pool configured by <PREFIX>_POOL (thread|process),
+    <PREFIX>_WORKERS and <PREFIX>_MAX_PENDING environment variables
+    """
+    max_workers = int(os.environ.get(f'{prefix}_WORKERS', DEFAULT_WORKERS))
+    max_pending = os.environ.get(f'{prefix}_MAX_PENDING')
+    return WorkerPool(
+        name=name,
+        kind=os.environ.get(f'{prefix}_POOL', default_kind),
+        max_workers=max_workers,
+        max_pending=int(max_pending) if max_pending else None,
+    )
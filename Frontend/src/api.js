@@ -9,42 +9,184 @@ const apiClient = axios.create({
   },
 });
 
+// Compact columnar JSON: sample rows arrive as one array per column
+const COLUMNAR_JSON = 'application/vnd.dataviz.columnar+json';
+
+/**
+ * Expand columnar sample_data ({ column: values }) back into row records
+ */
+const rowsFromColumns = (columns) => {
+  const names = Object.keys(columns);
+  const numRows = names.length ? columns[names[0]].length : 0;
+  const rows = new Array(numRows);
+  for (let i = 0; i < numRows; i += 1) {
+    const row = {};
+    names.forEach((name) => {
+      row[name] = columns[name][i];
+    });
+    rows[i] = row;
+  }
+  return rows;
+};
+
+/**
+ * Request a profile in columnar JSON and hand components the usual row records
+ */
+const columnarProfile = async (request) => {
+  const response = await request({ headers: { Accept: COLUMNAR_JSON } });
+  const { data } = response;
+  if (data && data.sample_data && !Array.isArray(data.sample_data)) {
+    data.sample_data = rowsFromColumns(data.sample_data);
+  }
+  return response;
+};
+
+/**
+ * Values of a raw-value page as a typed array when they are all numbers
+ */
+const typedValues = (values) => (
+  values.every((value) => typeof value === 'number') ? Float64Array.from(values) : values
+);
+
 /**
  * API endpoints for data visualization backend
  */
 export const api = {
   /**
-   * Upload a file (CSV, JSON, TXT, XLSX, TSV)
+   * Upload a file (CSV, JSON, NDJSON, TXT, XLSX, TSV)
    */
   uploadFile: async (file) => {
     const formData = new FormData();
     formData.append('file', file);
-    return apiClient.post('/upload', formData, {
+    return columnarProfile(({ headers }) => apiClient.post('/upload', formData, {
       headers: {
+        ...headers,
         'Content-Type': 'multipart/form-data',
       },
-    });
+    }));
+  },
+
+  /**
+   * Upload a file and receive its profile stage by stage (NDJSON stream):
+   * onEvent gets schema, sample, one event per column, words and finally done
+   * Resolves once the stream ends; an error event rejects
+   */
+  uploadFileStreaming: async (file, onEvent) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    // axios cannot read a response progressively in the browser, so use fetch
+    const response = await fetch(`${API_URL}/upload?stream=ndjson`, { method: 'POST', body: formData });
+    if (!response.ok) {
+      const { detail } = await response.json();
+      throw new Error(detail);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      // eslint-disable-next-line no-await-in-loop
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      lines.filter((line) => line).forEach((line) => {
+        const event = JSON.parse(line);
+        if (event.stage === 'error') {
+          throw new Error(event.detail);
+        }
+        onEvent(event);
+      });
+      if (done) {
+        return;
+      }
+    }
+  },
+
+  /**
+   * Append the rows of a file to an existing dataset
+   */
+  appendFile: async (file, datasetId) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return columnarProfile(({ headers }) => apiClient.post('/append', formData, {
+      headers: {
+        ...headers,
+        'Content-Type': 'multipart/form-data',
+      },
+      params: { dataset_id: datasetId },
+    }));
+  },
+
+  /**
+   * Apply filters to a dataset (defaults to the most recent upload)
+   */
+  filterData: async (filterRequest, datasetId) => {
+    return columnarProfile((config) => apiClient.post('/filter', { ...filterRequest, dataset_id: datasetId }, config));
+  },
+
+  /**
+   * Group-by aggregation (e.g. mean salary by department), with optional filter predicates
+   */
+  aggregateData: async (aggregateRequest, datasetId) => {
+    const response = await apiClient.post('/aggregate', { ...aggregateRequest, dataset_id: datasetId });
+    return response.data;
+  },
+
+  /**
+   * A page of rows for a data grid: the filter of filterData, plus sortBy,
+   * descending, columns, limit and either offset or after (the previous
+   * page's nextCursor)
+   */
+  getRows: async (rowsRequest, datasetId) => {
+    const response = await apiClient.post('/rows', { ...rowsRequest, dataset_id: datasetId });
+    return response.data;
   },
 
   /**
-   * Apply filters to the current dataset
+   * Correlation matrix of numeric columns (pearson or spearman) and density
+   * grids of column pairs, over the rows selected by a filterData filter
    */
-  filterData: async (filterRequest) => {
-    return apiClient.post('/filter', filterRequest);
+  getCorrelation: async (correlationRequest, datasetId) => {
+    const response = await apiClient.post('/correlation', { ...correlationRequest, dataset_id: datasetId });
+    return response.data;
   },
 
   /**
    * Reset to original dataset
    */
-  resetData: async () => {
-    return apiClient.delete('/reset');
+  resetData: async (datasetId) => {
+    return columnarProfile((config) => apiClient.delete('/reset', { ...config, params: { dataset_id: datasetId } }));
+  },
+
+  /**
+   * Event counts of a temporal column per time bucket, optionally zoomed to a window
+   */
+  getColumnTimeseries: async (column, { datasetId, granularity = 'auto', start, end } = {}) => {
+    const response = await apiClient.get(`/column/${encodeURIComponent(column)}/timeseries`, {
+      params: { dataset_id: datasetId, granularity, start, end },
+    });
+    return response.data;
   },
 
   /**
-   * Get column information
+   * Page through the raw values of a column (numeric pages as a Float64Array)
    */
-  getColumnInfo: async (column) => {
-    return apiClient.get(`/column/${column}`);
+  getColumnValues: async (column, { datasetId, offset = 0, limit = 1000 } = {}) => {
+    const response = await apiClient.get(`/column/${column}/values`, {
+      headers: { Accept: COLUMNAR_JSON },
+      params: { dataset_id: datasetId, offset, limit },
+    });
+    response.data.values = typedValues(response.data.values);
+    return response;
+  },
+
+  /**
+   * Get the statistics and chart data of one column (computed on demand)
+   */
+  getColumnInfo: async (column, datasetId) => {
+    return apiClient.get(`/column/${encodeURIComponent(column)}`, {
+      params: { dataset_id: datasetId },
+    });
   },
 };
 
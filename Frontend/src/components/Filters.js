@@ -27,7 +27,7 @@ function Filters({ datasetInfo }) {
   // Search filter state
   const [searchQuery, setSearchQuery] = useState('');
 
-  const { setChartData, setFilteredRows, setMessage, activeFilters, setActiveFilters } = useStore();
+  const { setChartData, setFilteredRows, setWordFrequencies, setMessage, activeFilters, setActiveFilters } = useStore();
 
   // Update filter options when column changes
   useEffect(() => {
@@ -38,20 +38,36 @@ function Filters({ datasetInfo }) {
     setSelectedCategories([]);
     setSearchQuery('');
 
-    if (colType === 'numeric') {
-      const stats = datasetInfo.statistics[selectedColumn];
-      if (stats) {
-        setMinBound(stats.min);
-        setMaxBound(stats.max);
-        setMinValue(stats.min);
-        setMaxValue(stats.max);
-      }
-    } else if (colType === 'categorical') {
-      const stats = datasetInfo.statistics[selectedColumn];
-      if (stats && stats.top_values) {
-        setAvailableCategories(Object.keys(stats.top_values));
+    const applyStats = (stats) => {
+      if (colType === 'numeric') {
+        if (stats) {
+          setMinBound(stats.min);
+          setMaxBound(stats.max);
+          setMinValue(stats.min);
+          setMaxValue(stats.max);
+        }
+      } else if (colType === 'categorical') {
+        if (stats && stats.top_values) {
+          setAvailableCategories(Object.keys(stats.top_values));
+        }
       }
+    };
+
+    // Lazy profiles (wide datasets) carry no statistics; fetch this column's on demand
+    const known = (datasetInfo.statistics || {})[selectedColumn];
+    if (known || colType === 'temporal') {
+      applyStats(known);
+      return undefined;
     }
+    let cancelled = false;
+    api.getColumnInfo(selectedColumn, datasetInfo.dataset_id)
+      .then((response) => {
+        if (!cancelled) applyStats(response.data.statistics);
+      })
+      .catch((error) => console.error('Column profile error:', error));
+    return () => {
+      cancelled = true;
+    };
   }, [selectedColumn, datasetInfo]);
 
   // Handle category toggle
@@ -92,12 +108,15 @@ function Filters({ datasetInfo }) {
         filterRequest.search_query = searchQuery;
       }
 
-      const response = await api.filterData(filterRequest);
+      const response = await api.filterData(filterRequest, datasetInfo.dataset_id);
       const data = response.data;
 
       // Update store
       setChartData(data.chart_data);
       setFilteredRows(data.num_rows);
+      if (data.word_frequencies !== undefined) {
+        setWordFrequencies(data.word_frequencies);
+      }
       setActiveFilters({
         column: selectedColumn,
         type: filterType,
@@ -119,10 +138,11 @@ function Filters({ datasetInfo }) {
   // Reset filters
   const handleReset = async () => {
     try {
-      const response = await api.resetData();
+      const response = await api.resetData(datasetInfo.dataset_id);
       const data = response.data;
 
       setChartData(data.chart_data);
+      setWordFrequencies(data.word_frequencies);
       setFilteredRows(null);
       setActiveFilters({});
       setSelectedColumn('');
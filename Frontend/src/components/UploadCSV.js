@@ -6,7 +6,7 @@ import './UploadCSV.css';
 
 /**
  * Component for multi-format file upload
- * Supports: CSV, JSON, TXT, XLSX, TSV
+ * Supports: CSV, JSON, NDJSON, TXT, XLSX, TSV
  */
 function UploadCSV() {
   const [selectedFile, setSelectedFile] = useState(null);
@@ -24,7 +24,7 @@ function UploadCSV() {
     resetAll
   } = useStore();
 
-  const supportedFormats = ['.csv', '.json', '.txt', '.xlsx', '.tsv'];
+  const supportedFormats = ['.csv', '.json', '.ndjson', '.jsonl', '.txt', '.xlsx', '.tsv'];
 
   // Handle file selection
   const handleFileSelect = (event) => {
@@ -110,7 +110,7 @@ function UploadCSV() {
     <div className="upload-container">
       <div className="upload-header">
         <h2><FaUpload /> Upload Your Data</h2>
-        <p>Supports: CSV, JSON, TXT, XLSX, TSV</p>
+        <p>Supports: CSV, JSON, NDJSON, TXT, XLSX, TSV</p>
       </div>
       
       <div 
@@ -135,7 +135,7 @@ function UploadCSV() {
               {selectedFile ? selectedFile.name : 'Choose file or drag & drop'}
             </p>
             {!selectedFile && (
-              <p className="label-subtitle">Supported formats: CSV, JSON, TXT, XLSX, TSV</p>
+              <p className="label-subtitle">Supported formats: CSV, JSON, NDJSON, TXT, XLSX, TSV</p>
             )}
           </div>
         </label>